@@ -3,8 +3,48 @@ Configuration settings for the scheduling system.
 """
 import os
 
-def setup_paths():
-    """Set up and return all file paths needed by the application"""
+# Named CBC solver profiles. Keys map directly onto pulp.PULP_CBC_CMD arguments.
+SOLVER_PROFILES = {
+    # Nightly drafts: stop at a 1% gap, skip the expensive cut generators
+    'draft': {
+        'timeLimit': 60,
+        'gapRel': 0.01,
+        'threads': os.cpu_count() or 1,
+        'cuts': False,
+        'presolve': True,
+    },
+    # Default production run
+    'balanced': {
+        'timeLimit': 300,
+        'gapRel': 0.001,
+        'threads': os.cpu_count() or 1,
+        'presolve': True,
+    },
+    # Prove optimality with every cut generator on
+    'exhaustive': {
+        'timeLimit': 3600,
+        'gapRel': 0.0,
+        'threads': os.cpu_count() or 1,
+        'cuts': True,
+        'presolve': True,
+    },
+}
+DEFAULT_SOLVER_PROFILE = 'balanced'
+
+def get_solver_profile(name=None):
+    """Return a copy of the named solver profile (the default profile if name is None)"""
+    name = name or DEFAULT_SOLVER_PROFILE
+    if name not in SOLVER_PROFILES:
+        raise ValueError(f"Unknown solver profile '{name}', expected one of {list(SOLVER_PROFILES)}")
+    return dict(SOLVER_PROFILES[name])
+
+def setup_paths(solver_profile=None):
+    """
+    Set up and return all file paths needed by the application
+
+    The solver profile is taken from the argument, then the
+    SCHEDULER_SOLVER_PROFILE environment variable, then the default.
+    """
     BASE_DIR = '/home/himanshu/Downloads/test'
     
     # Input files
@@ -29,6 +69,10 @@ def setup_paths():
     OUTPUT_JSON_FILE = os.path.join(DATA_DIR, 'cleaned_data.json')
     ANALYSIS_REPORT_FILE = os.path.join(REPORT_DIR, 'analysis_report.md')
     
+    # Solver settings
+    SOLVER_PROFILE = solver_profile or os.environ.get('SCHEDULER_SOLVER_PROFILE', DEFAULT_SOLVER_PROFILE)
+    get_solver_profile(SOLVER_PROFILE)  # Fail early on an unknown profile name
+    
     return {
         'BASE_DIR': BASE_DIR,
         'STUDENT_REQUESTS_FILE': STUDENT_REQUESTS_FILE,
@@ -42,4 +86,5 @@ def setup_paths():
         'VISUALIZATION_DIR': VISUALIZATION_DIR,
         'OUTPUT_JSON_FILE': OUTPUT_JSON_FILE,
         'ANALYSIS_REPORT_FILE': ANALYSIS_REPORT_FILE,
+        'SOLVER_PROFILE': SOLVER_PROFILE,
     }
@@ -162,3 +162,24 @@ def save_schedule_data(schedule, output_file):
             'lecturer_schedules': {k: {str(bk): v for bk, v in v.items()} for k, v in schedule['lecturer_schedules'].items()}
         }
         json.dump(serializable_schedule, f, indent=2)
+
+def load_schedule_data(input_file):
+    """Load schedule data saved by save_schedule_data"""
+    with open(input_file, 'r') as f:
+        saved_schedule = json.load(f)
+    
+    schedule = {
+        'course_blocks': defaultdict(list),
+        'course_rooms': defaultdict(dict),
+        'student_schedules': defaultdict(dict),
+        'room_schedules': defaultdict(dict),
+        'lecturer_schedules': defaultdict(dict)
+    }
+    for key, entries in saved_schedule.items():
+        schedule[key].update(entries)
+    return schedule
+
+def load_request_delta(input_file):
+    """Load a request delta ({'add': [...], 'drop': [...]}) for an incremental solve"""
+    with open(input_file, 'r') as f:
+        return json.load(f)
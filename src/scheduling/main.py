@@ -2,6 +2,7 @@
 Main module for Crestwood College course scheduling system.
 This is the entry point that orchestrates the scheduling process.
 """
+import argparse
 import os
 import sys
 
@@ -19,23 +20,45 @@ except ImportError:
 
 # Import modules from the modular structure
 try:
-    from src.scheduling.config import setup_paths
+    from src.scheduling.config import SOLVER_PROFILES, setup_paths
     from src.scheduling.data import loader, processor
     from src.scheduling.analysis import validator, analyzer
     from src.scheduling.visualization import visualizer
-    from src.scheduling.scheduling import optimizer
+    from src.scheduling.scheduling import decomposition, incremental, optimizer
     from src.scheduling.reporting import reporter
 except ImportError as e:
     print(f"Error importing modules: {e}")
     print("Please make sure all required modules are installed and the project structure is correct.")
     sys.exit(1)
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options for the scheduling run"""
+    parser = argparse.ArgumentParser(description="Crestwood College course scheduling")
+    parser.add_argument('--solver-profile', choices=list(SOLVER_PROFILES),
+                        help="CBC solver profile (threads, MIP gap, cuts, presolve and time limit)")
+    parser.add_argument('--decompose', action='store_true',
+                        help="Solve each connected component of the request graph as its own MIP in parallel")
+    parser.add_argument('--backend', choices=optimizer.BACKENDS, default='pulp',
+                        help="Model backend: PuLP expressions, or a NumPy matrix written straight to MPS")
+    parser.add_argument('--aggregate', action='store_true',
+                        help="Model students with identical requests as one group with integer counts")
+    parser.add_argument('--lazy-rows', action='store_true',
+                        help="Matrix backend only: add student-block and room capacity rows only once violated")
+    parser.add_argument('--lexicographic', action='store_true',
+                        help="Solve required, then requested, then recommended requests, fixing each level in turn")
+    parser.add_argument('--previous-schedule',
+                        help="schedule.json from an earlier run; only students in --request-delta are re-solved")
+    parser.add_argument('--request-delta',
+                        help="JSON file of added and dropped requests to apply to the previous schedule")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to execute the scheduling plan"""
+    args = parse_args(argv)
     print("Starting Crestwood College course scheduling process...")
     
     # Setup paths
-    paths = setup_paths()
+    paths = setup_paths(solver_profile=args.solver_profile)
     
     # Step 1: Load and clean data
     print("Loading student request data...")
@@ -92,7 +115,25 @@ def main():
 
     # Step 11: Create the course schedule
     print("Creating course schedule...")
-    schedule = optimizer.create_course_schedule(structured_data)
+    if args.previous_schedule:
+        previous_schedule = processor.load_schedule_data(args.previous_schedule)
+        request_delta = processor.load_request_delta(args.request_delta) if args.request_delta else {}
+        schedule = optimizer.create_course_schedule(structured_data, solver_profile=paths['SOLVER_PROFILE'],
+                                                    previous_schedule=previous_schedule,
+                                                    request_delta=request_delta, backend=args.backend,
+                                                    aggregate=args.aggregate, lazy_rows=args.lazy_rows,
+                                                    lexicographic=args.lexicographic)
+        # The schedule is analyzed against the requests after the delta
+        structured_data, _ = incremental.apply_request_delta(structured_data, request_delta)
+    elif args.decompose:
+        schedule = decomposition.create_decomposed_schedule(structured_data, solver_profile=paths['SOLVER_PROFILE'],
+                                                            backend=args.backend, aggregate=args.aggregate,
+                                                            lazy_rows=args.lazy_rows,
+                                                            lexicographic=args.lexicographic)
+    else:
+        schedule = optimizer.create_course_schedule(structured_data, solver_profile=paths['SOLVER_PROFILE'],
+                                                    backend=args.backend, aggregate=args.aggregate,
+                                                    lazy_rows=args.lazy_rows, lexicographic=args.lexicographic)
     
     # Step 12: Analyze the schedule results
     print("Analyzing schedule results...")
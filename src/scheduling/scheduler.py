@@ -8,6 +8,11 @@ import os
 import re
 import pulp  # Add this import for the linear programming solver
 
+try:
+    from src.scheduling.config import get_solver_profile
+except ImportError:
+    from config import get_solver_profile
+
 # Define file paths
 BASE_DIR = '/home/himanshu/Downloads/test'
 STUDENT_REQUESTS_FILE = os.path.join(BASE_DIR, 'dataset.xlsx - Student requests.csv')
@@ -31,6 +36,9 @@ for directory in [OUTPUT_DIR, DATA_DIR, REPORT_DIR, VISUALIZATION_DIR]:
 OUTPUT_JSON_FILE = os.path.join(DATA_DIR, 'cleaned_data.json')
 ANALYSIS_REPORT_FILE = os.path.join(REPORT_DIR, 'analysis_report.md')
 
+# Solver profile name (see config.SOLVER_PROFILES); None selects the default
+SOLVER_PROFILE = os.environ.get('SCHEDULER_SOLVER_PROFILE')
+
 def load_student_requests(file_path):
     """Load and clean student request data"""
     try:
@@ -385,10 +393,10 @@ def convert_numpy_types(obj):
     else:
         return obj
 
-def create_course_schedule(structured_data):
+def create_course_schedule(structured_data, solver_profile=None):
     """
     Create a course schedule based on student requests and constraints
-    using PuLP linear programming solver
+    using PuLP linear programming solver, configured by a named solver profile
     """
     print("Creating course schedule...")
     
@@ -523,7 +531,7 @@ def create_course_schedule(structured_data):
     
     # Solve the problem
     print("Solving the scheduling problem...")
-    solver = pulp.PULP_CBC_CMD(msg=True, timeLimit=300)  # Limit solve time to 5 minutes
+    solver = pulp.PULP_CBC_CMD(msg=True, **get_solver_profile(solver_profile))
     prob.solve(solver)
     
     if pulp.LpStatus[prob.status] != 'Optimal':
@@ -915,7 +923,7 @@ def main():
 
     # Step 11: Create the course schedule
     print("Creating course schedule...")
-    schedule = create_course_schedule(structured_data)
+    schedule = create_course_schedule(structured_data, SOLVER_PROFILE)
     
     # Step 12: Analyze the schedule results
     print("Analyzing schedule results...")
@@ -1,6 +1,10 @@
+import bisect
+import heapq
+import itertools
 import json
 import random
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict
 import os
 
 # Create output directory paths
@@ -13,15 +17,45 @@ for directory in [OUTPUT_DIR, DATA_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory)
 
+class Section:
+    """
+    A course section. Enrolled students are held as indices into
+    CourseScheduler.students in a compact integer array.
+    """
+    __slots__ = ('course_code', 'section_num', 'students', 'lecturer_id', 'room', 'block',
+                 'max_size', 'target_size')
+
+    def __init__(self, course_code, section_num, max_size, target_size):
+        self.course_code = course_code
+        self.section_num = section_num
+        self.students = array('i')
+        self.lecturer_id = None
+        self.room = None
+        self.block = None
+        self.max_size = max_size
+        self.target_size = target_size
+
+    def __repr__(self):
+        return f"Section({self.course_code!r}, {self.section_num}, block={self.block!r})"
+
 class CourseScheduler:
-    def __init__(self, data_file):
-        """Initialize scheduler with cleaned data"""
-        with open(data_file, 'r') as f:
-            self.data = json.load(f)
+    def __init__(self, data_file=None, data=None, seed=None):
+        """
+        Initialize scheduler with cleaned data from a JSON file or an in-memory dictionary.
+        A seed makes the random tie-breaking, and therefore the greedy schedule, reproducible.
+        """
+        if data is None:
+            with open(data_file, 'r') as f:
+                data = json.load(f)
+        self.data = data
+        self.seed = seed
+        self.rng = random.Random(seed)
         
         self.blocks = self.data['blocks']
         self.courses = {c['code']: c for c in self.data['courses']}
         self.students = self.data['students']
+        # Students are referred to by their position in self.students
+        self.student_ids = [student['id'] for student in self.students]
         self.lecturers = self.data['lecturers']
         self.rooms = self.data['rooms']
         
@@ -30,8 +64,47 @@ class CourseScheduler:
         
         # Track course sections and assignments
         self.course_sections = {}
-        self.student_assignments = defaultdict(dict)
+        self.student_assignments = [{} for _ in self.students]
         self.lecturer_assignments = defaultdict(list)
+        
+        # Block occupancy as bitmasks (bit i set = busy in self.blocks[i]), kept
+        # up to date by _enroll, _unenroll and _set_section_block
+        self.block_bits = {block: 1 << i for i, block in enumerate(self.blocks)}
+        self.student_masks = [0] * len(self.students)
+        self.lecturer_masks = defaultdict(int)
+        self.course_block_masks = {
+            code: self.blocks_mask(course.get('available_blocks', self.blocks))
+            & ~self.blocks_mask(course.get('unavailable_blocks', []))
+            for code, course in self.courses.items()
+        }
+        
+        # Per course and block, a lazy min-heap of (enrollment, section_num, section)
+        # entries for scheduled sections; entries that no longer match are skipped
+        self.open_sections = defaultdict(lambda: defaultdict(list))
+        self.unscheduled_sections = defaultdict(list)
+        
+        # Requesters of each course, and how many students request each pair of courses
+        self.course_requesters = defaultdict(lambda: array('i'))
+        self.co_requests = defaultdict(Counter)
+        for student_id, student in enumerate(self.students):
+            codes = {request['code'] for priority in ['required', 'requested', 'recommended']
+                     for request in student['requests'].get(priority, [])}
+            for code in codes:
+                self.course_requesters[code].append(student_id)
+                for other in codes:
+                    if other != code:
+                        self.co_requests[code][other] += 1
+
+    def blocks_mask(self, blocks):
+        """Bitmask of a collection of blocks"""
+        mask = 0
+        for block in blocks:
+            mask |= self.block_bits.get(block, 0)
+        return mask
+
+    def mask_blocks(self, mask):
+        """Blocks set in a bitmask, in block order"""
+        return [block for block in self.blocks if mask & self.block_bits[block]]
 
     def create_course_sections(self):
         """Create sections for each course based on demand and constraints"""
@@ -59,19 +132,10 @@ class CourseScheduler:
             # Create section objects
             sections = []
             for i in range(num_sections):
-                section = {
-                    'course_code': code,
-                    'section_num': i + 1,
-                    'students': [],
-                    'lecturer_id': None,
-                    'room': None,
-                    'block': None,
-                    'max_size': max_size,
-                    'target_size': target_size
-                }
-                sections.append(section)
+                sections.append(Section(code, i + 1, max_size, target_size))
             
             self.course_sections[code] = sections
+            self.unscheduled_sections[code] = list(sections)
     
     def assign_lecturers_to_sections(self):
         """Assign lecturers to course sections"""
@@ -91,47 +155,55 @@ class CourseScheduler:
             lecturers = qualified_lecturers[code]
             for i, section in enumerate(sections):
                 lecturer_id = lecturers[i % len(lecturers)]
-                section['lecturer_id'] = lecturer_id
+                section.lecturer_id = lecturer_id
+
+    def assign_rooms(self, best_fit_decreasing=True):
+        """
+        Assign rooms to course sections based on capacity
 
-    def assign_rooms(self):
-        """Assign rooms to course sections based on capacity"""
-        # Sort rooms by capacity
+        Each block keeps its free rooms sorted by capacity, so the smallest
+        room that fits is found by binary search. With best_fit_decreasing the
+        largest sections are placed first, which keeps wasted seats low;
+        otherwise sections are placed in schedule order. Returns a summary
+        with the number of placed sections, unplaced sections and wasted seats.
+        """
+        # Free rooms per block, as parallel capacity-sorted lists
         sorted_rooms = sorted(self.rooms, key=lambda r: r['capacity'])
-        room_assignments = {room['room_number']: {} for room in self.rooms}
+        free_capacities = {block: [room['capacity'] for room in sorted_rooms] for block in self.blocks}
+        free_rooms = {block: [room['room_number'] for room in sorted_rooms] for block in self.blocks}
         
-        # Assign rooms by block, starting with largest sections
-        all_sections = []
-        for sections in self.course_sections.values():
-            all_sections.extend(sections)
+        sections = [section for block in self.blocks for section in self.schedule[block]]
+        if best_fit_decreasing:
+            # Sort sections by expected size (descending)
+            sections.sort(key=lambda s: len(s.students), reverse=True)
         
-        # Sort sections by expected size (descending)
-        all_sections.sort(key=lambda s: len(s['students']), reverse=True)
-        
-        for section in all_sections:
-            if not section['block']:
-                continue
-                
-            block = section['block']
-            section_size = len(section['students'])
+        placed = 0
+        wasted_seats = 0
+        unplaced = []
+        for section in sections:
+            block = section.block
+            section_size = len(section.students)
+            capacities = free_capacities[block]
             
-            # Find suitable room
-            assigned = False
-            for room in sorted_rooms:
-                room_id = room['room_number']
-                if room['capacity'] >= section_size and block not in room_assignments[room_id]:
-                    room_assignments[room_id][block] = section
-                    section['room'] = room_id
-                    assigned = True
-                    break
+            # Smallest free room that fits
+            position = bisect.bisect_left(capacities, section_size)
+            if position == len(capacities):
+                unplaced.append(f"{section.course_code} section {section.section_num} in block {block}")
+                continue
             
-            if not assigned:
-                print(f"Warning: Could not find suitable room for {section['course_code']} section {section['section_num']} in block {block}")
+            wasted_seats += capacities.pop(position) - section_size
+            section.room = free_rooms[block].pop(position)
+            placed += 1
+        
+        if unplaced:
+            print(f"Warning: Could not find suitable rooms for {len(unplaced)} sections: "
+                  f"{', '.join(unplaced[:5])}{', ...' if len(unplaced) > 5 else ''}")
+        
+        return {'placed': placed, 'unplaced': len(unplaced), 'wasted_seats': wasted_seats}
 
     def schedule_required_courses(self):
         """Schedule all required courses first"""
-        for student in self.students:
-            student_id = student['id']
-            
+        for student_id, student in enumerate(self.students):
             # Process required courses
             for request in student['requests'].get('required', []):
                 course_code = request['code']
@@ -142,9 +214,7 @@ class CourseScheduler:
 
     def schedule_requested_courses(self):
         """Schedule requested courses after required courses"""
-        for student in self.students:
-            student_id = student['id']
-            
+        for student_id, student in enumerate(self.students):
             # Process requested courses
             for request in student['requests'].get('requested', []):
                 course_code = request['code']
@@ -155,9 +225,7 @@ class CourseScheduler:
 
     def schedule_recommended_courses(self):
         """Schedule recommended courses last"""
-        for student in self.students:
-            student_id = student['id']
-            
+        for student_id, student in enumerate(self.students):
             # Process recommended courses
             for request in student['requests'].get('recommended', []):
                 course_code = request['code']
@@ -166,115 +234,350 @@ class CourseScheduler:
                 
                 self._assign_student_to_course(student_id, course_code)
 
-    def _assign_student_to_course(self, student_id, course_code):
-        """Assign a student to a section of the requested course"""
-        # Skip if student already assigned to this course
-        if course_code in self.student_assignments[student_id]:
-            return
-        
-        sections = self.course_sections.get(course_code, [])
-        if not sections:
-            return
-        
-        # Find student's current block assignments
-        student_blocks = set()
-        for assigned_course, assigned_section in self.student_assignments[student_id].items():
-            if assigned_section['block']:
-                student_blocks.add(assigned_section['block'])
+    def schedule_most_constrained_first(self):
+        """
+        Schedule all requests by priority, most constrained first (DSATUR-style)
+
+        Within each priority, requests an open section can already take go
+        first, fewest remaining options (open sections in blocks the student
+        has free, plus free blocks for unscheduled sections) first. Requests
+        that have to open a section follow, students with the fewest free
+        blocks first, so sections are opened once most students' blocks are
+        known. A request's key only changes when its student takes a block, or
+        when a section of its course fills up or gets a block (which also
+        narrows the blocks left to the lecturer's other sections), so only those
+        requests are recounted. A request whose key changed gets a new heap
+        entry under a new version number, and entries with an outdated version
+        are skipped when popped.
+        """
+        priority_rank = {'required': 0, 'requested': 1, 'recommended': 2}
+        pending = {}  # (student_id, course_code) -> [rank, options key, version]
+        student_requests = defaultdict(list)
+        course_requests = defaultdict(set)
+        lecturer_courses = defaultdict(set)
+        heap = []
+        versions = itertools.count()  # unique, so heap entries never compare course codes
         
-        # Find sections that aren't full and don't conflict with student's schedule
-        available_sections = []
-        for section in sections:
-            # Skip full sections
-            if len(section['students']) >= section['max_size']:
+        for code, sections in self.course_sections.items():
+            for section in sections:
+                if section.lecturer_id:
+                    lecturer_courses[section.lecturer_id].add(code)
+        
+        def recount(key):
+            state = pending[key]
+            options = self._request_options(*key)
+            if options != state[1]:
+                state[1] = options
+                state[2] = next(versions)
+                heapq.heappush(heap, (state[0], options, key[0], state[2], key[1]))
+        
+        for student_id, student in enumerate(self.students):
+            for priority in ['required', 'requested', 'recommended']:
+                for request in student['requests'].get(priority, []):
+                    course_code = request['code']
+                    if course_code not in self.course_sections or (student_id, course_code) in pending:
+                        continue
+                    student_requests[student_id].append(course_code)
+                    course_requests[course_code].add(student_id)
+                    rank = priority_rank[priority]
+                    options = self._request_options(student_id, course_code)
+                    version = next(versions)
+                    pending[(student_id, course_code)] = [rank, options, version]
+                    heapq.heappush(heap, (rank, options, student_id, version, course_code))
+        
+        while heap:
+            _, _, student_id, version, course_code = heapq.heappop(heap)
+            key = (student_id, course_code)
+            if key not in pending or pending[key][2] != version:
                 continue
+            del pending[key]
+            course_requests[course_code].discard(student_id)
             
-            # If section is not yet scheduled, add it as an option
-            if not section['block']:
-                available_sections.append(section)
+            unscheduled = len(self.unscheduled_sections[course_code])
+            self._assign_student_to_course(student_id, course_code)
+            section = self.student_assignments[student_id].get(course_code)
+            if section is None:
                 continue
             
-            # Skip sections in blocks where student already has a class
-            if section['block'] in student_blocks:
-                continue
+            # The student's block is taken for their other requests
+            for code in student_requests[student_id]:
+                if (student_id, code) in pending:
+                    recount((student_id, code))
             
-            available_sections.append(section)
+            opened = len(self.unscheduled_sections[course_code]) < unscheduled
+            if opened or len(section.students) >= section.max_size:
+                for other in course_requests[course_code]:
+                    recount((other, course_code))
+            if opened and section.lecturer_id:
+                for code in lecturer_courses[section.lecturer_id]:
+                    if code != course_code and self.unscheduled_sections[code]:
+                        for other in course_requests[code]:
+                            recount((other, code))
+
+    def _request_options(self, student_id, course_code):
+        """
+        Sort key for a pending request: (0, ways it could still be placed)
+        while an open section in a block the student has free can take it,
+        otherwise (1, blocks the student has free) since it has to open a section
+        """
+        student_mask = self.student_masks[student_id]
+        fits = False
+        options = 0
+        for section in self.course_sections[course_code]:
+            if len(section.students) >= section.max_size:
+                continue
+            if section.block:
+                free = not self.block_bits[section.block] & student_mask
+                fits = fits or free
+                options += free
+            else:
+                options += bin(self._valid_block_mask(section) & ~student_mask).count('1')
+        if fits:
+            return (0, options)
+        return (1, len(self.blocks) - bin(student_mask).count('1'))
+
+    def _assign_student_to_course(self, student_id, course_code):
+        """Assign a student to a section of the requested course"""
+        # Skip if student already assigned to this course
+        if course_code in self.student_assignments[student_id]:
+            return
         
-        if not available_sections:
-            # No available section found
+        if not self.course_sections.get(course_code):
             return
         
-        # Prefer sections that are already scheduled but not full
-        scheduled_sections = [s for s in available_sections if s['block']]
-        if scheduled_sections:
-            # Choose the least filled section
-            section = min(scheduled_sections, key=lambda s: len(s['students']))
-        else:
-            # Choose an unscheduled section
-            section = available_sections[0]
+        student_mask = self.student_masks[student_id]
+        
+        # Prefer the least filled scheduled section that isn't full and doesn't conflict
+        section = self._least_filled_section(course_code, student_mask)
+        if section is None:
+            # Otherwise open an unscheduled section
+            section = next(
+                (s for s in self.unscheduled_sections[course_code] if len(s.students) < s.max_size), None
+            )
+            if section is None:
+                # No available section found
+                return
+            
+            # Leave the section unscheduled if every block it could take clashes with the student's schedule
+            valid_mask = self._valid_block_mask(section)
+            if valid_mask and not valid_mask & ~student_mask:
+                return
             
-            # Assign a block to this section if it's not scheduled yet
-            if not section['block']:
-                self._assign_block_to_section(section)
+            self._assign_block_to_section(section, student_mask)
         
         # Assign the student to the selected section
-        section['students'].append(student_id)
-        self.student_assignments[student_id][course_code] = section
+        self._enroll(student_id, section)
 
-    def _assign_block_to_section(self, section):
-        """Assign an appropriate block to a section"""
-        course_code = section['course_code']
+    def _least_filled_section(self, course_code, student_mask):
+        """Least filled open section of a course outside the student's busy blocks, or None"""
+        best = None
+        for block, heap in self.open_sections[course_code].items():
+            if self.block_bits[block] & student_mask:
+                continue
+            # Drop entries for sections that have since changed size or block, or filled up
+            while heap:
+                size, _, section = heap[0]
+                if section.block == block and len(section.students) == size and size < section.max_size:
+                    break
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0][:2] < best[:2]):
+                best = heap[0]
+        return best[2] if best else None
+
+    def _push_open_section(self, section):
+        """Record a scheduled section's current enrollment in its block's heap"""
+        if section.block and len(section.students) < section.max_size:
+            heapq.heappush(
+                self.open_sections[section.course_code][section.block],
+                (len(section.students), section.section_num, section)
+            )
+
+    def _assign_block_to_section(self, section, student_mask=0):
+        """
+        Assign an appropriate block to a section
+
+        Blocks in student_mask (those of the student the section is opened
+        for) are avoided when possible.
+        """
+        course_code = section.course_code
         course = self.courses.get(course_code)
         
         if not course:
             return
-            
-        # Get available blocks for this course
-        available_blocks = course.get('available_blocks', self.blocks)
-        
-        # Check which blocks the lecturer is already assigned to
-        lecturer_id = section['lecturer_id']
-        lecturer_blocks = set()
         
-        if lecturer_id:
-            for assigned_section in self.lecturer_assignments.get(lecturer_id, []):
-                if assigned_section['block']:
-                    lecturer_blocks.add(assigned_section['block'])
+        # Find available blocks that don't conflict with lecturer's schedule
+        valid_mask = self._valid_block_mask(section)
         
-        # Find blocks that don't conflict with lecturer's schedule
-        valid_blocks = [block for block in available_blocks if block not in lecturer_blocks]
-        
-        if not valid_blocks:
-            print(f"Warning: No valid blocks for {course_code} section {section['section_num']}")
+        if not valid_mask:
+            print(f"Warning: No valid blocks for {course_code} section {section.section_num}")
             return
         
-        # Assign a random valid block
-        chosen_block = random.choice(valid_blocks)
-        section['block'] = chosen_block
-        
-        # Update lecturer assignments
+        # Pick the best scoring block, breaking exact ties at random
+        free_blocks = self.mask_blocks(valid_mask & ~student_mask) or self.mask_blocks(valid_mask)
+        scores = {block: self._block_score(course_code, block) for block in free_blocks}
+        best_score = max(scores.values())
+        chosen_block = self.rng.choice([block for block in free_blocks if scores[block] == best_score])
+        self._set_section_block(section, chosen_block)
+
+    def _valid_block_mask(self, section):
+        """Blocks a section's course may use, minus those its lecturer already teaches in"""
+        valid_mask = self.course_block_masks.get(section.course_code, 0)
+        if section.lecturer_id:
+            valid_mask &= ~self.lecturer_masks[section.lecturer_id]
+        return valid_mask
+
+    def _block_score(self, course_code, block):
+        """
+        Score a block for a new section of a course: pending requesters still
+        free in the block, then fewer co-requested courses already there
+        """
+        bit = self.block_bits[block]
+        free_requesters = 0
+        for student_id in self.course_requesters[course_code]:
+            if not self.student_masks[student_id] & bit and course_code not in self.student_assignments[student_id]:
+                free_requesters += 1
+        
+        co_requested = sum(self.co_requests[course_code][s.course_code] for s in self.schedule[block])
+        return (free_requesters, -co_requested)
+
+    def _enroll(self, student_id, section):
+        """Add a student to a section"""
+        section.students.append(student_id)
+        self.student_assignments[student_id][section.course_code] = section
+        if section.block:
+            self.student_masks[student_id] |= self.block_bits[section.block]
+        self._push_open_section(section)
+
+    def _unenroll(self, student_id, course_code):
+        """Remove a student from their section of a course"""
+        section = self.student_assignments[student_id].pop(course_code)
+        section.students.remove(student_id)
+        self._release_block(self.student_masks, student_id, self.student_assignments[student_id].values(),
+                            section.block)
+        self._push_open_section(section)
+        return section
+
+    def _set_section_block(self, section, block):
+        """
+        Move a section to a block, keeping the block schedule, lecturer
+        assignments and occupancy masks in step
+        """
+        old_block = section.block
+        if old_block:
+            self.schedule[old_block] = [s for s in self.schedule[old_block] if s is not section]
+        section.block = block
+        if block:
+            self.schedule[block].append(section)
+        self._push_open_section(section)
+        
+        # Keep the list of unscheduled sections in step
+        code = section.course_code
+        if old_block and not block:
+            self.unscheduled_sections[code].append(section)
+        elif block and not old_block:
+            self.unscheduled_sections[code] = [s for s in self.unscheduled_sections[code] if s is not section]
+        
+        bit = self.block_bits[block] if block else 0
+        for student_id in section.students:
+            self._release_block(self.student_masks, student_id, self.student_assignments[student_id].values(),
+                                old_block)
+            self.student_masks[student_id] |= bit
+        
+        lecturer_id = section.lecturer_id
         if lecturer_id:
-            self.lecturer_assignments[lecturer_id].append(section)
-        
-        # Add to schedule
-        self.schedule[chosen_block].append(section)
+            if not any(s is section for s in self.lecturer_assignments[lecturer_id]):
+                self.lecturer_assignments[lecturer_id].append(section)
+            self._release_block(self.lecturer_masks, lecturer_id, self.lecturer_assignments[lecturer_id], old_block)
+            self.lecturer_masks[lecturer_id] |= bit
+
+    def _rebuild_indexes(self):
+        """Recompute the occupancy masks and open-section heaps from the assignments"""
+        self.student_masks = [0] * len(self.students)
+        for student_id, courses in enumerate(self.student_assignments):
+            self.student_masks[student_id] = self.blocks_mask(s.block for s in courses.values() if s.block)
+        self.lecturer_masks = defaultdict(int)
+        for lecturer_id, sections in self.lecturer_assignments.items():
+            self.lecturer_masks[lecturer_id] = self.blocks_mask(s.block for s in sections if s.block)
+        
+        self.open_sections = defaultdict(lambda: defaultdict(list))
+        for code, sections in self.course_sections.items():
+            self.unscheduled_sections[code] = [s for s in sections if not s.block]
+            for section in sections:
+                self._push_open_section(section)
+
+    def _release_block(self, masks, owner, sections, block):
+        """Clear a block from an owner's mask unless another of their sections still uses it"""
+        if block and not any(s.block == block for s in sections):
+            masks[owner] &= ~self.block_bits[block]
 
-    def run_scheduling(self):
-        """Run the complete scheduling process"""
+    def run_scheduling(self, local_search_time=None, flow_assignment=False, repair_depth=None,
+                       ordering='input', block_plan='greedy', rebalance=False):
+        """
+        Run the complete scheduling process
+
+        block_plan='greedy' gives each section a block when its first student
+        is placed; block_plan='coloring' gives every section a block up front
+        with block_coloring.color_blocks.
+
+        ordering='input' schedules each priority in student order;
+        ordering='constrained' uses schedule_most_constrained_first.
+
+        flow_assignment reassigns all students by min-cost flow for the block
+        plan with min_cost_flow.assign_students_by_flow. local_search_time
+        (seconds) then improves the schedule with local_search.improve_schedule,
+        and repair_depth runs repair.repair_unresolved with chains of that
+        depth, before rooms are assigned. rebalance evens out the sizes of each
+        course's sections last, with rebalancer.rebalance_sections.
+        """
         print("Creating course sections...")
         self.create_course_sections()
         
         print("Assigning lecturers to sections...")
         self.assign_lecturers_to_sections()
         
-        print("Scheduling required courses...")
-        self.schedule_required_courses()
+        # The optional stages import their modules when used, so the plain greedy
+        # run works when this file is run as a script
+        if block_plan == 'coloring':
+            from src.scheduling.scheduling.block_coloring import color_blocks
+            print("Assigning blocks by graph coloring...")
+            color_blocks(self)
+        elif block_plan != 'greedy':
+            raise ValueError(f"Unknown block plan '{block_plan}', expected 'greedy' or 'coloring'")
+        
+        if ordering == 'constrained':
+            print("Scheduling courses, most constrained requests first...")
+            self.schedule_most_constrained_first()
+        elif ordering == 'input':
+            print("Scheduling required courses...")
+            self.schedule_required_courses()
+            
+            print("Scheduling requested courses...")
+            self.schedule_requested_courses()
+            
+            print("Scheduling recommended courses...")
+            self.schedule_recommended_courses()
+        else:
+            raise ValueError(f"Unknown ordering '{ordering}', expected 'input' or 'constrained'")
+        
+        if flow_assignment:
+            from src.scheduling.scheduling.min_cost_flow import assign_students_by_flow
+            print("Reassigning students with min-cost flow...")
+            assign_students_by_flow(self)
         
-        print("Scheduling requested courses...")
-        self.schedule_requested_courses()
+        if local_search_time:
+            from src.scheduling.scheduling.local_search import improve_schedule
+            print("Improving schedule with local search...")
+            improve_schedule(self, time_limit=local_search_time, seed=self.seed)
         
-        print("Scheduling recommended courses...")
-        self.schedule_recommended_courses()
+        if repair_depth is not None:
+            from src.scheduling.scheduling.repair import repair_unresolved
+            print("Repairing unresolved requests...")
+            repair_unresolved(self, max_depth=repair_depth)
+        
+        if rebalance:
+            from src.scheduling.scheduling.rebalancer import rebalance_sections
+            print("Rebalancing section sizes...")
+            rebalance_sections(self)
         
         print("Assigning rooms...")
         self.assign_rooms()
@@ -296,26 +599,26 @@ class CourseScheduler:
             block_data = []
             for section in sections:
                 block_data.append({
-                    "course": section['course_code'],
-                    "section": section['section_num'],
-                    "lecturer": section['lecturer_id'],
-                    "room": section['room'],
-                    "students": len(section['students'])
+                    "course": section.course_code,
+                    "section": section.section_num,
+                    "lecturer": section.lecturer_id,
+                    "room": section.room,
+                    "students": len(section.students)
                 })
             results["schedule"][block] = block_data
         
         # Format student schedules
-        for student_id, courses in self.student_assignments.items():
+        for student_id, courses in enumerate(self.student_assignments):
             student_schedule = {}
             for course_code, section in courses.items():
-                if section['block']:
-                    student_schedule[section['block']] = {
+                if section.block:
+                    student_schedule[section.block] = {
                         "course": course_code,
-                        "section": section['section_num'],
-                        "lecturer": section['lecturer_id'],
-                        "room": section['room']
+                        "section": section.section_num,
+                        "lecturer": section.lecturer_id,
+                        "room": section.room
                     }
-            results["student_schedules"][student_id] = student_schedule
+            results["student_schedules"][self.student_ids[student_id]] = student_schedule
         
         # Calculate statistics
         total_requests = 0
@@ -325,8 +628,7 @@ class CourseScheduler:
         request_counts = {"required": 0, "requested": 0, "recommended": 0}
         fulfilled_counts = {"required": 0, "requested": 0, "recommended": 0}
         
-        for student in self.students:
-            student_id = student['id']
+        for student_id, student in enumerate(self.students):
             assigned_courses = set(self.student_assignments[student_id].keys())
             
             for priority in ["required", "requested", "recommended"]:
@@ -0,0 +1,114 @@
+"""
+Aggregation of students with identical requests for the scheduling MIP.
+
+Students who request the same courses at the same priorities are
+interchangeable in the model, so one integer variable per (group, course,
+block) counting how many of the group take that course in that block replaces
+a binary per student. After solving, the counts of a group form a bipartite
+multigraph between courses and blocks in which no course or block has more
+edges than the group has students (each student takes a course at most once
+and sits in a block at most once). Such a multigraph can always be
+edge-colored with one color per student, and every color class is a valid
+schedule for that student, so the solution disaggregates exactly.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+
+def group_students(index):
+    """
+    Group the students of a request index by their {course_code: priority} requests.
+
+    Returns a list of {'students': [student_id], 'requests': {course_code: priority}}
+    dictionaries, in the order each group first appears.
+    """
+    groups = {}
+    for student_id, requests in index['student_courses'].items():
+        key = frozenset(requests.items())
+        if key not in groups:
+            groups[key] = {'students': [], 'requests': requests}
+        groups[key]['students'].append(student_id)
+
+    groups = list(groups.values())
+    print(f"Aggregated {len(index['student_courses'])} students into {len(groups)} request groups")
+    return groups
+
+
+def student_groups(groups):
+    """Map every student ID to the position of its group"""
+    return {student_id: g for g, group in enumerate(groups) for student_id in group['students']}
+
+
+def selected_counts(variables):
+    """Return {key: count} for the integer variables with a positive value in the solution"""
+    keys = list(variables)
+    values = np.fromiter(
+        (var.varValue or 0 for var in variables.values()), dtype=np.float64, count=len(keys)
+    )
+    counts = np.rint(values).astype(np.int64)
+    return {keys[i]: int(counts[i]) for i in np.flatnonzero(counts > 0)}
+
+
+def disaggregate(groups, counts):
+    """
+    Turn {(group, course_code, block): count} into (student_id, course_code, block) assignments.
+
+    Each group's counts are edge-colored with one color per student of the group.
+    """
+    group_edges = defaultdict(list)
+    for (g, course_code, block), count in counts.items():
+        group_edges[g].extend([(course_code, block)] * count)
+
+    assigned = []
+    for g, edges in group_edges.items():
+        students = groups[g]['students']
+        for course_code, block, color in _color_edges(edges, len(students)):
+            assigned.append((students[color], course_code, block))
+    return assigned
+
+
+def _color_edges(edges, num_colors):
+    """
+    Color the (course, block) edges of a bipartite multigraph so that no two
+    edges at a course or at a block share a color, using num_colors colors.
+    Returns (course_code, block, color) for every edge.
+
+    Each edge takes a color free at both ends; when the free colors differ, the
+    path alternating between them from the block end is flipped first (Konig's
+    method), which never reaches the course end because the graph is bipartite.
+    """
+    # at[vertex][color] = the vertex at the other end of the edge of that color
+    at = defaultdict(dict)
+    for course_code, block in edges:
+        course, block = ('course', course_code), ('block', block)
+        if len(at[course]) >= num_colors or len(at[block]) >= num_colors:
+            raise ValueError("A request group has more assignments at a course or block than students")
+        free_course = next(c for c in range(num_colors) if c not in at[course])
+        free_block = next(c for c in range(num_colors) if c not in at[block])
+
+        if free_course not in at[block]:
+            color = free_course
+        else:
+            # Swap free_course and free_block along the alternating path from the block
+            path = []
+            vertex, color = block, free_course
+            while color in at[vertex]:
+                path.append((vertex, at[vertex][color], color))
+                vertex = at[vertex][color]
+                color = free_block if color == free_course else free_course
+            for start, end, old in path:
+                del at[start][old]
+                del at[end][old]
+            for start, end, old in path:
+                new = free_block if old == free_course else free_course
+                at[start][new] = end
+                at[end][new] = start
+            color = free_course
+
+        at[course][color] = block
+        at[block][color] = course
+
+    # Flipping paths recolors earlier edges, so the colors are read back at the end
+    return [(vertex[1], other[1], color) for vertex, colored in at.items() if vertex[0] == 'course'
+            for color, other in colored.items()]
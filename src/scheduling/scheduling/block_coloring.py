@@ -0,0 +1,272 @@
+"""
+Block assignment for the greedy CourseScheduler as weighted graph coloring.
+
+Sections are the vertices and blocks the colors. Two sections in the same block
+cost the priority weight that students who request both courses would lose:
+a clash drops the lower-priority request, so a student requesting courses a
+and b adds min(weight_a, weight_b) to the pair. Courses with several sections
+spread that weight over their section pairs. Sections of one lecturer must not
+share a block, a course may only use its available blocks, and a block holds
+at most one section per room.
+
+Blocks are chosen by a weighted DSATUR pass (fewest feasible blocks first, then
+heaviest conflicts) and improved with Kempe-chain swaps: moving a section to
+another block carries its lecturer's section there over to the first block, and
+so on, so every hard constraint still holds after the swap.
+"""
+import itertools
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from src.scheduling.scheduling.local_search import request_weights
+
+
+def color_blocks(scheduler, max_passes=10, time_limit=None):
+    """
+    Give every section of a CourseScheduler a block by weighted graph coloring.
+
+    Sections and lecturers must already be created. Sections with no feasible
+    block are left unscheduled. Returns a summary with the conflict weight after
+    DSATUR and after the Kempe-chain passes.
+    """
+    sections = [section for code in scheduler.course_sections for section in scheduler.course_sections[code]]
+    if not sections:
+        return {'sections': 0, 'unscheduled': 0, 'initial_conflict': 0.0, 'final_conflict': 0.0, 'swaps': 0}
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    weights = SectionConflicts(sections, *build_conflict_matrix(scheduler))
+    allowed, colleagues = _hard_constraints(scheduler, sections)
+
+    colors = _dsatur(scheduler, weights, allowed, colleagues)
+    initial_conflict = weights.total(colors, len(scheduler.blocks))
+    swaps = _kempe_improve(weights, allowed, colleagues, colors, len(scheduler.rooms), max_passes, deadline)
+    final_conflict = weights.total(colors, len(scheduler.blocks))
+
+    for section, color in zip(sections, colors):
+        scheduler._set_section_block(section, scheduler.blocks[color] if color >= 0 else None)
+
+    unscheduled = int((colors < 0).sum())
+    if unscheduled:
+        print(f"Warning: No feasible block for {unscheduled} sections")
+    print(f"Block coloring: {len(sections)} sections, conflict weight {initial_conflict:.1f} -> "
+          f"{final_conflict:.1f} after {swaps} Kempe swaps")
+    return {'sections': len(sections), 'unscheduled': unscheduled, 'initial_conflict': initial_conflict,
+            'final_conflict': final_conflict, 'swaps': swaps}
+
+
+def build_conflict_matrix(scheduler):
+    """
+    Weighted course conflict matrix from the student requests.
+
+    Entry (a, b) is the sum over students requesting both courses of the lower
+    of their two priority weights; the diagonal holds each course's weighted
+    demand. Returns the matrix and a {course_code: row} index.
+    """
+    codes = list(scheduler.course_sections)
+    course_index = {code: i for i, code in enumerate(codes)}
+
+    weights = request_weights(scheduler.students)
+    count = sum(len(requests) for requests in weights)
+    rows = np.repeat(np.arange(len(weights)), [len(requests) for requests in weights])
+    cols = np.fromiter((course_index.get(code, -1) for requests in weights for code in requests),
+                       dtype=np.int64, count=count)
+    values = np.fromiter(itertools.chain.from_iterable(requests.values() for requests in weights),
+                         dtype=np.float64, count=count)
+    known = cols >= 0
+    rows, cols, values = rows[known], cols[known], values[known]
+
+    # Requests are grouped by student, so pairing each request with the one
+    # offset positions later, for every offset, covers all pairs of a student
+    num_courses = len(codes)
+    conflicts = np.bincount(cols * (num_courses + 1), weights=values, minlength=num_courses * num_courses)
+    longest = int(np.bincount(rows).max()) if len(rows) else 0
+    for offset in range(1, longest):
+        same_student = rows[:-offset] == rows[offset:]
+        first, second = cols[:-offset][same_student], cols[offset:][same_student]
+        pair_weights = np.minimum(values[:-offset], values[offset:])[same_student]
+        conflicts += np.bincount(first * num_courses + second, weights=pair_weights, minlength=num_courses ** 2)
+        conflicts += np.bincount(second * num_courses + first, weights=pair_weights, minlength=num_courses ** 2)
+    return conflicts.reshape(num_courses, num_courses), course_index
+
+
+class SectionConflicts:
+    """
+    Conflict weights between sections, assuming a course's students split
+    evenly between its sections. The weights are derived from the course
+    matrix on demand, so memory grows with courses squared, not sections.
+    """
+
+    def __init__(self, sections, course_conflicts, course_index):
+        self.course_conflicts = course_conflicts
+        self.course = np.array([course_index[section.course_code] for section in sections])
+        counts = np.bincount(self.course, minlength=len(course_index)).astype(np.float64)
+        self.share = 1.0 / counts[self.course]
+        # Weight a section would have with itself, excluded everywhere
+        self.self_weight = course_conflicts[self.course, self.course] * self.share ** 2
+
+    def column(self, section):
+        """Weights between one section and every section"""
+        weights = self.course_conflicts[self.course, self.course[section]] * self.share * self.share[section]
+        weights[section] = 0.0
+        return weights
+
+    def submatrix(self, members):
+        """Weights between the given sections"""
+        courses = self.course[members]
+        weights = self.course_conflicts[np.ix_(courses, courses)] * np.outer(self.share[members], self.share[members])
+        np.fill_diagonal(weights, 0.0)
+        return weights
+
+    def degrees(self):
+        """Total weight of each section with all others (a course's shares sum to one)"""
+        return self.share * self.course_conflicts[self.course].sum(axis=1) - self.self_weight
+
+    def block_costs(self, colors, num_blocks):
+        """Weight of each section with the sections of every block"""
+        scheduled = np.flatnonzero(colors >= 0)
+        course_shares = np.zeros((len(self.course_conflicts), num_blocks))
+        np.add.at(course_shares, (self.course[scheduled], colors[scheduled]), self.share[scheduled])
+        cost = self.share[:, None] * (self.course_conflicts @ course_shares)[self.course]
+        cost[scheduled, colors[scheduled]] -= self.self_weight[scheduled]
+        return cost
+
+    def total(self, colors, num_blocks):
+        """Total weight of section pairs that share a block"""
+        scheduled = np.flatnonzero(colors >= 0)
+        return float(self.block_costs(colors, num_blocks)[scheduled, colors[scheduled]].sum() / 2)
+
+
+def _hard_constraints(scheduler, sections):
+    """Allowed blocks per section, and the other sections each section's lecturer teaches"""
+    allowed = np.zeros((len(sections), len(scheduler.blocks)), dtype=bool)
+    by_lecturer = defaultdict(list)
+    for i, section in enumerate(sections):
+        mask = scheduler.course_block_masks.get(section.course_code, 0)
+        allowed[i] = [bool(mask & scheduler.block_bits[block]) for block in scheduler.blocks]
+        if section.lecturer_id:
+            by_lecturer[section.lecturer_id].append(i)
+
+    colleagues = [[] for _ in sections]
+    for members in by_lecturer.values():
+        for i in members:
+            colleagues[i] = [j for j in members if j != i]
+    return allowed, colleagues
+
+
+def _dsatur(scheduler, weights, allowed, colleagues):
+    """
+    Color sections one at a time, always taking the uncolored section with the
+    fewest feasible blocks left (then the largest conflict weight) and giving
+    it the feasible block with the least conflict. Returns a block index per
+    section, -1 where no block was feasible.
+    """
+    num_sections, num_blocks = allowed.shape
+    num_rooms = len(scheduler.rooms)
+    colors = np.full(num_sections, -1)
+    cost = np.zeros((num_sections, num_blocks))  # conflict weight with each block's sections
+    feasible = allowed.copy()
+    options = feasible.sum(axis=1)
+    block_sizes = np.zeros(num_blocks, dtype=int)
+    degree = weights.degrees()
+    done = num_blocks + 1  # options value that takes a colored section out of the running
+
+    for _ in range(num_sections):
+        fewest = options.min()
+        candidates = np.flatnonzero(options == fewest)
+        section = candidates[np.argmax(degree[candidates])]
+        options[section] = done
+        if fewest == 0:
+            continue
+
+        blocks = np.flatnonzero(feasible[section])
+        block_costs = cost[section, blocks]
+        best = blocks[block_costs <= block_costs.min() + 1e-9]
+        # Break ties by the emptiest block, then at random
+        best = best[block_sizes[best] == block_sizes[best].min()]
+        color = int(best[0]) if len(best) == 1 else int(scheduler.rng.choice(list(best)))
+
+        colors[section] = color
+        block_sizes[color] += 1
+        cost[:, color] += weights.column(section)
+        if block_sizes[color] == num_rooms:
+            lost = np.flatnonzero(feasible[:, color] & (options != done))
+            options[lost] -= 1
+            feasible[:, color] = False
+        for other in colleagues[section]:
+            if feasible[other, color]:
+                feasible[other, color] = False
+                if options[other] != done:
+                    options[other] -= 1
+    return colors
+
+
+def _kempe_chain(colleagues, colors, section, first, second):
+    """Sections linked to a section through shared lecturers, within two blocks"""
+    chain = {section}
+    stack = [section]
+    while stack:
+        for other in colleagues[stack.pop()]:
+            if other not in chain and (colors[other] == first or colors[other] == second):
+                chain.add(other)
+                stack.append(other)
+    return np.fromiter(chain, dtype=int, count=len(chain))
+
+
+def _kempe_improve(weights, allowed, colleagues, colors, num_rooms, max_passes, deadline):
+    """
+    Apply improving Kempe-chain swaps until a pass finds none. A section leads
+    a swap into a block only if its own move there lowers the conflict weight;
+    with no colleague in either block the chain is just that section.
+    Returns the number of swaps.
+    """
+    num_blocks = allowed.shape[1]
+    scheduled = np.flatnonzero(colors >= 0)
+    cost = weights.block_costs(colors, num_blocks)
+    block_sizes = np.bincount(colors[scheduled], minlength=num_blocks)
+    swaps = 0
+
+    for _ in range(max_passes):
+        improved = False
+        for section in scheduled[np.argsort(-cost[scheduled, colors[scheduled]])]:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return swaps
+            first = colors[section]
+            gains = cost[section] - cost[section, first]
+            best = None
+            for second in np.flatnonzero((gains < -1e-9) & allowed[section]):
+                chain = _kempe_chain(colleagues, colors, section, first, second)
+                old = colors[chain]
+                new = np.where(old == first, second, first)
+                if len(chain) > 1:
+                    if not allowed[chain, new].all():
+                        continue
+                    # Pairs inside the chain keep whether they share a block, so only outside pairs change
+                    inside = weights.submatrix(chain)
+                    delta = (cost[chain, new].sum() - cost[chain, old].sum()
+                             - (inside * (old[None, :] == new[:, None])).sum()
+                             + (inside * (old[None, :] == old[:, None])).sum())
+                else:
+                    delta = gains[second]
+                moved_in = int((new == second).sum()) - int((new == first).sum())
+                if block_sizes[second] + moved_in > num_rooms or block_sizes[first] - moved_in > num_rooms:
+                    continue
+                if delta < -1e-9 and (best is None or delta < best[0]):
+                    best = (delta, chain, old, new)
+            if best is None:
+                continue
+
+            _, chain, old, new = best
+            colors[chain] = new
+            for member, old_color, new_color in zip(chain, old, new):
+                column = weights.column(member)
+                cost[:, old_color] -= column
+                cost[:, new_color] += column
+                block_sizes[old_color] -= 1
+                block_sizes[new_color] += 1
+            swaps += 1
+            improved = True
+        if not improved:
+            break
+    return swaps
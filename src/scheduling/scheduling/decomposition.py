@@ -0,0 +1,184 @@
+"""
+Connected-component decomposition of the scheduling MIP.
+
+Students and courses form a bipartite request graph. Rooms are the only
+resource shared between its connected components, so once every component is
+given its own room budget the components can be solved as independent MIPs
+in parallel and their schedules merged.
+"""
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from src.scheduling.scheduling.model_builder import build_request_index
+from src.scheduling.scheduling.optimizer import (
+    assign_lecturer_schedules,
+    create_course_schedule,
+    default_empty_schedule,
+)
+
+
+def find_request_components(index):
+    """
+    Find the connected components of the student-course request graph.
+
+    Returns a list of {'courses': [...], 'students': [...]} dictionaries,
+    largest component first.
+    """
+    # Union-find over course positions (course codes aren't guaranteed to compare equal to themselves)
+    course_codes = list(index['course_students'])
+    position = {course_code: i for i, course_code in enumerate(course_codes)}
+    parent = list(range(len(course_codes)))
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for requests in index['student_courses'].values():
+        positions = [position[course_code] for course_code in requests]
+        first_root = find(positions[0])
+        for i in positions[1:]:
+            root = find(i)
+            if root != first_root:
+                parent[root] = first_root
+
+    components = defaultdict(lambda: {'courses': [], 'students': []})
+    for i, course_code in enumerate(course_codes):
+        components[find(i)]['courses'].append(course_code)
+    for student_id, requests in index['student_courses'].items():
+        components[find(position[next(iter(requests))])]['students'].append(student_id)
+
+    return sorted(components.values(), key=lambda component: len(component['students']), reverse=True)
+
+
+def group_components(components, max_groups):
+    """
+    Merge the smallest components until at most max_groups remain.
+
+    Every group needs at least one room of its own, so there can't be more
+    groups than rooms.
+    """
+    groups = [{'courses': list(c['courses']), 'students': list(c['students'])} for c in components]
+    while len(groups) > max(max_groups, 1):
+        groups.sort(key=lambda group: len(group['students']), reverse=True)
+        smallest = groups.pop()
+        groups[-1]['courses'].extend(smallest['courses'])
+        groups[-1]['students'].extend(smallest['students'])
+    return groups
+
+
+def allocate_room_budget(groups, index, rooms):
+    """
+    Split the rooms between groups in proportion to their request volume.
+
+    Each group owns its rooms in every block, which is its per-block room
+    budget. Every group gets at least one room. Rooms are dealt largest first,
+    in turn, so each group gets a spread of capacities. Returns one list of
+    rooms per group.
+    """
+    demand = [
+        sum(len(index['course_students'][course_code]) for course_code in group['courses'])
+        for group in groups
+    ]
+    total_demand = sum(demand) or 1
+    spare = len(rooms) - len(groups)
+
+    # Largest-remainder split of the rooms left after the one-room minimum
+    shares = [spare * d / total_demand for d in demand]
+    budget = [1 + int(share) for share in shares]
+    leftover = len(rooms) - sum(budget)
+    by_remainder = sorted(range(len(groups)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:leftover]:
+        budget[i] += 1
+
+    allocation = [[] for _ in groups]
+    remaining = list(budget)
+    turn = 0
+    for room in sorted(rooms, key=lambda r: r['capacity'], reverse=True):
+        while remaining[turn % len(groups)] == 0:
+            turn += 1
+        allocation[turn % len(groups)].append(room)
+        remaining[turn % len(groups)] -= 1
+        turn += 1
+
+    return allocation
+
+
+def create_decomposed_schedule(structured_data, max_workers=None, **schedule_options):
+    """
+    Create a course schedule by solving each request-graph component separately.
+
+    Components are grouped so that no group is left without a room, each group
+    is solved with create_course_schedule in a process pool, and the partial
+    schedules are merged into one schedule dictionary. Extra keyword arguments
+    are passed on to create_course_schedule.
+    """
+    print("Decomposing the request graph...")
+    index = build_request_index(structured_data)
+    if not index['relevant_courses']:
+        print("ERROR: No relevant courses found. Check that course codes match between requests and course data.")
+        return default_empty_schedule()
+
+    components = find_request_components(index)
+    groups = group_components(components, len(structured_data['rooms']))
+    room_budget = allocate_room_budget(groups, index, structured_data['rooms'])
+    print(f"Found {len(components)} components, solving {len(groups)} groups")
+
+    course_lookup = {course['code']: course for course in index['relevant_courses']}
+    students_by_id = {student['id']: student for student in structured_data['students']}
+
+    sub_problems = []
+    for group, group_rooms in zip(groups, room_budget):
+        print(f"- Group with {len(group['courses'])} courses, {len(group['students'])} students "
+              f"and {len(group_rooms)} rooms")
+        sub_problems.append({
+            'courses': [course_lookup[course_code] for course_code in group['courses']],
+            'students': [students_by_id[student_id] for student_id in group['students']],
+            'lecturers': structured_data['lecturers'],
+            'rooms': group_rooms,
+            'blocks': structured_data['blocks']
+        })
+
+    if len(sub_problems) == 1:
+        partial_schedules = [create_course_schedule(sub_problems[0], **schedule_options)]
+    else:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(sub_problems))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(create_course_schedule, sub_problem, **schedule_options)
+                for sub_problem in sub_problems
+            ]
+            partial_schedules = [future.result() for future in futures]
+
+    schedule = merge_schedules(partial_schedules, structured_data['lecturers'])
+
+    print(f"Decomposed schedule created with {len(schedule['course_blocks'])} courses scheduled")
+    print(f"Student schedules created for {len(schedule['student_schedules'])} students")
+
+    return schedule
+
+
+def merge_schedules(partial_schedules, lecturers):
+    """
+    Merge schedules of disjoint course/room groups into one schedule.
+
+    Lecturer schedules are rebuilt from the merged course blocks because a
+    lecturer can teach courses in several groups.
+    """
+    schedule = default_empty_schedule()
+
+    for partial in partial_schedules:
+        for course_code, blocks in partial['course_blocks'].items():
+            schedule['course_blocks'][course_code].extend(blocks)
+        for key in ['course_rooms', 'student_schedules', 'room_schedules']:
+            for owner, entries in partial[key].items():
+                schedule[key][owner].update(entries)
+
+    assign_lecturer_schedules(schedule, lecturers)
+
+    return schedule
@@ -0,0 +1,138 @@
+"""
+Incremental re-optimization after a small set of request edits.
+
+A request delta lists added and dropped requests:
+
+    {'add': [{'student_id': ..., 'code': ..., 'priority': 'requested'}],
+     'drop': [{'student_id': ..., 'code': ...}]}
+
+Students named in the delta and the courses they touch form the neighborhood.
+Every other student keeps their previous assignments and every other course
+keeps its previous openings, so only the freed part of the model is re-solved.
+"""
+import copy
+from collections import defaultdict
+
+from src.scheduling.scheduling.model_builder import PRIORITIES
+from src.scheduling.scheduling.warm_start import repair_start, room_keys
+
+
+def apply_request_delta(structured_data, request_delta):
+    """
+    Apply a request delta to a copy of the structured data.
+
+    Adding a request the student already has, or dropping one they don't,
+    does nothing, so applying the same delta twice is harmless. Returns the
+    updated data and the set of student IDs named in the delta.
+    """
+    structured_data = copy.deepcopy(structured_data)
+    students = {student['id']: student for student in structured_data['students']}
+    courses = {course['code']: course for course in structured_data['courses']}
+    changed_students = set()
+
+    for drop in request_delta.get('drop', []):
+        student = students.get(drop['student_id'])
+        if student is None:
+            print(f"Warning: Unknown student {drop['student_id']} in request delta")
+            continue
+        changed_students.add(student['id'])
+        for priority in PRIORITIES:
+            student['requests'][priority] = [
+                req for req in student['requests'][priority] if req['code'] != drop['code']
+            ]
+
+    for add in request_delta.get('add', []):
+        student = students.get(add['student_id'])
+        if student is None:
+            print(f"Warning: Unknown student {add['student_id']} in request delta")
+            continue
+        if add['code'] not in courses:
+            print(f"Warning: Unknown course {add['code']} in request delta")
+            continue
+        changed_students.add(student['id'])
+        priority = add.get('priority', 'requested')
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+        if any(req['code'] == add['code'] for p in PRIORITIES for req in student['requests'][p]):
+            continue
+        course = courses[add['code']]
+        student['requests'][priority].append({
+            'code': course['code'],
+            'title': course.get('title'),
+            'length': course.get('length')
+        })
+
+    return structured_data, changed_students
+
+
+def find_neighborhood(index, previous_schedule, changed_students):
+    """
+    Return the set of courses whose openings are freed for a delta: every
+    course a changed student requests now or was enrolled in before.
+    """
+    affected_courses = set()
+    for student_id in changed_students:
+        affected_courses.update(index['student_courses'].get(student_id, {}))
+        affected_courses.update(previous_schedule['student_schedules'].get(student_id, {}).values())
+    return affected_courses
+
+
+def repair_changes(index, previous_schedule, assigned):
+    """
+    Return the students in the model whose repaired assignments differ from
+    their schedule in the previous schedule.
+    """
+    kept = defaultdict(set)
+    for student_id, course_code, block in assigned:
+        kept[student_id].add((block, course_code))
+    return {
+        student_id for student_id in index['student_courses']
+        if set(previous_schedule['student_schedules'].get(student_id, {}).items()) != kept[student_id]
+    }
+
+
+def fix_outside_neighborhood(model, structured_data, index, previous_schedule, changed_students):
+    """
+    Fix the variables of a PuLP model outside the delta's neighborhood to their
+    values in the previous schedule.
+
+    The previous schedule is repaired with repair_start first so the fixed part
+    is consistent with the model. Students whose assignments the repair changes
+    (e.g. in an opening below the section minimum) can't keep their previous
+    schedule, so they are freed along with the delta's students. The x
+    variables of the other students and the y and opening variables of
+    unaffected courses are fixed. Returns the number of fixed variables.
+    """
+    assigned, opening_rooms = repair_start(structured_data, index, previous_schedule)
+    repaired_students = repair_changes(index, previous_schedule, assigned) - set(changed_students)
+    if repaired_students:
+        print(f"Repairing the previous schedule changed {len(repaired_students)} students outside the delta; "
+              f"they are re-optimized with it")
+    changed_students = set(changed_students) | repaired_students
+    affected_courses = find_neighborhood(index, previous_schedule, changed_students)
+    room_key = room_keys(model, structured_data['rooms'])
+    fixed = 0
+
+    for (student_id, course_code, block), var in model['x'].items():
+        if student_id not in changed_students:
+            var.setInitialValue(1 if (student_id, course_code, block) in assigned else 0)
+            var.fixValue()
+            fixed += 1
+
+    for (course_code, block), var in model['is_open'].items():
+        if course_code not in affected_courses:
+            var.setInitialValue(1 if (course_code, block) in opening_rooms else 0)
+            var.fixValue()
+            fixed += 1
+
+    for (course_code, block, key), var in model['y'].items():
+        if course_code not in affected_courses:
+            room_id = opening_rooms.get((course_code, block))
+            var.setInitialValue(1 if room_id is not None and room_key[room_id] == key else 0)
+            var.fixValue()
+            fixed += 1
+
+    print(f"Incremental solve: {len(changed_students)} freed students, {len(affected_courses)} freed courses, "
+          f"{fixed} of {len(model['x']) + len(model['y']) + len(model['is_open'])} variables fixed")
+
+    return fixed
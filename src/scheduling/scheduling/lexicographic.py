@@ -0,0 +1,191 @@
+"""
+Lexicographic priority solve for the scheduling MIP (rule 8).
+
+The weighted objective (10/5/1) lets enough recommended or requested requests
+outweigh a required one. The staged solve instead maximizes the number of
+fulfilled required requests, fixes that level as a constraint, then maximizes
+requested requests and finally recommended ones. Each stage starts from the
+previous stage's solution, which stays feasible under the new level
+constraint, or from the heuristic MIP start when that meets every fixed level
+and fulfills more requests of the stage's priority. A stage without a
+solution keeps its start and fixes its level at that start's count, so the
+later stages still run. The stages share the solver profile's time limit by
+STAGE_TIME_SHARES.
+"""
+import time
+from collections import defaultdict
+
+import numpy as np
+import pulp
+
+from src.scheduling.config import DEFAULT_SOLVER_PROFILE, get_solver_profile
+from src.scheduling.scheduling.matrix_model import append_rows, solve_matrix_model
+from src.scheduling.scheduling.model_builder import PRIORITIES
+
+# Relative share of the time left for each stage. The requested stage gets
+# the most: it usually holds the most requests, and the required stage often
+# proves optimality early, leaving its time to the later stages.
+STAGE_TIME_SHARES = {'required': 1, 'requested': 2, 'recommended': 1}
+
+
+def solve_pulp_lexicographic(model, index, solver_profile=None, warm_start=False):
+    """
+    Solve a PuLP model one priority level at a time.
+
+    The model's variables hold the last stage's solution (or the start it kept)
+    afterwards, and its weighted objective is restored. Returns a dictionary
+    with the overall 'status', whether any stage found a solution
+    ('has_solution') and the 'stages' reports.
+    """
+    prob, x = model['prob'], model['x']
+    level_vars = defaultdict(list)
+    for (owner, course_code, block), var in x.items():
+        requests = index['student_courses'][owner] if model['groups'] is None else model['groups'][owner]['requests']
+        level_vars[requests[course_code]].append(var)
+
+    solver_profile = solver_profile or DEFAULT_SOLVER_PROFILE
+    options = get_solver_profile(solver_profile)
+    print(f"Using solver profile '{solver_profile}' for a lexicographic solve: {options}")
+    deadline = _deadline(options)
+    weighted = prob.objective
+    variables = prob.variables()
+    heuristic = [var.varValue for var in variables] if warm_start else None
+    fixed_levels = []
+    stages = []
+    has_solution = False
+    complete = True
+
+    for i, priority in enumerate(PRIORITIES):
+        if not level_vars[priority]:
+            stages.append(_stage_report(priority, 0, True, 0.0))
+            continue
+        level = pulp.lpSum(level_vars[priority])
+        prob.setObjective(level)
+        start = [var.varValue for var in variables]
+        if heuristic is not None and fixed_levels:
+            previous_level = pulp.value(level)
+            _set_values(variables, heuristic)
+            if (all(pulp.value(fixed) >= value for fixed, value in fixed_levels)
+                    and pulp.value(level) > previous_level):
+                print(f"Starting the {priority} stage from the heuristic schedule")
+                start = heuristic
+            else:
+                _set_values(variables, start)
+
+        started = time.perf_counter()
+        solver_options = dict(options, timeLimit=_stage_time_limit(deadline, PRIORITIES[i:]))
+        prob.solve(pulp.PULP_CBC_CMD(msg=True, warmStart=warm_start or bool(stages), **solver_options))
+        elapsed = time.perf_counter() - started
+
+        optimal = prob.sol_status == pulp.LpSolutionOptimal
+        if not optimal and prob.sol_status != pulp.LpSolutionIntegerFeasible:
+            complete = False
+            _set_values(variables, start)
+            if not prob.valid(1e-6):
+                print(f"Warning: No solution in the {priority} stage and no start to keep")
+                stages.append(_stage_report(priority, 0, False, elapsed))
+                continue
+            print(f"Warning: No solution in the {priority} stage, keeping its start")
+        has_solution = True
+        fulfilled = int(round(pulp.value(level)))
+        stages.append(_stage_report(priority, fulfilled, optimal, elapsed))
+        prob += level >= fulfilled, f"level_{priority}"
+        fixed_levels.append((level, fulfilled))
+
+    prob.setObjective(weighted)
+    print_stages(stages)
+    return {'status': _status(stages, complete), 'has_solution': has_solution, 'stages': stages}
+
+
+def solve_matrix_lexicographic(model, solver_profile=None, start=None):
+    """
+    Solve a matrix model one priority level at a time.
+
+    Returns the result of the last stage with a solution, with the weighted
+    'objective' of that solution and the 'stages' reports added.
+    """
+    options = get_solver_profile(solver_profile)
+    deadline = _deadline(options)
+    weighted = model['objective']
+    x_priority = model['request_priority'][model['x_request']]
+    result = {'status': 'Not Solved', 'has_solution': False, 'objective': None, 'values': None}
+    heuristic = start
+    fixed_levels = []
+    stages = []
+    complete = True
+
+    for i, priority in enumerate(PRIORITIES):
+        level_cols = np.flatnonzero(x_priority == i)
+        if not len(level_cols):
+            stages.append(_stage_report(priority, 0, True, 0.0))
+            continue
+        model['objective'] = np.zeros(model['num_columns'])
+        model['objective'][level_cols] = 1
+        if heuristic is not None and fixed_levels:
+            if (all(heuristic[cols].sum() >= value for cols, value in fixed_levels)
+                    and heuristic[level_cols].sum() > start[level_cols].sum()):
+                print(f"Starting the {priority} stage from the heuristic schedule")
+                start = heuristic
+
+        started = time.perf_counter()
+        stage = solve_matrix_model(model, solver_profile, start=start,
+                                   time_limit=_stage_time_limit(deadline, PRIORITIES[i:]))
+        elapsed = time.perf_counter() - started
+        # solve_matrix_model already falls back to a feasible start
+        if not stage['has_solution']:
+            print(f"Warning: No solution in the {priority} stage and no start to keep")
+            stages.append(_stage_report(priority, 0, False, elapsed))
+            complete = False
+            continue
+
+        result = stage
+        fulfilled = int(round(stage['values'][level_cols].sum()))
+        stages.append(_stage_report(priority, fulfilled, stage['status'] == 'Optimal', elapsed))
+        append_rows(model, np.zeros(len(level_cols)), level_cols, np.ones(len(level_cols)), 'G', [fulfilled])
+        fixed_levels.append((level_cols, fulfilled))
+        # CBC writes integer columns with rounding noise, which it can reject in a start
+        start = stage['values'].copy()
+        start[:model['num_x'] + model['num_y']] = np.rint(start[:model['num_x'] + model['num_y']])
+
+    model['objective'] = weighted
+    if result['has_solution']:
+        result = dict(result, objective=float(weighted @ result['values']), status=_status(stages, complete))
+    print_stages(stages)
+    result['stages'] = stages
+    return result
+
+
+def _set_values(variables, values):
+    for var, value in zip(variables, values):
+        var.varValue = value
+
+
+def _deadline(options):
+    """Wall-clock deadline of a solver profile's time limit, or None"""
+    return time.perf_counter() + options['timeLimit'] if options.get('timeLimit') is not None else None
+
+
+def _stage_time_limit(deadline, priorities_left):
+    """Give a stage its STAGE_TIME_SHARES share of the time left, so later stages keep a budget"""
+    if deadline is None:
+        return None
+    share = STAGE_TIME_SHARES[priorities_left[0]] / sum(STAGE_TIME_SHARES[p] for p in priorities_left)
+    return max((deadline - time.perf_counter()) * share, 1)
+
+
+def _status(stages, complete):
+    """Optimal only if every stage ran and was solved to optimality"""
+    return 'Optimal' if complete and all(stage['optimal'] for stage in stages) else 'Stopped'
+
+
+def _stage_report(priority, fulfilled, optimal, seconds):
+    return {'priority': priority, 'fulfilled': fulfilled, 'optimal': optimal, 'time': seconds}
+
+
+def print_stages(stages):
+    """Print the fulfilled requests, optimality and time of every stage"""
+    print("Lexicographic solve:")
+    for stage in stages:
+        proof = "optimal" if stage['optimal'] else "not proven optimal"
+        print(f"- {stage['priority']}: {stage['fulfilled']} requests fulfilled, {proof}, {stage['time']:.1f}s")
+    print(f"Total solve time: {sum(stage['time'] for stage in stages):.1f}s")
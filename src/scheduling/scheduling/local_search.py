@@ -0,0 +1,266 @@
+"""
+Local search improvement for the greedy CourseScheduler.
+
+After the greedy passes, simulated annealing with a short tabu list on section
+moves revisits the block choices. Every move is evaluated by its change to the
+weighted number of fulfilled requests, touching only the students of the moved
+section and the requesters of its course, so the full results are never rebuilt
+inside the loop.
+"""
+import math
+import random
+import time
+from collections import defaultdict
+
+from src.scheduling.scheduling.model_builder import PRIORITIES, PRIORITY_WEIGHTS
+
+
+def request_weights(students):
+    """
+    Return a {course_code: weight} dictionary per student, in student order,
+    keeping the highest priority per course
+    """
+    weights = []
+    for student in students:
+        requests = {}
+        for priority in PRIORITIES:
+            for request in student['requests'].get(priority, []):
+                requests.setdefault(request['code'], PRIORITY_WEIGHTS[priority])
+        weights.append(requests)
+    return weights
+
+
+def schedule_score(scheduler, weights):
+    """Weighted number of requests fulfilled by a scheduled section"""
+    return sum(
+        weights[student_id].get(course_code, 0)
+        for student_id, courses in enumerate(scheduler.student_assignments)
+        for course_code, section in courses.items()
+        if section.block
+    )
+
+
+def improve_schedule(scheduler, time_limit=5.0, seed=None, temperature=2.0, cooling=0.9995, tabu_tenure=25):
+    """
+    Improve a greedy schedule in place until the time budget runs out.
+
+    Each iteration either moves a section to another block (accepted by the
+    annealing rule, with the reverse move tabu for tabu_tenure iterations) or
+    places a student with an unfulfilled request, swapping out a lower-priority
+    course or relocating a conflicting course to another of its sections. The
+    best schedule seen is kept. Returns a summary dictionary.
+    """
+    rng = random.Random(seed)
+    weights = request_weights(scheduler.students)
+    requesters = defaultdict(list)
+    request_pairs = []
+    for student_id, requests in enumerate(weights):
+        for course_code in requests:
+            if course_code in scheduler.course_sections:
+                requesters[course_code].append(student_id)
+                request_pairs.append((student_id, course_code))
+    sections = [section for sections in scheduler.course_sections.values() for section in sections]
+    if not sections or not request_pairs:
+        return {'initial_score': 0, 'final_score': 0, 'iterations': 0}
+
+    _drop_clashes(scheduler, weights)
+    score = schedule_score(scheduler, weights)
+    initial_score = best_score = score
+    best_state = None
+    tabu = {}  # (section position, block) -> iteration the move is tabu until
+    deadline = time.perf_counter() + time_limit
+    iteration = 0
+
+    while True:
+        if iteration % 100 == 0 and time.perf_counter() >= deadline:
+            break
+        iteration += 1
+
+        if rng.random() < 0.5:
+            position = rng.randrange(len(sections))
+            move = _section_move(scheduler, sections[position], weights, requesters, rng)
+            if move is None or tabu.get((position, move['block']), 0) > iteration:
+                continue
+            delta = move['delta']
+            if delta < 0 and rng.random() >= math.exp(delta / max(temperature, 1e-9)):
+                continue
+            tabu[(position, sections[position].block)] = iteration + tabu_tenure
+            _apply_section_move(scheduler, sections[position], move)
+        else:
+            delta = _student_move(scheduler, *rng.choice(request_pairs), weights)
+
+        score += delta
+        temperature *= cooling
+        if score > best_score:
+            best_score = score
+            best_state = _snapshot(scheduler, sections)
+
+    if best_state is not None and score < best_score:
+        _restore(scheduler, best_state)
+
+    print(f"Local search: score {initial_score} -> {best_score} in {iteration} iterations")
+    return {'initial_score': initial_score, 'final_score': max(best_score, score), 'iterations': iteration}
+
+
+def _drop_clashes(scheduler, weights):
+    """Unenroll students from the lower-priority course wherever two of their courses share a block"""
+    for student_id in range(len(scheduler.student_assignments)):
+        by_block = defaultdict(list)
+        for course_code, section in scheduler.student_assignments[student_id].items():
+            if section.block:
+                by_block[section.block].append(course_code)
+        for course_codes in by_block.values():
+            course_codes.sort(key=lambda course_code: weights[student_id].get(course_code, 0), reverse=True)
+            for course_code in course_codes[1:]:
+                scheduler._unenroll(student_id, course_code)
+
+
+def _course_in_block(scheduler, student_id, block):
+    """Course the student attends in a block, or None"""
+    if not scheduler.student_masks[student_id] & scheduler.block_bits[block]:
+        return None
+    for course_code, section in scheduler.student_assignments[student_id].items():
+        if section.block == block:
+            return course_code
+    return None
+
+
+def movable_blocks(scheduler, section):
+    """Blocks a section could move to: available to the course, free for its lecturer and with a room left"""
+    mask = scheduler.course_block_masks.get(section.course_code, 0)
+    if section.lecturer_id:
+        mask &= ~scheduler.lecturer_masks[section.lecturer_id]
+    return [
+        block for block in scheduler.mask_blocks(mask)
+        if block != section.block and len(scheduler.schedule[block]) < len(scheduler.rooms)
+    ]
+
+
+def _section_move(scheduler, section, weights, requesters, rng):
+    """
+    Evaluate moving a section to a random valid block.
+
+    Students with a clash in the new block keep the higher-priority course.
+    Free requesters of the course fill the seats left, highest priority first.
+    """
+    blocks = movable_blocks(scheduler, section)
+    if not blocks:
+        return None
+    block = rng.choice(blocks)
+    course_code = section.course_code
+
+    # Students of an unscheduled section only start counting once it has a block
+    counted = section.block is not None
+    delta = 0
+    dropped = []  # (student_id, course_code) to unenroll
+    kept = 0
+    for student_id in section.students:
+        other = _course_in_block(scheduler, student_id, block)
+        weight = weights[student_id].get(course_code, 0)
+        if other is None or weight >= weights[student_id].get(other, 0):
+            if other is not None:
+                delta -= weights[student_id].get(other, 0)
+                dropped.append((student_id, other))
+            if not counted:
+                delta += weight
+            kept += 1
+        else:
+            if counted:
+                delta -= weight
+            dropped.append((student_id, course_code))
+
+    seats = section.max_size - kept
+    bit = scheduler.block_bits[block]
+    candidates = [
+        student_id for student_id in requesters[course_code]
+        if not scheduler.student_masks[student_id] & bit
+        and course_code not in scheduler.student_assignments[student_id]
+    ]
+    candidates.sort(key=lambda student_id: weights[student_id][course_code], reverse=True)
+    joiners = candidates[:max(seats, 0)]
+    delta += sum(weights[student_id][course_code] for student_id in joiners)
+
+    return {'block': block, 'delta': delta, 'dropped': dropped, 'joiners': joiners}
+
+
+def _apply_section_move(scheduler, section, move):
+    """Commit a move evaluated by _section_move"""
+    # Drop clashing courses first so no student is ever in two sections of a block
+    for student_id, course_code in move['dropped']:
+        scheduler._unenroll(student_id, course_code)
+    scheduler._set_section_block(section, move['block'])
+    for student_id in move['joiners']:
+        scheduler._enroll(student_id, section)
+
+
+def _student_move(scheduler, student_id, course_code, weights):
+    """
+    Try to fulfil one request and return the score change (never negative).
+
+    The student goes into a scheduled section with a seat left. A clashing
+    course is relocated to another of its sections if one fits, otherwise it
+    is dropped when it has a lower priority.
+    """
+    assignments = scheduler.student_assignments[student_id]
+    if course_code in assignments and assignments[course_code].block:
+        return 0
+    weight = weights[student_id][course_code]
+
+    best = None
+    for section in scheduler.course_sections[course_code]:
+        if not section.block or len(section.students) >= section.max_size:
+            continue
+        other = _course_in_block(scheduler, student_id, section.block)
+        if other is None:
+            best = (weight, section, None, None)
+            break
+        relocation = _relocation_section(scheduler, student_id, other)
+        if relocation is not None:
+            best = (weight, section, other, relocation)
+            break
+        gain = weight - weights[student_id].get(other, 0)
+        if gain > 0 and (best is None or gain > best[0]):
+            best = (gain, section, other, None)
+
+    if best is None:
+        return 0
+
+    gain, section, other, relocation = best
+    if course_code in assignments:
+        scheduler._unenroll(student_id, course_code)
+    if other is not None:
+        scheduler._unenroll(student_id, other)
+        if relocation is not None:
+            scheduler._enroll(student_id, relocation)
+    scheduler._enroll(student_id, section)
+    return gain
+
+
+def _relocation_section(scheduler, student_id, course_code):
+    """Another scheduled section of a course with a seat left, in a block the student has free"""
+    current = scheduler.student_assignments[student_id][course_code]
+    for section in scheduler.course_sections.get(course_code, []):
+        if (section is not current and section.block and len(section.students) < section.max_size
+                and _course_in_block(scheduler, student_id, section.block) is None):
+            return section
+    return None
+
+
+def _snapshot(scheduler, sections):
+    """Copy the mutable scheduling state"""
+    return {
+        'sections': [(section, section.block, section.students[:]) for section in sections],
+        'student_assignments': [dict(courses) for courses in scheduler.student_assignments],
+    }
+
+
+def _restore(scheduler, state):
+    """Restore the scheduling state saved by _snapshot"""
+    scheduler.schedule = {block: [] for block in scheduler.blocks}
+    for section, block, students in state['sections']:
+        section.block = block
+        section.students = students
+        if block:
+            scheduler.schedule[block].append(section)
+    scheduler.student_assignments = state['student_assignments']
+    scheduler._rebuild_indexes()
@@ -0,0 +1,610 @@
+"""
+Matrix-form backend for the scheduling MIP.
+
+Students, courses, blocks and rooms are integer-indexed and the constraint
+matrix is assembled as NumPy COO arrays, then written straight to an MPS file
+for CBC. This skips the PuLP variable and expression objects (and their long
+string names), which dominate memory on large inputs. The solution is read back
+by column index.
+"""
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pulp
+
+from src.scheduling.config import get_solver_profile
+from src.scheduling.scheduling.aggregation import disaggregate, group_students, student_groups
+from src.scheduling.scheduling.model_builder import (
+    FORMULATIONS,
+    PRIORITIES,
+    PRIORITY_WEIGHTS,
+    group_room_classes,
+    prune_combinations,
+    room_seat_limit,
+    section_size_limits,
+)
+from src.scheduling.scheduling.warm_start import repair_start, room_keys
+
+
+def build_matrix_model(structured_data, index, formulation='room', aggregate=False, lazy_rows=False):
+    """
+    Build the scheduling MIP as COO arrays.
+
+    The formulation matches model_builder.build_schedule_model, including its
+    pruning. Columns are laid out as x (request, allowed block), then y
+    (course, allowed block, usable room unit), then the continuous openings of
+    the allowed (course, block) pairs. A room unit is a single room, or a room
+    class for the room-class formulation. The model keeps the course, block and
+    unit of every column so solutions can be mapped back. With aggregate=True a
+    "student" is a request group and its x columns are integer counts.
+
+    lazy_rows=True leaves out the student-block (1) and room capacity (5) rows;
+    solve_lazy_matrix_model adds the ones a solution violates.
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown formulation '{formulation}', expected one of {FORMULATIONS}")
+
+    blocks = structured_data['blocks']
+    rooms = structured_data['rooms']
+    courses = index['relevant_courses']
+    course_position = {course['code']: i for i, course in enumerate(courses)}
+
+    # Requests, in student (or request group) order
+    groups = group_students(index) if aggregate else None
+    if groups is None:
+        owner_requests = list(index['student_courses'].values())
+        owner_size = np.ones(len(owner_requests))
+    else:
+        owner_requests = [group['requests'] for group in groups]
+        owner_size = np.array([len(group['students']) for group in groups], dtype=np.float64)
+
+    request_student = []
+    request_course = []
+    request_weight = []
+    request_priority = []
+    for student_position, requests in enumerate(owner_requests):
+        for course_code, priority in requests.items():
+            request_student.append(student_position)
+            request_course.append(course_position[course_code])
+            request_weight.append(PRIORITY_WEIGHTS[priority])
+            request_priority.append(PRIORITIES.index(priority))
+    request_student = np.array(request_student, dtype=np.int64)
+    request_course = np.array(request_course, dtype=np.int64)
+    request_weight = np.array(request_weight, dtype=np.float64)
+    request_priority = np.array(request_priority, dtype=np.int64)
+
+    room_classes = None
+    if formulation == 'room_class':
+        room_classes = group_room_classes(rooms)
+        unit_keys = list(range(len(room_classes)))
+        unit_count = np.array([len(room_class['rooms']) for room_class in room_classes], dtype=np.float64)
+        unit_seats = np.array([room_seat_limit(room_class['capacity']) for room_class in room_classes],
+                              dtype=np.float64)
+    else:
+        unit_keys = [room['room_number'] for room in rooms]
+        unit_count = np.ones(len(rooms), dtype=np.float64)
+        unit_seats = np.array([room_seat_limit(room['capacity']) for room in rooms], dtype=np.float64)
+
+    num_requests = len(request_weight)
+    num_blocks = len(blocks)
+    num_units = len(unit_keys)
+
+    # Allowed (course, block) pairs and usable (course, unit) pairs
+    pruning = prune_combinations(structured_data, index, [unit['capacity'] for unit in (room_classes or rooms)])
+    block_position = {block: j for j, block in enumerate(blocks)}
+    allowed = np.zeros((len(courses), num_blocks), dtype=bool)
+    usable = np.zeros((len(courses), num_units), dtype=bool)
+    for i, course in enumerate(courses):
+        allowed[i, [block_position[block] for block in pruning['course_blocks'][course['code']]]] = True
+        usable[i, pruning['course_units'][course['code']]] = True
+
+    # Column indexes of each variable family, only for allowed combinations:
+    # x per (request, allowed block), y per (allowed opening, usable unit), then the openings
+    x_request, x_block = np.nonzero(allowed[request_course])
+    open_course, open_block = np.nonzero(allowed)
+    y_course, y_block, y_unit = np.nonzero(allowed[:, :, None] & usable[:, None, :])
+    num_x = len(x_request)
+    num_y = len(y_unit)
+    num_openings = len(open_course)
+    num_columns = num_x + num_y + num_openings
+
+    opening_position = np.full((len(courses), num_blocks), -1, dtype=np.int64)
+    opening_position[open_course, open_block] = np.arange(num_openings)
+    x_cols = np.arange(num_x)
+    x_size = owner_size[request_student[x_request]]
+    x_opening = opening_position[request_course[x_request], x_block]
+    y_cols = num_x + np.arange(num_y)
+    y_opening = opening_position[y_course, y_block]
+    openings = np.arange(num_openings)
+    open_cols = num_x + num_y + openings
+
+    # No opening seats more than the course's demand
+    min_sizes = np.zeros(len(courses))
+    seat_limits = np.zeros(len(courses))
+    num_sections = np.zeros(len(courses))
+    for i, course in enumerate(courses):
+        num_potential = len(index['course_students'][course['code']])
+        min_sizes[i], max_size = section_size_limits(course, num_potential)
+        seat_limits[i] = min(max_size, num_potential)
+        num_sections[i] = course.get('num_sections', 1)
+    opening_min = min_sizes[open_course]
+    opening_max = seat_limits[open_course]
+
+    rows, cols, values = [], [], []
+    senses, rhs = [], []
+    num_rows = 0
+
+    def add_rows(count, sense, bound):
+        nonlocal num_rows
+        offset = num_rows
+        num_rows += count
+        senses.append(np.full(count, sense))
+        rhs.append(np.broadcast_to(np.asarray(bound, dtype=np.float64), (count,)))
+        return offset
+
+    def add_entries(row_index, col_index, coefficient):
+        rows.append(np.asarray(row_index, dtype=np.int64))
+        cols.append(np.asarray(col_index, dtype=np.int64))
+        values.append(np.broadcast_to(np.asarray(coefficient, dtype=np.float64), (len(row_index),)))
+
+    # 1. Student can't be in two places at once (one row per student and block in use)
+    student_blocks, x_student_block = np.unique(request_student[x_request] * num_blocks + x_block,
+                                                return_inverse=True)
+    lazy = {
+        'x_student_block': x_student_block,
+        'student_block_size': owner_size[student_blocks // num_blocks],
+        'x_opening': x_opening,
+        'y_opening': y_opening,
+        'y_seats': np.minimum(unit_seats[y_unit], opening_max[y_opening]),
+        'num_x': num_x,
+    }
+    pending = {
+        'student_block': np.full(len(student_blocks), lazy_rows),
+        'capacity': np.full(num_openings, lazy_rows),
+    }
+    if not lazy_rows:
+        row_index, col_index, coefficients, bounds = _student_block_rows(lazy, ~pending['student_block'])
+        offset = add_rows(len(bounds), 'L', bounds)
+        add_entries(offset + row_index, col_index, coefficients)
+
+    # Each request is fulfilled at most once (only needed with several allowed blocks)
+    several = np.bincount(x_request, minlength=num_requests) > 1
+    request_row = np.cumsum(several) - 1
+    offset = add_rows(int(several.sum()), 'L', owner_size[request_student[several]])
+    x_several = several[x_request]
+    add_entries(offset + request_row[x_request[x_several]], x_cols[x_several], 1)
+
+    # At most one opening per catalog section, for courses allowed in more blocks
+    capped = allowed.sum(axis=1) > num_sections
+    capped_row = np.cumsum(capped) - 1
+    offset = add_rows(int(capped.sum()), 'L', num_sections[capped])
+    open_capped = capped[open_course]
+    add_entries(offset + capped_row[open_course[open_capped]], open_cols[open_capped], 1)
+
+    # 2. Link the per-block opening to the rooms used
+    offset = add_rows(num_openings, 'E', 0)
+    add_entries(offset + y_opening, y_cols, 1)
+    add_entries(offset + openings, open_cols, -1)
+
+    # 3. A block can't use more rooms of a unit than it holds
+    unit_blocks, unit_block_row = np.unique(y_unit * num_blocks + y_block, return_inverse=True)
+    offset = add_rows(len(unit_blocks), 'L', unit_count[unit_blocks // num_blocks])
+    add_entries(offset + unit_block_row, y_cols, 1)
+
+    # 4. Student can only be assigned to a course if it's scheduled
+    offset = add_rows(num_x, 'L', 0)
+    add_entries(offset + x_cols, x_cols, 1)
+    add_entries(offset + x_cols, open_cols[x_opening], -x_size)
+
+    # 5. Respect room capacity of whichever room hosts the course
+    if not lazy_rows:
+        row_index, col_index, coefficients, bounds = _capacity_rows(lazy, ~pending['capacity'])
+        offset = add_rows(len(bounds), 'L', bounds)
+        add_entries(offset + row_index, col_index, coefficients)
+
+    # 6. Relaxed minimum size, for openings where it is enforced
+    has_min = opening_min > 0
+    min_row = np.cumsum(has_min) - 1
+    offset = add_rows(int(has_min.sum()), 'G', 0)
+    x_has_min = has_min[x_opening]
+    add_entries(offset + min_row[x_opening[x_has_min]], x_cols[x_has_min], 1)
+    add_entries(offset + min_row[has_min], open_cols[has_min], -opening_min[has_min])
+
+    # Maximum size constraint
+    offset = add_rows(num_openings, 'L', 0)
+    add_entries(offset + x_opening, x_cols, 1)
+    add_entries(offset + openings, open_cols, -opening_max)
+
+    objective = np.zeros(num_columns)
+    objective[:num_x] = request_weight[x_request]
+    upper = np.ones(num_columns)
+    upper[:num_x] = x_size
+
+    model = {
+        'formulation': formulation,
+        'room_classes': room_classes,
+        'groups': groups,
+        'student_ids': list(index['student_courses']),
+        'course_codes': [course['code'] for course in courses],
+        'blocks': list(blocks),
+        'unit_keys': unit_keys,
+        'request_student': request_student,
+        'request_course': request_course,
+        'request_priority': request_priority,
+        'x_request': x_request,
+        'x_block': x_block,
+        'y_course': y_course,
+        'y_block': y_block,
+        'y_unit': y_unit,
+        'opening_position': opening_position,
+        'num_x': num_x,
+        'num_y': num_y,
+        'num_columns': num_columns,
+        'rows': np.concatenate(rows),
+        'cols': np.concatenate(cols),
+        'values': np.concatenate(values),
+        'senses': np.concatenate(senses),
+        'rhs': np.concatenate(rhs),
+        'objective': objective,
+        'upper': upper,
+        'lazy': lazy,
+        'pending': pending,
+    }
+
+    print(f"Created matrix model with {num_columns} columns, {num_rows} rows "
+          f"and {len(model['values'])} nonzeros")
+
+    return model
+
+
+def _student_block_rows(lazy, selected):
+    """Entries and bounds of the student-block rows (1) of the selected (student, block) pairs"""
+    row_of = np.cumsum(selected) - 1
+    in_rows = selected[lazy['x_student_block']]
+    col_index = np.flatnonzero(in_rows)
+    return (row_of[lazy['x_student_block'][in_rows]], col_index, np.ones(len(col_index)),
+            lazy['student_block_size'][selected])
+
+
+def _capacity_rows(lazy, selected):
+    """Entries and bounds of the room capacity rows (5) of the selected openings"""
+    row_of = np.cumsum(selected) - 1
+    x_in = selected[lazy['x_opening']]
+    y_in = selected[lazy['y_opening']]
+    row_index = np.concatenate([row_of[lazy['x_opening'][x_in]], row_of[lazy['y_opening'][y_in]]])
+    col_index = np.concatenate([np.flatnonzero(x_in), lazy['num_x'] + np.flatnonzero(y_in)])
+    coefficients = np.concatenate([np.ones(int(x_in.sum())), -lazy['y_seats'][y_in]])
+    return row_index, col_index, coefficients, np.zeros(int(selected.sum()))
+
+
+LAZY_FAMILIES = {'student_block': _student_block_rows, 'capacity': _capacity_rows}
+
+
+def find_violated_rows(model, values, tolerance=1e-6):
+    """
+    Check solution values against the rows a lazy model has left out.
+
+    Returns {family: boolean mask} of the pending student-block pairs and
+    openings whose row the solution violates.
+    """
+    lazy = model['lazy']
+    num_x = lazy['num_x']
+    x_values = values[:num_x]
+    y_values = values[num_x:num_x + model['num_y']]
+
+    student_block_load = np.bincount(lazy['x_student_block'], weights=x_values,
+                                     minlength=len(lazy['student_block_size']))
+    opening_load = np.bincount(lazy['x_opening'], weights=x_values, minlength=len(model['pending']['capacity']))
+    opening_seats = np.bincount(lazy['y_opening'], weights=y_values * lazy['y_seats'],
+                                minlength=len(model['pending']['capacity']))
+    return {
+        'student_block': model['pending']['student_block']
+        & (student_block_load > lazy['student_block_size'] + tolerance),
+        'capacity': model['pending']['capacity'] & (opening_load > opening_seats + tolerance),
+    }
+
+
+def append_rows(model, row_index, col_index, coefficients, sense, bounds):
+    """Append rows, numbered from 0 in row_index, to a matrix model"""
+    row_index = len(model['senses']) + np.asarray(row_index, dtype=np.int64)
+    model['rows'] = np.concatenate([model['rows'], row_index])
+    model['cols'] = np.concatenate([model['cols'], np.asarray(col_index, dtype=np.int64)])
+    model['values'] = np.concatenate([model['values'], np.asarray(coefficients, dtype=np.float64)])
+    model['senses'] = np.concatenate([model['senses'], np.full(len(bounds), sense)])
+    model['rhs'] = np.concatenate([model['rhs'], np.asarray(bounds, dtype=np.float64)])
+
+
+def add_lazy_rows(model, violated):
+    """Append the rows of the given {family: mask} to a model and mark them as added. Returns the row count."""
+    added = 0
+    for family, selected in violated.items():
+        if not selected.any():
+            continue
+        row_index, col_index, coefficients, bounds = LAZY_FAMILIES[family](model['lazy'], selected)
+        append_rows(model, row_index, col_index, coefficients, 'L', bounds)
+        model['pending'][family] = model['pending'][family] & ~selected
+        added += len(bounds)
+    return added
+
+
+def solve_lazy_matrix_model(model, solver_profile=None, start=None, max_rounds=10):
+    """
+    Solve a lazy matrix model by row generation.
+
+    Each round solves the current model, checks the solution against the rows
+    still left out and adds the violated ones, until a solution violates none.
+    The rounds share the profile's time limit. After max_rounds every pending
+    row is added for a last round, so the result is always feasible for the
+    full model. The result gets the number of 'rounds' and 'lazy_rows' added.
+    """
+    options = get_solver_profile(solver_profile)
+    deadline = time.perf_counter() + options['timeLimit'] if options.get('timeLimit') is not None else None
+    added_rows = 0
+    rounds = 0
+    while True:
+        rounds += 1
+        remaining = max(deadline - time.perf_counter(), 1) if deadline is not None else None
+        result = solve_matrix_model(model, solver_profile, start=start, time_limit=remaining)
+        if not result['has_solution']:
+            break
+
+        violated = find_violated_rows(model, result['values'])
+        if rounds >= max_rounds or (deadline is not None and time.perf_counter() >= deadline):
+            if not any(mask.any() for mask in violated.values()):
+                break
+            # Out of rounds or time: finish with the full model
+            violated = {family: pending.copy() for family, pending in model['pending'].items()}
+        added = add_lazy_rows(model, violated)
+        if not added:
+            break
+        print(f"Row generation round {rounds}: added {added} violated rows")
+        added_rows += added
+
+    print(f"Row generation finished after {rounds} rounds with {added_rows} of "
+          f"{added_rows + sum(int(pending.sum()) for pending in model['pending'].values())} lazy rows added")
+    result['rounds'] = rounds
+    result['lazy_rows'] = added_rows
+    return result
+
+
+def write_mps(model, file_path):
+    """Write a matrix model to a free-format MPS file, with columns named C<index> and rows R<index>"""
+    num_integer = model['num_x'] + model['num_y']
+
+    # Objective coefficients go in as row -1, then all entries are grouped by column
+    objective_cols = np.flatnonzero(model['objective'])
+    entry_rows = np.concatenate([np.full(len(objective_cols), -1), model['rows']])
+    entry_cols = np.concatenate([objective_cols, model['cols']])
+    entry_values = np.concatenate([model['objective'][objective_cols], model['values']])
+    order = np.lexsort((entry_rows, entry_cols))
+    entry_rows = entry_rows[order]
+    entry_cols = entry_cols[order]
+    entry_values = entry_values[order]
+    integer_end = int(np.searchsorted(entry_cols, num_integer))
+
+    def column_lines(start, stop):
+        for row, col, value in zip(entry_rows[start:stop].tolist(),
+                                   entry_cols[start:stop].tolist(),
+                                   entry_values[start:stop].tolist()):
+            row_name = f"R{row}" if row >= 0 else "OBJ"
+            yield f"    C{col}  {row_name}  {value:.12g}\n"
+
+    with open(file_path, 'w') as f:
+        f.write("NAME          SCHEDULE\n")
+        f.write("ROWS\n")
+        f.write(" N  OBJ\n")
+        f.writelines(f" {sense}  R{row}\n" for row, sense in enumerate(model['senses'].tolist()))
+        f.write("COLUMNS\n")
+        f.write("    MARKER  'MARKER'  'INTORG'\n")
+        f.writelines(column_lines(0, integer_end))
+        f.write("    MARKER  'MARKER'  'INTEND'\n")
+        f.writelines(column_lines(integer_end, len(entry_values)))
+        f.write("RHS\n")
+        f.writelines(f"    RHS  R{row}  {value:.12g}\n"
+                     for row, value in zip(np.flatnonzero(model['rhs']).tolist(),
+                                           model['rhs'][model['rhs'] != 0].tolist()))
+        f.write("BOUNDS\n")
+        # Every column lies in [0, 1], except aggregated x counts which go up to their group size
+        f.writelines(f" UP BND  C{col}  {value:.12g}\n" for col, value in enumerate(model['upper'].tolist()))
+        f.write("ENDATA\n")
+
+
+def start_vector(model, structured_data, index, schedule):
+    """Build a MIP start vector for a matrix model from a (repaired) schedule"""
+    assigned, opening_rooms = repair_start(structured_data, index, schedule)
+
+    num_blocks = len(model['blocks'])
+    num_units = len(model['unit_keys'])
+    block_position = {block: j for j, block in enumerate(model['blocks'])}
+    course_position = {course_code: i for i, course_code in enumerate(model['course_codes'])}
+    unit_position = {key: u for u, key in enumerate(model['unit_keys'])}
+    if model['groups'] is None:
+        owner_of = {student_id: s for s, student_id in enumerate(model['student_ids'])}
+    else:
+        owner_of = student_groups(model['groups'])
+    request_position = {}
+    for r, (owner, course) in enumerate(zip(model['request_student'].tolist(),
+                                            model['request_course'].tolist())):
+        request_position[(owner, model['course_codes'][course])] = r
+
+    # Columns are sorted by these keys, so they are found by binary search
+    x_keys = model['x_request'] * num_blocks + model['x_block']
+    y_keys = (model['y_course'] * num_blocks + model['y_block']) * num_units + model['y_unit']
+
+    start = np.zeros(model['num_columns'])
+    wanted = [request_position[(owner_of[student_id], course_code)] * num_blocks + block_position[block]
+              for student_id, course_code, block in assigned]
+    np.add.at(start, np.searchsorted(x_keys, wanted), 1)
+
+    room_key = room_keys(model, structured_data['rooms'])
+    for (course_code, block), room_id in opening_rooms.items():
+        course, j = course_position[course_code], block_position[block]
+        y_key = (course * num_blocks + j) * num_units + unit_position[room_key[room_id]]
+        start[model['num_x'] + int(np.searchsorted(y_keys, y_key))] = 1
+        start[model['num_x'] + model['num_y'] + model['opening_position'][course, j]] = 1
+
+    return start
+
+
+def _cbc_arguments(options):
+    """Translate a solver profile into CBC command line arguments"""
+    arguments = []
+    if options.get('timeLimit') is not None:
+        arguments += ['-sec', str(options['timeLimit'])]
+    if options.get('gapRel') is not None:
+        arguments += ['-ratio', str(options['gapRel'])]
+    if options.get('threads'):
+        arguments += ['-threads', str(options['threads'])]
+    if options.get('presolve') is not None:
+        arguments += ['-presolve', 'on' if options['presolve'] else 'off']
+    if options.get('cuts') is not None:
+        arguments += ['-gomory', 'on', 'knapsack', 'on', 'probing', 'on'] if options['cuts'] else ['-cuts', 'off']
+    return arguments
+
+
+def solve_matrix_model(model, solver_profile=None, start=None, time_limit=None):
+    """
+    Solve a matrix model with the CBC binary bundled with PuLP.
+
+    time_limit (seconds) overrides the profile's time limit.
+
+    Returns a dictionary with the CBC status, whether an integer solution was
+    found, the objective value and the column values as a NumPy array. A
+    feasible MIP start is returned when CBC finds no solution of its own.
+    """
+    options = get_solver_profile(solver_profile)
+    if time_limit is not None:
+        options = dict(options, timeLimit=time_limit)
+    cbc_path = pulp.PULP_CBC_CMD().path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mps_file = os.path.join(tmp_dir, 'schedule.mps')
+        solution_file = os.path.join(tmp_dir, 'schedule.sol')
+        write_mps(model, mps_file)
+
+        command = [cbc_path, mps_file, '-max']
+        if start is not None:
+            start_file = os.path.join(tmp_dir, 'schedule.mst')
+            _write_mip_start(start_file, start)
+            command += ['-mips', start_file]
+        command += _cbc_arguments(options)
+        command += ['-timeMode', 'elapsed', '-solve', '-solution', solution_file]
+        subprocess.run(command, check=False)
+
+        if os.path.exists(solution_file):
+            result = read_solution(solution_file, model['num_columns'])
+        else:
+            result = {'status': 'Not Solved', 'has_solution': False, 'objective': None, 'values': None}
+
+    if not result['has_solution']:
+        # Other statuses can still come with a usable solution, and CBC's
+        # preprocessing can call a model with a feasible MIP start "Integer
+        # infeasible"; either is kept once it checks out against the model
+        if result['objective'] is not None and check_solution(model, result['values']):
+            print(f"CBC reported '{result['status']}' but its solution is feasible, keeping it")
+            result['has_solution'] = True
+        elif start is not None and check_solution(model, start):
+            print(f"CBC reported '{result['status']}' without a solution, keeping the MIP start")
+            result = dict(result, has_solution=True, objective=float(model['objective'] @ start),
+                          values=np.asarray(start, dtype=np.float64))
+        else:
+            result['objective'] = None
+    return result
+
+
+def _write_mip_start(file_path, start):
+    """Write a start vector in the CBC solution format read by -mips"""
+    with open(file_path, 'w') as f:
+        f.write("Stopped on time - objective value 0\n")
+        f.writelines(f"{col:>7} C{col} {value:>15} {0:>23}\n" for col, value in enumerate(start.tolist()))
+
+
+# First word of a CBC status line, and whether that status means the values are an integer solution
+CBC_STATUSES = {'Optimal': True, 'Stopped': True, 'Infeasible': False, 'Integer': False, 'Unbounded': False}
+
+
+def read_solution(file_path, num_columns):
+    """Read a CBC solution file into a dense column value array"""
+    values = np.zeros(num_columns)
+    with open(file_path) as f:
+        status_line = f.readline()
+        for line in f:
+            fields = line.split()
+            if len(fields) < 3:
+                break
+            # Infeasible rows/columns are flagged with a leading **
+            if fields[0] == '**':
+                fields = fields[1:]
+            if fields[1].startswith('C'):
+                values[int(fields[1][1:])] = float(fields[2])
+
+    status, has_solution, objective = parse_status_line(status_line)
+    return {'status': status, 'has_solution': has_solution, 'objective': objective, 'values': values}
+
+
+def parse_status_line(line):
+    """
+    Parse a CBC status line such as "Stopped on time - objective value 5126.00000000".
+
+    Returns (status word, whether it reports an integer solution, objective
+    value or None). A stopped run without an integer solution notes
+    "(no integer solution - continuous used)" and reports none.
+    """
+    words = line.split()
+    status = words[0] if words else 'Undefined'
+    text, found, value = line.rpartition('objective value')
+    objective = float(value) if found and value.strip() else None
+    has_solution = (objective is not None and CBC_STATUSES.get(status, False)
+                    and 'no integer solution' not in text)
+    return status, has_solution, objective
+
+
+def check_solution(model, values, tolerance=1e-6):
+    """Whether solution values meet a matrix model's bounds, integrality and rows"""
+    num_integer = model['num_x'] + model['num_y']
+    if (values < -tolerance).any() or (values > model['upper'] + tolerance).any():
+        return False
+    if (np.abs(values[:num_integer] - np.rint(values[:num_integer])) > tolerance).any():
+        return False
+    activity = np.bincount(model['rows'], weights=model['values'] * values[model['cols']],
+                           minlength=len(model['senses']))
+    senses, rhs = model['senses'], model['rhs']
+    return not (((senses == 'L') & (activity > rhs + tolerance)).any()
+                or ((senses == 'G') & (activity < rhs - tolerance)).any()
+                or ((senses == 'E') & (np.abs(activity - rhs) > tolerance)).any())
+
+
+def extract_matrix_solution(model, values):
+    """
+    Turn solution values into (course, block, room key) openings and
+    (student, course, block) assignments, visiting only the nonzero columns.
+    """
+    blocks = model['blocks']
+    course_codes = model['course_codes']
+    num_x = model['num_x']
+
+    chosen = np.flatnonzero(values > 0.5)
+    chosen_x = chosen[chosen < num_x]
+    chosen_y = chosen[(chosen >= num_x) & (chosen < num_x + model['num_y'])] - num_x
+
+    assigned = []
+    requests = model['x_request'][chosen_x]
+    owners = zip(model['request_student'][requests].tolist(), model['request_course'][requests].tolist(),
+                 model['x_block'][chosen_x].tolist())
+    if model['groups'] is None:
+        for student, course, j in owners:
+            assigned.append((model['student_ids'][student], course_codes[course], blocks[j]))
+    else:
+        counts = {(g, course_codes[course], blocks[j]): count
+                  for (g, course, j), count in zip(owners, np.rint(values[chosen_x]).astype(int).tolist())}
+        assigned = disaggregate(model['groups'], counts)
+
+    scheduled = []
+    for course, j, unit in zip(model['y_course'][chosen_y].tolist(), model['y_block'][chosen_y].tolist(),
+                               model['y_unit'][chosen_y].tolist()):
+        scheduled.append((course_codes[course], blocks[j], model['unit_keys'][unit]))
+
+    return scheduled, assigned
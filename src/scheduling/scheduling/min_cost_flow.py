@@ -0,0 +1,325 @@
+"""
+Min-cost-flow assignment of students to sections for a fixed block plan.
+
+Once every section has a block, the students can be reassigned globally:
+
+    source -> (student, block) -> section -> sink
+
+Each (student, block) node passes one unit, so a student attends at most one
+section per block. Each section passes at most max_size units, and a
+(student, block) -> section arc costs minus the student's priority weight for
+the course. The flow is solved primal-dual: a Dijkstra pass with node
+potentials finds the cost of the shortest paths, a blocking flow pushes
+every path of that cost, and the passes stop as soon as no path lowers the
+cost. The priority weights allow only a handful of distinct path costs, so
+only a few passes are needed. The network does not stop a student from
+taking two sections of one course in different blocks; such duplicates are
+handled between re-solves by assign_students_by_flow.
+"""
+import heapq
+from collections import defaultdict, deque
+
+from src.scheduling.scheduling.local_search import request_weights, schedule_score
+
+
+class MinCostFlow:
+    """Min-cost flow on an integer-indexed graph, by primal-dual shortest paths and blocking flows"""
+
+    def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self.adjacency = [[] for _ in range(num_nodes)]
+        # Edge e and its residual reverse edge e ^ 1 are stored side by side
+        self.heads = []
+        self.capacities = []
+        self.costs = []
+
+    def add_edge(self, tail, head, capacity, cost):
+        """Add an arc and return its index"""
+        edge = len(self.heads)
+        self.adjacency[tail].append(edge)
+        self.heads.append(head)
+        self.capacities.append(capacity)
+        self.costs.append(cost)
+        self.adjacency[head].append(edge + 1)
+        self.heads.append(tail)
+        self.capacities.append(0)
+        self.costs.append(-cost)
+        return edge
+
+    def flow(self, edge):
+        """Flow on an arc returned by add_edge"""
+        return self.capacities[edge + 1]
+
+    def _initial_potentials(self, source):
+        """Shortest distances from the source, allowing negative arc costs (SPFA)"""
+        infinity = float('inf')
+        distance = [infinity] * self.num_nodes
+        distance[source] = 0
+        queue = deque([source])
+        queued = [False] * self.num_nodes
+        queued[source] = True
+        while queue:
+            node = queue.popleft()
+            queued[node] = False
+            for edge in self.adjacency[node]:
+                if self.capacities[edge] > 0:
+                    head = self.heads[edge]
+                    candidate = distance[node] + self.costs[edge]
+                    if candidate < distance[head]:
+                        distance[head] = candidate
+                        if not queued[head]:
+                            queued[head] = True
+                            queue.append(head)
+        return [d if d != infinity else 0 for d in distance]
+
+    def solve(self, source, sink):
+        """
+        Push flow along shortest paths while they have negative cost.
+
+        Each Dijkstra pass updates the node potentials so that every shortest
+        path uses only arcs of zero reduced cost. A blocking flow over those
+        arcs (as in Dinic's algorithm) then saturates all of them before the
+        next pass, so there is one pass per distinct path cost rather than per
+        unit of flow. Returns (flow, cost). Costs must be integers and must not
+        form a negative cycle.
+        """
+        potential = self._initial_potentials(source)
+        total_flow = 0
+        total_cost = 0
+
+        while True:
+            distance = self._shortest_distances(source, sink, potential)
+            if distance is None:
+                break
+            # Nodes farther than the sink move by the sink's distance, which keeps every reduced cost non-negative
+            bound = distance[sink]
+            for node in range(self.num_nodes):
+                potential[node] += min(distance[node], bound)
+
+            # Real cost of the shortest paths; stop once more flow no longer pays
+            path_cost = potential[sink] - potential[source]
+            if path_cost >= 0:
+                break
+
+            pushed = self._push_admissible(source, sink, potential)
+            total_flow += pushed
+            total_cost += pushed * path_cost
+
+        return total_flow, total_cost
+
+    def _shortest_distances(self, source, sink, potential):
+        """
+        Dijkstra over reduced costs, stopping at the sink. Returns the distances
+        (infinite where not reached), or None if the sink is unreachable.
+        """
+        infinity = float('inf')
+        distance = [infinity] * self.num_nodes
+        distance[source] = 0
+        done = [False] * self.num_nodes
+        heap = [(0, source)]
+        while heap:
+            dist, node = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            if node == sink:
+                return distance
+            node_potential = potential[node]
+            for edge in self.adjacency[node]:
+                if self.capacities[edge] > 0:
+                    head = self.heads[edge]
+                    candidate = dist + self.costs[edge] + node_potential - potential[head]
+                    if candidate < distance[head]:
+                        distance[head] = candidate
+                        heapq.heappush(heap, (candidate, head))
+        return None
+
+    def _push_admissible(self, source, sink, potential):
+        """Max flow from source to sink over the arcs of zero reduced cost (Dinic). Returns the flow pushed."""
+        pushed = 0
+        while True:
+            level = self._admissible_levels(source, potential)
+            if level[sink] < 0:
+                return pushed
+            next_edge = [0] * self.num_nodes
+            while True:
+                flow = self._augment(source, sink, level, next_edge, potential)
+                if not flow:
+                    break
+                pushed += flow
+
+    def _admissible(self, edge, tail, potential):
+        return self.capacities[edge] > 0 and self.costs[edge] + potential[tail] - potential[self.heads[edge]] == 0
+
+    def _admissible_levels(self, source, potential):
+        """Breadth-first levels of the nodes over admissible arcs (-1 where not reached)"""
+        level = [-1] * self.num_nodes
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for edge in self.adjacency[node]:
+                head = self.heads[edge]
+                if level[head] < 0 and self._admissible(edge, node, potential):
+                    level[head] = level[node] + 1
+                    queue.append(head)
+        return level
+
+    def _augment(self, source, sink, level, next_edge, potential):
+        """
+        Find one path along the level graph with a depth-first search that
+        resumes each node at its next untried arc, and push its bottleneck.
+        Returns the flow pushed (0 once the level graph is blocked).
+        """
+        path = []
+        node = source
+        while node != sink:
+            adjacency = self.adjacency[node]
+            while next_edge[node] < len(adjacency):
+                edge = adjacency[next_edge[node]]
+                if level[self.heads[edge]] == level[node] + 1 and self._admissible(edge, node, potential):
+                    break
+                next_edge[node] += 1
+            else:
+                # Dead end: retreat and skip the arc that led here
+                if not path:
+                    return 0
+                node = self.heads[path.pop() ^ 1]
+                next_edge[node] += 1
+                continue
+            path.append(edge)
+            node = self.heads[edge]
+
+        bottleneck = min(self.capacities[edge] for edge in path)
+        for edge in path:
+            self.capacities[edge] -= bottleneck
+            self.capacities[edge ^ 1] += bottleneck
+        return bottleneck
+
+
+def assign_students_by_flow(scheduler, max_rounds=5):
+    """
+    Reassign every student of a CourseScheduler by min-cost flow over its current block plan.
+
+    The flow gives the maximum-weight assignment when each course has at most
+    one scheduled section. With several sections, a student can receive two
+    sections of one course in different blocks. The student is then held to
+    one section of that course (their current one if the flow chose it) and
+    the flow re-solved, up to max_rounds times. A student keeps one section of
+    any course still duplicated after that, and the blocks this frees are
+    filled greedily. If the result scores lower than the
+    schedule it started from, the original enrollments are restored. Returns a
+    summary dictionary.
+    """
+    weights = request_weights(scheduler.students)
+    initial_score = schedule_score(scheduler, weights)
+    current = [dict(courses) for courses in scheduler.student_assignments]
+    sections = [section for block in scheduler.blocks for section in scheduler.schedule[block]]
+    sections_by_course = defaultdict(list)
+    for section in sections:
+        sections_by_course[section.course_code].append(section)
+
+    # The network is built once; each round closes the arcs that produced
+    # duplicates and re-solves it from zero flow
+    network, arcs = _build_network(scheduler, weights, sections, sections_by_course)
+    arc_edges = {(student_id, id(section)): edge for edge, student_id, section in arcs}
+    capacities = list(network.capacities)
+    chosen = []
+    duplicates = []
+    for round_number in range(max_rounds):
+        network.capacities = list(capacities)
+        network.solve(0, 1)
+        chosen = [(student_id, section) for edge, student_id, section in arcs if network.flow(edge)]
+
+        by_request = defaultdict(list)
+        for student_id, section in chosen:
+            by_request[(student_id, section.course_code)].append(section)
+        duplicates = [(key, found) for key, found in by_request.items() if len(found) > 1]
+        if not duplicates:
+            break
+        for (student_id, course_code), found in duplicates:
+            # Keeping the current section leaves the starting assignment feasible in the next round
+            kept = current[student_id].get(course_code)
+            kept = kept if any(section is kept for section in found) else found[0]
+            for section in sections_by_course[course_code]:
+                if section is not kept:
+                    capacities[arc_edges[(student_id, id(section))]] = 0
+
+    _replace_enrollments(scheduler, chosen)
+    if duplicates:
+        _fill_requests(scheduler, weights)
+    final_score = schedule_score(scheduler, weights)
+    print(f"Min-cost flow assignment: score {initial_score} -> {final_score} "
+          f"({len(chosen)} assignments, {round_number + 1} rounds, "
+          f"{len(duplicates)} duplicate requests left)")
+
+    restored = final_score < initial_score
+    if restored:
+        print("Min-cost flow assignment scored lower, restoring the previous enrollments")
+        _replace_enrollments(scheduler, [(student_id, section) for student_id, courses in enumerate(current)
+                                         for section in courses.values()])
+        final_score = initial_score
+    return {'initial_score': initial_score, 'final_score': final_score, 'rounds': round_number + 1,
+            'restored': restored}
+
+
+def _replace_enrollments(scheduler, assignments):
+    """
+    Replace the enrollments in scheduled sections with (student_id, section)
+    assignments, one section per request. Enrollments in sections without a
+    block are kept unless the request now has a scheduled section.
+    """
+    for student_id, courses in enumerate(scheduler.student_assignments):
+        for course_code, section in list(courses.items()):
+            if section.block:
+                scheduler._unenroll(student_id, course_code)
+    for student_id, section in assignments:
+        held = scheduler.student_assignments[student_id].get(section.course_code)
+        if held is section or (held is not None and held.block):
+            continue
+        if held is not None:
+            scheduler._unenroll(student_id, section.course_code)
+        scheduler._enroll(student_id, section)
+
+
+def _fill_requests(scheduler, weights):
+    """Place requests without a scheduled section, heaviest first, in open sections the students have room for"""
+    for student_id, requests in enumerate(weights):
+        for course_code in sorted(requests, key=requests.get, reverse=True):
+            held = scheduler.student_assignments[student_id].get(course_code)
+            if held is not None and held.block:
+                continue
+            section = scheduler._least_filled_section(course_code, scheduler.student_masks[student_id])
+            if section is not None:
+                if held is not None:
+                    scheduler._unenroll(student_id, course_code)
+                scheduler._enroll(student_id, section)
+
+
+def _build_network(scheduler, weights, sections, sections_by_course):
+    """Build the source -> (student, block) -> section -> sink network"""
+    section_node = {id(section): 2 + i for i, section in enumerate(sections)}
+    student_block_node = {}
+    candidate_arcs = []  # (student_id, block, section, weight)
+    for student_id, requests in enumerate(weights):
+        for course_code, weight in requests.items():
+            for section in sections_by_course.get(course_code, []):
+                key = (student_id, section.block)
+                if key not in student_block_node:
+                    student_block_node[key] = 2 + len(sections) + len(student_block_node)
+                candidate_arcs.append((student_id, section, weight))
+
+    network = MinCostFlow(2 + len(sections) + len(student_block_node))
+    for node in student_block_node.values():
+        network.add_edge(0, node, 1, 0)
+    for section in sections:
+        network.add_edge(section_node[id(section)], 1, section.max_size, 0)
+
+    arcs = []
+    for student_id, section, weight in candidate_arcs:
+        edge = network.add_edge(
+            student_block_node[(student_id, section.block)], section_node[id(section)], 1, -weight
+        )
+        arcs.append((edge, student_id, section))
+
+    return network, arcs
@@ -0,0 +1,407 @@
+"""
+Indexed model construction for the course scheduling MIP.
+
+All request data is indexed in a single pass before any variable is created,
+so every constraint family is emitted directly from the indexes instead of
+rescanning students or rooms.
+"""
+import numpy as np
+import pulp
+from collections import defaultdict
+
+from src.scheduling.scheduling.aggregation import group_students
+
+PRIORITIES = ['required', 'requested', 'recommended']
+PRIORITY_WEIGHTS = {'required': 10, 'requested': 5, 'recommended': 1}
+FORMULATIONS = ['room', 'room_class']
+
+
+def build_request_index(structured_data):
+    """
+    Index student requests against the course catalog in one pass.
+
+    A course requested at several priorities by the same student is kept once,
+    at its highest priority.
+    """
+    course_lookup = {}
+    for course in structured_data['courses']:
+        course_lookup.setdefault(course['code'], course)
+
+    student_courses = {}                 # student_id -> {course_code: priority}
+    course_students = defaultdict(list)  # course_code -> [student_id]
+
+    for student in structured_data['students']:
+        student_id = student['id']
+        requests = {}
+        for priority in PRIORITIES:
+            for course_req in student['requests'][priority]:
+                course_code = course_req['code']
+                if course_code in course_lookup and course_code not in requests:
+                    requests[course_code] = priority
+                    course_students[course_code].append(student_id)
+        if requests:
+            student_courses[student_id] = requests
+
+    relevant_courses = [course_lookup[code] for code in course_students]
+
+    return {
+        'relevant_courses': relevant_courses,
+        'course_students': course_students,
+        'student_courses': student_courses,
+    }
+
+
+def group_room_classes(rooms, by_type=False):
+    """
+    Group interchangeable rooms into classes.
+
+    Rooms are keyed by capacity, and optionally by room type. The model puts no
+    constraint on room type, so by default rooms of equal capacity form one class.
+    Returns a list of {'capacity', 'type', 'rooms'} dictionaries.
+    """
+    classes = {}
+    for room in rooms:
+        key = (room['capacity'], room.get('type')) if by_type else (room['capacity'],)
+        if key not in classes:
+            classes[key] = {
+                'capacity': room['capacity'],
+                'type': room.get('type') if by_type else None,
+                'rooms': []
+            }
+        classes[key]['rooms'].append(room['room_number'])
+
+    return sorted(classes.values(), key=lambda room_class: room_class['capacity'])
+
+
+def course_block_options(course, blocks):
+    """Blocks a course may be scheduled in: its available blocks minus its unavailable ones (rule 9)"""
+    available = set(course.get('available_blocks', blocks))
+    unavailable = set(course.get('unavailable_blocks', []))
+    return [block for block in blocks if block in available and block not in unavailable]
+
+
+def prune_combinations(structured_data, index, unit_capacities):
+    """
+    Decide which openings can be part of a feasible schedule before any variable exists.
+
+    A course may only open in its allowed blocks, and only in room units (rooms,
+    or room classes) that seat at least its enforced minimum section size. A
+    course left without a usable unit gets no blocks at all. Returns
+    {'course_blocks': {course_code: [block]}, 'course_units': {course_code: [unit position]}}.
+    """
+    course_blocks = {}
+    course_units = {}
+    for course in index['relevant_courses']:
+        course_code = course['code']
+        min_size, _ = section_size_limits(course, len(index['course_students'][course_code]))
+        units = [u for u, capacity in enumerate(unit_capacities) if room_seat_limit(capacity) >= min_size]
+        course_units[course_code] = units
+        course_blocks[course_code] = course_block_options(course, structured_data['blocks']) if units else []
+
+    blocks = len(structured_data['blocks'])
+    kept_openings = sum(len(allowed) for allowed in course_blocks.values())
+    kept_rooms = sum(len(course_blocks[code]) * len(course_units[code]) for code in course_blocks)
+    print(f"Pruning kept {kept_openings} of {len(course_blocks) * blocks} course blocks and "
+          f"{kept_rooms} of {len(course_blocks) * blocks * len(unit_capacities)} course room slots")
+    return {'course_blocks': course_blocks, 'course_units': course_units}
+
+
+def build_schedule_model(structured_data, index, formulation='room', aggregate=False):
+    """
+    Build the scheduling MIP from a request index.
+
+    formulation='room' creates one y variable per (course, block, room).
+    formulation='room_class' creates one y variable per (course, block, room class)
+    with a per-class room count limit; concrete rooms are matched after solving.
+    Only the combinations kept by prune_combinations get variables.
+    aggregate=True groups students with identical requests (see aggregation.py)
+    and keys x by group position, with integer counts instead of binaries.
+
+    Returns a model dictionary holding the problem, the x (student, course, block),
+    y and per-(course, block) opening variables and, for the room-class
+    formulation, the classes.
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown formulation '{formulation}', expected one of {FORMULATIONS}")
+
+    prob = pulp.LpProblem("CourseScheduling", pulp.LpMaximize)
+
+    room_classes = None
+    units = structured_data['rooms']
+    if formulation == 'room_class':
+        room_classes = group_room_classes(structured_data['rooms'])
+        units = room_classes
+    pruning = prune_combinations(structured_data, index, [unit['capacity'] for unit in units])
+
+    groups = group_students(index) if aggregate else None
+    x, x_by_course_block, constraint_count = _add_assignment_variables(prob, index, pruning, groups)
+
+    if formulation == 'room_class':
+        y, is_open, capacity_terms, count = _add_room_class_variables(prob, structured_data, index, room_classes,
+                                                                      pruning)
+    else:
+        y, is_open, capacity_terms, count = _add_room_variables(prob, structured_data, index, pruning)
+    constraint_count += count
+
+    print(f"Created {len(x)} student assignment variables and {len(y)} course scheduling variables")
+
+    # 4. Student can only be assigned to a course if it's scheduled
+    for (student_id, course_code, block), var in x.items():
+        prob += var <= var.upBound * is_open[(course_code, block)]
+        constraint_count += 1
+
+    constraint_count += _add_course_size_constraints(
+        prob, index, pruning, x_by_course_block, is_open, capacity_terms
+    )
+
+    print(f"Created {constraint_count} constraints")
+
+    return {
+        'prob': prob,
+        'formulation': formulation,
+        'x': x,
+        'y': y,
+        'is_open': is_open,
+        'room_classes': room_classes,
+        'groups': groups,
+    }
+
+
+def _add_assignment_variables(prob, index, pruning, groups=None):
+    """
+    Create the x variables, the objective and the per-student constraints.
+
+    With request groups, x is keyed by group position instead of student ID and
+    counts how many students of the group take the course in the block.
+    """
+    # x[student_id, course_code, block] = 1 if student is assigned to course in block
+    x = {}
+    x_by_student_block = defaultdict(list)
+    x_by_student_course = defaultdict(list)
+    x_by_course_block = defaultdict(list)
+    objective_terms = []
+    sizes = {}  # student_id or group position -> number of students
+
+    if groups is None:
+        owners = [(student_id, student_id, requests, 1) for student_id, requests in index['student_courses'].items()]
+    else:
+        owners = [(g, f"g{g}", group['requests'], len(group['students'])) for g, group in enumerate(groups)]
+
+    for student_id, name, requests, size in owners:
+        sizes[student_id] = size
+        for course_code, priority in requests.items():
+            weight = PRIORITY_WEIGHTS[priority]
+            for block in pruning['course_blocks'][course_code]:
+                if size == 1:
+                    var = pulp.LpVariable(f"x_{name}_{course_code}_{block}", cat='Binary')
+                else:
+                    var = pulp.LpVariable(f"x_{name}_{course_code}_{block}", lowBound=0, upBound=size,
+                                          cat='Integer')
+                x[(student_id, course_code, block)] = var
+                x_by_student_block[(student_id, block)].append(var)
+                x_by_student_course[(student_id, course_code)].append(var)
+                x_by_course_block[(course_code, block)].append(var)
+                objective_terms.append((var, weight))
+
+    # Objective function: maximize fulfilled requests with priority weights
+    prob += pulp.LpAffineExpression(objective_terms)
+    print(f"Objective function created with {len(objective_terms)} terms")
+
+    constraint_count = 0
+
+    # 1. Student can't be in two places at once
+    for (student_id, block), block_vars in x_by_student_block.items():
+        if len(block_vars) > 1:
+            prob += pulp.lpSum(block_vars) <= sizes[student_id]
+            constraint_count += 1
+
+    # Each request is fulfilled at most once
+    for (student_id, course_code), course_vars in x_by_student_course.items():
+        if len(course_vars) > 1:
+            prob += pulp.lpSum(course_vars) <= sizes[student_id]
+            constraint_count += 1
+
+    return x, x_by_course_block, constraint_count
+
+
+def _add_room_variables(prob, structured_data, index, pruning):
+    """Create one y variable per allowed (course, block, room)"""
+    rooms = structured_data['rooms']
+
+    # y[course_code, block, room_id] = 1 if course is scheduled in block at room
+    y = {}
+    y_by_course_block = defaultdict(list)
+    y_by_room_block = defaultdict(list)
+    # open[course_code, block] = number of rooms the course uses in block (0 or 1)
+    is_open = {}
+    capacity_terms = {}
+
+    for course in index['relevant_courses']:
+        course_code = course['code']
+        course_rooms = [rooms[u] for u in pruning['course_units'][course_code]]
+        for block in pruning['course_blocks'][course_code]:
+            key = (course_code, block)
+            for room in course_rooms:
+                room_id = room['room_number']
+                var = pulp.LpVariable(f"y_{course_code}_{block}_{room_id}", cat='Binary')
+                y[(course_code, block, room_id)] = var
+                y_by_course_block[key].append(var)
+                y_by_room_block[(room_id, block)].append(var)
+            capacity_terms[key] = [
+                (var, room_seat_limit(room['capacity'])) for var, room in zip(y_by_course_block[key], course_rooms)
+            ]
+            # 2. Course can only be scheduled in one room per block
+            is_open[key] = pulp.LpVariable(f"open_{course_code}_{block}", lowBound=0, upBound=1)
+
+    constraint_count = 0
+
+    # Link the per-block opening to the rooms used (enforces constraint 2 via its bound)
+    for key, room_vars in y_by_course_block.items():
+        prob += pulp.lpSum(room_vars) == is_open[key]
+        constraint_count += 1
+
+    # 3. Room can only have one course per block
+    for course_vars in y_by_room_block.values():
+        prob += pulp.lpSum(course_vars) <= 1
+        constraint_count += 1
+
+    return y, is_open, capacity_terms, constraint_count
+
+
+def _add_room_class_variables(prob, structured_data, index, room_classes, pruning):
+    """Create one y variable per allowed (course, block, room class)"""
+    # y[course_code, block, class_index] = 1 if course is scheduled in block in a room of that class
+    y = {}
+    y_by_course_block = defaultdict(list)
+    y_by_class_block = defaultdict(list)
+    is_open = {}
+    capacity_terms = {}
+
+    for course in index['relevant_courses']:
+        course_code = course['code']
+        class_indexes = pruning['course_units'][course_code]
+        for block in pruning['course_blocks'][course_code]:
+            key = (course_code, block)
+            for class_index in class_indexes:
+                var = pulp.LpVariable(f"y_{course_code}_{block}_c{class_index}", cat='Binary')
+                y[(course_code, block, class_index)] = var
+                y_by_course_block[key].append(var)
+                y_by_class_block[(class_index, block)].append(var)
+            capacity_terms[key] = [
+                (var, room_seat_limit(room_classes[class_index]['capacity']))
+                for var, class_index in zip(y_by_course_block[key], class_indexes)
+            ]
+            # 2. Course can only be scheduled in one room per block
+            is_open[key] = pulp.LpVariable(f"open_{course_code}_{block}", lowBound=0, upBound=1)
+
+    constraint_count = 0
+
+    for key, class_vars in y_by_course_block.items():
+        prob += pulp.lpSum(class_vars) == is_open[key]
+        constraint_count += 1
+
+    # 3. A block can't use more rooms of a class than the class holds
+    for (class_index, block), course_vars in y_by_class_block.items():
+        prob += pulp.lpSum(course_vars) <= len(room_classes[class_index]['rooms'])
+        constraint_count += 1
+
+    return y, is_open, capacity_terms, constraint_count
+
+
+def section_size_limits(course, num_potential):
+    """
+    Return the (min_size, max_size) enforced on a scheduled section of a course.
+
+    The minimum is relaxed by 3 and only enforced (non-zero) for courses with
+    enough requests; the maximum allows a slight overflow.
+    """
+    min_size = max(1, course['min_size'] - 3)
+    max_size = course['max_size'] + 5
+    if num_potential < min_size:
+        min_size = 0
+    return min_size, max_size
+
+
+def room_seat_limit(capacity):
+    """Seats a room offers to a section (rooms smaller than 5 seats still allow 5 students)"""
+    return max(capacity, 5)
+
+
+def _add_course_size_constraints(prob, index, pruning, x_by_course_block, is_open, capacity_terms):
+    """
+    Add the section count, room capacity and section size constraints for
+    every allowed (course, block).
+
+    A course opens in at most num_sections blocks, and no opening can seat more
+    than the course's demand, which caps the seat coefficients and keeps the LP
+    relaxation from spreading a course thinly over every block.
+    """
+    constraint_count = 0
+
+    for course in index['relevant_courses']:
+        course_code = course['code']
+        num_potential = len(index['course_students'][course_code])
+        min_size, max_size = section_size_limits(course, num_potential)
+        seat_limit = min(max_size, num_potential)
+        course_blocks = pruning['course_blocks'][course_code]
+
+        # At most one opening per catalog section
+        num_sections = course.get('num_sections', 1)
+        if len(course_blocks) > num_sections:
+            prob += pulp.lpSum(is_open[(course_code, block)] for block in course_blocks) <= num_sections
+            constraint_count += 1
+
+        for block in course_blocks:
+            key = (course_code, block)
+            student_count = pulp.lpSum(x_by_course_block[key])
+
+            # 5. Respect room capacity of whichever room hosts the course
+            prob += student_count <= pulp.LpAffineExpression(
+                [(var, min(seats, seat_limit)) for var, seats in capacity_terms[key]]
+            )
+            constraint_count += 1
+
+            # 6. Relaxed minimum size
+            if min_size > 0:
+                prob += student_count >= min_size * is_open[key]
+                constraint_count += 1
+
+            # Maximum size constraint
+            prob += student_count <= seat_limit * is_open[key]
+            constraint_count += 1
+
+    return constraint_count
+
+
+def assign_class_rooms(scheduled_classes, room_classes):
+    """
+    Match (course, block, class_index) openings to concrete rooms.
+
+    Rooms within a class are interchangeable, so each opening simply takes the
+    next free room of its class in that block. Returns (course, block, room_id)
+    tuples.
+    """
+    next_room = defaultdict(int)  # (class_index, block) -> position in class room list
+    assignments = []
+
+    for course_code, block, class_index in scheduled_classes:
+        position = next_room[(class_index, block)]
+        room_id = room_classes[class_index]['rooms'][position]
+        next_room[(class_index, block)] = position + 1
+        assignments.append((course_code, block, room_id))
+
+    return assignments
+
+
+def selected_keys(variables):
+    """
+    Return the keys of the binary variables set to 1 in the solution.
+
+    All values are read once into an array in variable order, and only the
+    nonzero positions are mapped back to keys.
+    """
+    keys = list(variables)
+    values = np.fromiter(
+        (var.varValue or 0 for var in variables.values()), dtype=np.float64, count=len(keys)
+    )
+    return [keys[i] for i in np.flatnonzero(values > 0.5)]
@@ -5,13 +5,87 @@ import pulp
 from collections import defaultdict
 import sys
 
-def create_course_schedule(structured_data):
+from src.scheduling.config import DEFAULT_SOLVER_PROFILE, get_solver_profile
+from src.scheduling.scheduling.aggregation import disaggregate, selected_counts
+from src.scheduling.scheduling.model_builder import (
+    assign_class_rooms,
+    build_request_index,
+    build_schedule_model,
+    selected_keys,
+)
+from src.scheduling.scheduling.lexicographic import solve_matrix_lexicographic, solve_pulp_lexicographic
+from src.scheduling.scheduling.incremental import apply_request_delta, fix_outside_neighborhood
+from src.scheduling.scheduling.matrix_model import (
+    build_matrix_model,
+    extract_matrix_solution,
+    solve_lazy_matrix_model,
+    solve_matrix_model,
+    start_vector,
+)
+from src.scheduling.scheduling.warm_start import apply_warm_start, greedy_schedule
+
+BACKENDS = ['pulp', 'matrix']
+
+def create_course_schedule(structured_data, formulation='room', warm_start=None, solver_profile=None,
+                           backend='pulp', previous_schedule=None, request_delta=None, aggregate=False,
+                           lazy_rows=False, lexicographic=False):
     """
     Create a course schedule based on student requests and constraints
     using PuLP linear programming solver
+
+    formulation='room' models every (course, block, room) choice directly;
+    formulation='room_class' groups interchangeable rooms into capacity classes
+    and assigns concrete rooms after solving, which gives a much smaller model.
+
+    warm_start='greedy' or 'simplified' (or an existing schedule dictionary)
+    passes that schedule to CBC as a MIP start.
+
+    solver_profile names one of config.SOLVER_PROFILES (threads, gap, cuts,
+    presolve and time limit); the default profile is used when it is None.
+
+    backend='pulp' builds the model from PuLP expressions; backend='matrix'
+    assembles the constraint matrix as NumPy arrays and writes MPS directly,
+    which is much lighter on large inputs.
+
+    previous_schedule with a request_delta (see incremental.py) re-solves only
+    the students and courses touched by the delta, keeping everything else as
+    in the previous schedule; a full solve is run if that is infeasible.
+    structured_data must be the data before the delta, which is applied here.
+
+    aggregate=True models students with identical requests as one group with
+    integer counts (see aggregation.py) and splits the counts back into
+    individual student schedules after solving.
+
+    lazy_rows=True (matrix backend) leaves the student-block and room capacity
+    rows out of the model and adds only those a solution violates, re-solving
+    until none is violated.
+
+    lexicographic=True replaces the weighted objective by a staged solve:
+    required requests first, then requested, then recommended, each level
+    fixed before the next (see lexicographic.py). The greedy schedule is the
+    MIP start unless warm_start gives another one.
     """
     print("Creating course schedule...")
     
+    if lazy_rows and backend != 'matrix':
+        raise ValueError("Lazy row generation is only supported by the 'matrix' backend")
+    if lazy_rows and lexicographic:
+        raise ValueError("Lazy row generation can't be combined with a lexicographic solve")
+
+    changed_students = None
+    if previous_schedule is not None:
+        if backend != 'pulp':
+            raise ValueError("Incremental solves are only supported by the 'pulp' backend")
+        if aggregate:
+            raise ValueError("Incremental solves need per-student variables and can't be aggregated")
+        structured_data, changed_students = apply_request_delta(structured_data, request_delta or {})
+        if warm_start is None:
+            warm_start = previous_schedule
+    if lexicographic and warm_start is None:
+        # Without a start a stage that stops early has nothing to keep
+        print("Seeding the lexicographic stages with the greedy schedule")
+        warm_start = 'greedy'
+    
     # Extract data
     courses = structured_data['courses']
     students = structured_data['students']
@@ -24,238 +98,48 @@ def create_course_schedule(structured_data):
     print(f"Available blocks: {blocks}")
     print(f"Available rooms: {len(rooms)}")
     
-    # Create problem instance
-    prob = pulp.LpProblem("CourseScheduling", pulp.LpMaximize)
-    
-    # Track which courses are requested by students (to reduce variable count)
-    requested_courses = set()
-    for student in students:
-        for priority in ['required', 'requested', 'recommended']:
-            for course_req in student['requests'][priority]:
-                requested_courses.add(course_req['code'])
-    
-    print(f"Total requested courses: {len(requested_courses)}")
-    
-    # Only create variables for courses that are actually requested
-    relevant_courses = [course for course in courses if course['code'] in requested_courses]
+    # Index requests once; every constraint family is emitted from these indexes
+    index = build_request_index(structured_data)
+    relevant_courses = index['relevant_courses']
+    print(f"Total requested courses: {len(index['course_students'])}")
     print(f"Relevant courses for scheduling: {len(relevant_courses)}")
     
     if not relevant_courses:
         print("ERROR: No relevant courses found. Check that course codes match between requests and course data.")
         return default_empty_schedule()
     
-    # Decision variables
-    # x[student_id, course_code, block] = 1 if student is assigned to course in block
-    x = {}
-    # Track created variables to avoid duplicates
-    created_x_vars = set()
-    
-    for student in students:
-        student_id = student['id']
-        # Collect all course requests for this student
-        requested_course_codes = set()
-        for priority in ['required', 'requested', 'recommended']:
-            for course_req in student['requests'][priority]:
-                course_code = course_req['code']
-                # Only create variables for valid course codes
-                if course_code in requested_courses:
-                    requested_course_codes.add(course_code)
-        
-        for course_code in requested_course_codes:
-            for block in blocks:
-                var_key = (student_id, course_code, block)
-                if var_key not in created_x_vars:
-                    x[var_key] = pulp.LpVariable(
-                        f"x_{student_id}_{course_code}_{block}", 
-                        cat='Binary'
-                    )
-                    created_x_vars.add(var_key)
-    
-    # y[course_code, block, room_id] = 1 if course is scheduled in block at room
-    y = {}
-    # Track created variables to avoid duplicates
-    created_y_vars = set()
-    
-    for course in relevant_courses:
-        course_code = course['code']
-        for block in blocks:
-            for room in rooms:
-                room_id = room['room_number']
-                var_key = (course_code, block, room_id)
-                if var_key not in created_y_vars:
-                    y[var_key] = pulp.LpVariable(
-                        f"y_{course_code}_{block}_{room_id}",
-                        cat='Binary'
-                    )
-                    created_y_vars.add(var_key)
-    
-    print(f"Created {len(x)} student assignment variables and {len(y)} course scheduling variables")
-    
-    # Objective function: maximize fulfilled requests with priority weights
-    priority_weights = {'required': 10, 'requested': 5, 'recommended': 1}
-    objective = 0
-    
-    for student in students:
-        student_id = student['id']
-        for priority in ['required', 'requested', 'recommended']:
-            weight = priority_weights[priority]
-            for course_req in student['requests'][priority]:
-                course_code = course_req['code']
-                # Only include requested courses with valid variables
-                for block in blocks:
-                    var_key = (student_id, course_code, block)
-                    if var_key in x:
-                        objective += weight * x[var_key]
-    
-    prob += objective
-    print(f"Objective function created with {len(x)} terms")
-    
-    # Constraints
-    constraint_count = 0
-    
-    # 1. Student can't be in two places at once
-    for student in students:
-        student_id = student['id']
-        for block in blocks:
-            # Get all course codes this student has requested and that have variables
-            student_courses = []
-            for priority in ['required', 'requested', 'recommended']:
-                for course_req in student['requests'][priority]:
-                    course_code = course_req['code']
-                    if (student_id, course_code, block) in x:
-                        student_courses.append(course_code)
-            
-            if student_courses:  # Only add constraint if student has requested courses
-                prob += pulp.lpSum(x[(student_id, course_code, block)] 
-                                for course_code in student_courses) <= 1
-                constraint_count += 1
-    
-    # 2. Course can only be scheduled in one room per block
-    for course in relevant_courses:
-        course_code = course['code']
-        for block in blocks:
-            # Check if any rooms have variables for this course/block
-            room_vars = [(course_code, block, room['room_number']) for room in rooms 
-                       if (course_code, block, room['room_number']) in y]
-            
-            if room_vars:  # Only add constraint if variables exist
-                prob += pulp.lpSum(y[var_key] for var_key in room_vars) <= 1
-                constraint_count += 1
-    
-    # 3. Room can only have one course per block
-    for room in rooms:
-        room_id = room['room_number']
-        for block in blocks:
-            # Check if any courses have variables for this room/block
-            course_vars = [(course['code'], block, room_id) for course in relevant_courses 
-                         if (course['code'], block, room_id) in y]
-            
-            if course_vars:  # Only add constraint if variables exist
-                prob += pulp.lpSum(y[var_key] for var_key in course_vars) <= 1
-                constraint_count += 1
-    
-    # 4. Student can only be assigned to a course if it's scheduled
-    for student in students:
-        student_id = student['id']
-        for priority in ['required', 'requested', 'recommended']:
-            for course_req in student['requests'][priority]:
-                course_code = course_req['code']
-                for block in blocks:
-                    var_key = (student_id, course_code, block)
-                    if var_key in x:
-                        # Find all room variables for this course/block
-                        room_vars = [(course_code, block, room['room_number']) for room in rooms 
-                                  if (course_code, block, room['room_number']) in y]
-                        
-                        if room_vars:  # Only add constraint if room variables exist
-                            prob += x[var_key] <= pulp.lpSum(y[room_var] for room_var in room_vars)
-                            constraint_count += 1
-    
-    # 5. Respect room capacity - RELAXED VERSION
-    for course in relevant_courses:
-        course_code = course['code']
-        for block in blocks:
-            for room in rooms:
-                room_id = room['room_number']
-                var_key = (course_code, block, room_id)
-                
-                if var_key in y:
-                    # Count students who could be assigned to this course in this block
-                    potential_students = []
-                    for student in students:
-                        student_id = student['id']
-                        student_var_key = (student_id, course_code, block)
-                        if student_var_key in x:
-                            potential_students.append(student_id)
-                    
-                    # Only add constraint if there are potential students
-                    if potential_students:
-                        room_capacity = room['capacity']
-                        # If room capacity is too small for class minimum size, allow some flexibility
-                        effective_capacity = max(room_capacity, 5)  # Allow at least 5 students
-                        
-                        # Student count for this course/block
-                        student_count = pulp.lpSum(x[(student_id, course_code, block)] 
-                                              for student_id in potential_students)
-                        
-                        # If course scheduled in this room, respect capacity
-                        prob += student_count <= effective_capacity * y[var_key]
-                        constraint_count += 1
-    
-    # 6. Relaxed course minimum size constraint (allow smaller classes if needed)
-    for course in relevant_courses:
-        course_code = course['code']
-        min_size = max(1, course['min_size'] - 3)  # Relax minimum by 3
-        max_size = course['max_size'] + 5  # Allow slight overflow
-        
-        for block in blocks:
-            # Check if course can be scheduled in any room for this block
-            room_vars = [(course_code, block, room['room_number']) for room in rooms 
-                       if (course_code, block, room['room_number']) in y]
-            
-            if room_vars:
-                # Is this course scheduled in any room in this block?
-                is_scheduled = pulp.lpSum(y[var_key] for var_key in room_vars)
-                
-                # Find all students who could take this course in this block
-                potential_students = []
-                for student in students:
-                    student_id = student['id']
-                    student_var_key = (student_id, course_code, block)
-                    if student_var_key in x:
-                        potential_students.append(student_id)
-                
-                if potential_students:
-                    # Number of students in this course in this block
-                    student_count = pulp.lpSum(x[(student_id, course_code, block)] 
-                                          for student_id in potential_students)
-                    
-                    # Relaxed minimum size constraint - only enforce for courses with enough requests
-                    if len(potential_students) >= min_size:
-                        prob += student_count >= min_size * is_scheduled
-                        constraint_count += 1
-                    
-                    # Maximum size constraint
-                    prob += student_count <= max_size * is_scheduled
-                    constraint_count += 1
-    
-    print(f"Created {constraint_count} constraints")
+    start_schedule = None
+    if warm_start is not None:
+        start_schedule = _warm_start_schedule(structured_data, warm_start)
     
     # Solve the problem
-    print("Solving the scheduling problem...")
-    solver = pulp.PULP_CBC_CMD(msg=True, timeLimit=300)  # 5 minute time limit
-    prob.solve(solver)
-    
-    status = pulp.LpStatus[prob.status]
+    if backend == 'pulp':
+        solution = _solve_pulp_model(structured_data, index, formulation, start_schedule, solver_profile,
+                                     previous_schedule, changed_students, aggregate, lexicographic)
+    elif backend == 'matrix':
+        solution = _solve_matrix_model(structured_data, index, formulation, start_schedule, solver_profile,
+                                       aggregate, lazy_rows, lexicographic)
+    else:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    
+    status = solution['status']
     print(f"Solution status: {status}")
     
     if status != 'Optimal':
         print(f"Warning: Could not find optimal solution. Status: {status}")
     
-    objective_value = pulp.value(prob.objective)
+    objective_value = solution['objective']
     print(f"Objective value: {objective_value}")
-    
-    if objective_value is None or objective_value < 1:
+
+    # A time-limited run can stop without any integer solution; the values
+    # read back are then meaningless
+    if changed_students is not None and not solution['has_solution']:
+        print("WARNING: Incremental solve failed, re-solving the full model...")
+        return create_course_schedule(structured_data, formulation, warm_start=previous_schedule,
+                                      solver_profile=solver_profile, backend=backend, aggregate=aggregate,
+                                      lazy_rows=lazy_rows, lexicographic=lexicographic)
+
+    if not solution['has_solution'] or objective_value is None or objective_value < 1:
         print("WARNING: Optimization failed to find a solution with any fulfilled requests.")
         print("Trying a simpler model with fewer constraints...")
         return create_simplified_schedule(structured_data)
@@ -270,37 +154,21 @@ def create_course_schedule(structured_data):
     }
     
     # Extract scheduled courses
-    for course in relevant_courses:
-        course_code = course['code']
-        for block in blocks:
-            for room in rooms:
-                room_id = room['room_number']
-                var_key = (course_code, block, room_id)
-                if var_key in y and pulp.value(y[var_key]) > 0.5:
-                    schedule['course_blocks'][course_code].append(block)
-                    schedule['course_rooms'][course_code][block] = room_id
-                    schedule['room_schedules'][room_id][block] = course_code
+    scheduled = solution['scheduled']
+    if formulation == 'room_class':
+        scheduled = assign_class_rooms(scheduled, solution['room_classes'])
+    
+    for course_code, block, room_id in scheduled:
+        schedule['course_blocks'][course_code].append(block)
+        schedule['course_rooms'][course_code][block] = room_id
+        schedule['room_schedules'][room_id][block] = course_code
     
     # Extract student assignments
-    for student in students:
-        student_id = student['id']
-        for priority in ['required', 'requested', 'recommended']:
-            for course_req in student['requests'][priority]:
-                course_code = course_req['code']
-                for block in blocks:
-                    var_key = (student_id, course_code, block)
-                    if var_key in x and pulp.value(x[var_key]) > 0.5:
-                        schedule['student_schedules'][student_id][block] = course_code
+    for student_id, course_code, block in solution['assigned']:
+        schedule['student_schedules'][student_id][block] = course_code
     
     # Assign lecturers based on their course assignments
-    for lecturer in lecturers:
-        lecturer_id = lecturer['id']
-        lecturer_courses = [course['code'] for course in lecturer['courses']]
-        
-        for course_code in lecturer_courses:
-            if course_code in schedule['course_blocks']:
-                for block in schedule['course_blocks'][course_code]:
-                    schedule['lecturer_schedules'][lecturer_id][block] = course_code
+    assign_lecturer_schedules(schedule, lecturers)
     
     # Print summary
     print(f"Schedule created with {len(schedule['course_blocks'])} courses scheduled")
@@ -310,6 +178,118 @@ def create_course_schedule(structured_data):
     
     return schedule
 
+def _solve_pulp_model(structured_data, index, formulation, start_schedule, solver_profile,
+                      previous_schedule=None, changed_students=None, aggregate=False, lexicographic=False):
+    """
+    Build the model with PuLP expressions and solve it through PuLP, fixing
+    everything outside the changed students' neighborhood for incremental solves
+    """
+    model = build_schedule_model(structured_data, index, formulation, aggregate)
+    prob, x, y = model['prob'], model['x'], model['y']
+    
+    if start_schedule is not None:
+        fulfilled = apply_warm_start(model, structured_data, index, start_schedule)
+        print(f"MIP start set with {fulfilled} fulfilled requests")
+    
+    if changed_students is not None:
+        fix_outside_neighborhood(model, structured_data, index, previous_schedule, changed_students)
+    
+    variables = prob.variables()
+    start_values = [var.varValue for var in variables] if start_schedule is not None else None
+    
+    print("Solving the scheduling problem...")
+    if lexicographic:
+        staged = solve_pulp_lexicographic(model, index, solver_profile, warm_start=start_schedule is not None)
+        has_solution, status = staged['has_solution'], staged['status']
+    else:
+        solver = create_solver(solver_profile, warm_start=start_schedule is not None)
+        prob.solve(solver)
+        has_solution = prob.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+        status = pulp.LpStatus[prob.status]
+    
+    if not has_solution:
+        # As in solve_matrix_model: CBC can stop without an integer solution
+        # (e.g. "Pre-processing says infeasible" under a short time limit), so
+        # keep its values or the MIP start once they check out against the model
+        if prob.valid(1e-6):
+            print(f"CBC reported '{status}' but its solution is feasible, keeping it")
+            has_solution = True
+        elif start_values is not None:
+            for var, value in zip(variables, start_values):
+                var.varValue = value
+            if prob.valid(1e-6):
+                print(f"CBC reported '{status}' without a solution, keeping the MIP start")
+                has_solution = True
+    
+    solution = {
+        'status': status,
+        'has_solution': has_solution,
+        'objective': pulp.value(prob.objective),
+        'room_classes': model['room_classes'],
+        'scheduled': [],
+        'assigned': [],
+    }
+    if not has_solution:
+        return solution
+    
+    solution['scheduled'] = selected_keys(y)
+    if model['groups'] is None:
+        solution['assigned'] = selected_keys(x)
+    else:
+        solution['assigned'] = disaggregate(model['groups'], selected_counts(x))
+    
+    return solution
+
+def _solve_matrix_model(structured_data, index, formulation, start_schedule, solver_profile, aggregate=False,
+                        lazy_rows=False, lexicographic=False):
+    """Build the model as COO arrays, write it as MPS and solve it with CBC directly"""
+    model = build_matrix_model(structured_data, index, formulation, aggregate, lazy_rows)
+    
+    start = None
+    if start_schedule is not None:
+        start = start_vector(model, structured_data, index, start_schedule)
+        print(f"MIP start set with {int(start[:model['num_x']].sum())} fulfilled requests")
+    
+    print("Solving the scheduling problem...")
+    solver_profile = solver_profile or DEFAULT_SOLVER_PROFILE
+    print(f"Using solver profile '{solver_profile}': {get_solver_profile(solver_profile)}")
+    if lazy_rows:
+        result = solve_lazy_matrix_model(model, solver_profile, start=start)
+    elif lexicographic:
+        result = solve_matrix_lexicographic(model, solver_profile, start=start)
+    else:
+        result = solve_matrix_model(model, solver_profile, start=start)
+    
+    solution = {
+        'status': result['status'],
+        'has_solution': result['has_solution'],
+        'objective': result['objective'],
+        'room_classes': model['room_classes'],
+        'scheduled': [],
+        'assigned': [],
+    }
+    if result['has_solution']:
+        solution['scheduled'], solution['assigned'] = extract_matrix_solution(model, result['values'])
+    
+    return solution
+
+def create_solver(solver_profile=None, warm_start=False):
+    """Create a CBC solver configured from a named solver profile"""
+    solver_profile = solver_profile or DEFAULT_SOLVER_PROFILE
+    options = get_solver_profile(solver_profile)
+    print(f"Using solver profile '{solver_profile}': {options}")
+    return pulp.PULP_CBC_CMD(msg=True, warmStart=warm_start, **options)
+
+def _warm_start_schedule(structured_data, warm_start):
+    """Resolve the warm_start option of create_course_schedule to a schedule"""
+    if warm_start == 'greedy':
+        return greedy_schedule(structured_data)
+    if warm_start == 'simplified':
+        return create_simplified_schedule(structured_data)
+    if isinstance(warm_start, dict):
+        return warm_start
+    raise ValueError(f"Unknown warm start '{warm_start}', expected 'greedy', 'simplified' or a schedule")
+
 def create_simplified_schedule(structured_data):
     """Create a simplified schedule when the full optimization fails"""
     print("Creating simplified schedule with direct assignments...")
@@ -408,6 +388,16 @@ def create_simplified_schedule(structured_data):
                             break
     
     # Assign lecturers to their courses
+    assign_lecturer_schedules(schedule, lecturers)
+    
+    # Print summary
+    print(f"Simplified schedule created with {len(schedule['course_blocks'])} courses scheduled")
+    print(f"Student schedules created for {len(schedule['student_schedules'])} students")
+    
+    return schedule
+
+def assign_lecturer_schedules(schedule, lecturers):
+    """Fill lecturer_schedules from the blocks of the courses each lecturer teaches"""
     for lecturer in lecturers:
         lecturer_id = lecturer['id']
         lecturer_courses = [course['code'] for course in lecturer['courses']]
@@ -416,12 +406,6 @@ def create_simplified_schedule(structured_data):
             if course_code in schedule['course_blocks']:
                 for block in schedule['course_blocks'][course_code]:
                     schedule['lecturer_schedules'][lecturer_id][block] = course_code
-    
-    # Print summary
-    print(f"Simplified schedule created with {len(schedule['course_blocks'])} courses scheduled")
-    print(f"Student schedules created for {len(schedule['student_schedules'])} students")
-    
-    return schedule
 
 def default_empty_schedule():
     """Return an empty schedule structure when optimization fails"""
@@ -0,0 +1,96 @@
+"""
+Multi-seed portfolio of greedy CourseScheduler runs.
+
+The greedy scheduler breaks ties between equally good blocks at random, so the
+quality of a run depends on its seed. A portfolio runs one seeded scheduler per
+seed in a process pool under a shared wall-clock budget, keeps the schedule
+with the highest priority-weighted fulfillment and reports the spread across
+seeds. Any single result can be reproduced by rerunning its seed.
+"""
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from src.scheduling.scheduling.local_search import request_weights, schedule_score
+
+
+def run_portfolio(data, seeds=8, time_limit=None, max_workers=None, **run_options):
+    """
+    Run a seeded CourseScheduler per seed and return the best result.
+
+    seeds is a count (seeds 0 to seeds - 1) or a list of seeds. time_limit
+    (seconds) is shared by the whole portfolio: seeds not started by then are
+    skipped, a local_search_time in run_options is cut to the time left, and
+    the portfolio returns at the limit with the seeds finished so far. Their
+    worker processes finish abandoned runs in the background. With a single
+    worker the seeds run in this process, so a run under way at the limit
+    still finishes.
+    Extra keyword arguments are passed on to run_scheduling.
+
+    Returns a dictionary with the best 'seed', its 'score' and 'results', and
+    the 'scores' of every seed that finished.
+    """
+    seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+    if not seeds:
+        raise ValueError("A portfolio needs at least one seed")
+    deadline = time.time() + time_limit if time_limit is not None else None
+    max_workers = min(max_workers or os.cpu_count() or 1, len(seeds))
+    print(f"Running a portfolio of {len(seeds)} seeds on {max_workers} workers...")
+
+    # Workers get the data as JSON text: it pickles faster than the nested
+    # dictionaries, and decoding shares one NaN object as json.load does, so
+    # NaN course codes still match each other as they do in a single process
+    data_json = json.dumps(data)
+    if max_workers == 1:
+        runs = [_run_seed(data_json, seed, deadline, run_options) for seed in seeds]
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        futures = [executor.submit(_run_seed, data_json, seed, deadline, run_options) for seed in seeds]
+        timeout = max(deadline - time.time(), 0) if deadline is not None else None
+        done, _ = wait(futures, timeout=timeout)
+        # Return at the deadline: queued seeds are cancelled and the results of
+        # runs still going are abandoned
+        executor.shutdown(wait=False, cancel_futures=True)
+        runs = [future.result() for future in futures if future in done]
+
+    runs = [run for run in runs if run is not None]
+    if not runs:
+        print("Warning: No portfolio seed finished within the time limit")
+        return {'seed': None, 'score': None, 'results': None, 'scores': {}}
+
+    scores = {run['seed']: run['score'] for run in runs}
+    best = max(runs, key=lambda run: (run['score'], -seeds.index(run['seed'])))
+    _print_spread(scores, len(seeds), best['seed'])
+    return {'seed': best['seed'], 'score': best['score'], 'results': best['results'], 'scores': scores}
+
+
+def _run_seed(data_json, seed, deadline, run_options):
+    """Run one seeded scheduler, or return None if the budget is already spent"""
+    # Imported here because scheduler_algorithm creates its output folders on import
+    from src.scheduling.scheduler_algorithm import CourseScheduler
+
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        if run_options.get('local_search_time'):
+            run_options = dict(run_options, local_search_time=min(run_options['local_search_time'], remaining))
+
+    scheduler = CourseScheduler(data=json.loads(data_json), seed=seed)
+    results = scheduler.run_scheduling(**run_options)
+    score = schedule_score(scheduler, request_weights(scheduler.students))
+    return {'seed': seed, 'score': score, 'results': results}
+
+
+def _print_spread(scores, num_seeds, best_seed):
+    """Print the per-seed scores and their spread"""
+    values = list(scores.values())
+    print(f"Portfolio: {len(values)} of {num_seeds} seeds finished")
+    for seed, score in scores.items():
+        marker = " (best)" if seed == best_seed else ""
+        print(f"- Seed {seed}: score {score}{marker}")
+    spread = statistics.pstdev(values) if len(values) > 1 else 0.0
+    print(f"Score min {min(values)}, mean {statistics.mean(values):.1f}, max {max(values)}, "
+          f"standard deviation {spread:.1f}")
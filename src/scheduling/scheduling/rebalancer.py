@@ -0,0 +1,98 @@
+"""
+Section size rebalancing for the greedy CourseScheduler (rule 7).
+
+Students of a course should be spread almost equally over its sections. After
+scheduling, students are moved from the largest section of a course to its
+smallest sections, but only into blocks they have free, so no request is lost.
+Each donor section groups its students by the bitmask of blocks they could
+move to, so a compatible student for a receiving section is found by testing
+one bit per group instead of scanning every student.
+"""
+from collections import defaultdict
+
+
+def rebalance_sections(scheduler):
+    """
+    Even out the section sizes of every course with several scheduled sections.
+
+    Returns {course_code: {'before': spread, 'after': spread}}, where the
+    spread is the largest minus the smallest section size.
+    """
+    report = {}
+    moved = 0
+    for course_code, sections in scheduler.course_sections.items():
+        scheduled = [section for section in sections if section.block]
+        if len(scheduled) < 2:
+            continue
+        before = _spread(scheduled)
+        moved += _rebalance_course(scheduler, course_code, scheduled)
+        report[course_code] = {'before': before, 'after': _spread(scheduled)}
+
+    uneven_before = sum(1 for spread in report.values() if spread['before'] > 1)
+    uneven_after = sum(1 for spread in report.values() if spread['after'] > 1)
+    print(f"Rebalancing: moved {moved} students, courses with a spread above 1: {uneven_before} -> {uneven_after}")
+    for course_code, spread in report.items():
+        if spread['before'] != spread['after']:
+            print(f"- {course_code}: spread {spread['before']} -> {spread['after']}")
+    return report
+
+
+def _spread(sections):
+    sizes = [len(section.students) for section in sections]
+    return max(sizes) - min(sizes)
+
+
+def _rebalance_course(scheduler, course_code, sections):
+    """Move students from the largest to the smallest sections until no move narrows the spread"""
+    buckets = {}  # id(section) -> {movable-block mask: [student indices]}
+    stuck = set()  # sections with no student who can move to a smaller section
+    moved = 0
+    while True:
+        sections.sort(key=lambda section: len(section.students))
+        donor = next((section for section in reversed(sections) if id(section) not in stuck), None)
+        if donor is None:
+            break
+        receivers = [section for section in sections if len(section.students) <= len(donor.students) - 2]
+        if not receivers:
+            break
+
+        if id(donor) not in buckets:
+            buckets[id(donor)] = _movable_buckets(scheduler, donor)
+        student_id, receiver = _find_move(scheduler, buckets[id(donor)], receivers)
+        if student_id is None:
+            # Sections only grow as receivers and masks of the donor's students don't change
+            stuck.add(id(donor))
+            continue
+
+        scheduler._unenroll(student_id, course_code)
+        scheduler._enroll(student_id, receiver)
+        stuck.discard(id(receiver))
+        if id(receiver) in buckets:
+            buckets[id(receiver)][_movable_mask(scheduler, student_id, receiver)].append(student_id)
+        moved += 1
+    return moved
+
+
+def _movable_mask(scheduler, student_id, section):
+    """Blocks a student of a section could attend it in instead: their free blocks plus its own"""
+    return ~(scheduler.student_masks[student_id] & ~scheduler.block_bits[section.block])
+
+
+def _movable_buckets(scheduler, section):
+    """Group a section's students by the blocks they could move to"""
+    buckets = defaultdict(list)
+    for student_id in section.students:
+        buckets[_movable_mask(scheduler, student_id, section)].append(student_id)
+    return buckets
+
+
+def _find_move(scheduler, buckets, receivers):
+    """A student in the donor's buckets free for a receiver's block, smallest receiver first"""
+    for receiver in receivers:
+        if len(receiver.students) >= receiver.max_size:
+            continue
+        bit = scheduler.block_bits[receiver.block]
+        for mask, students in buckets.items():
+            if mask & bit and students:
+                return students.pop(), receiver
+    return None, None
@@ -0,0 +1,246 @@
+"""
+Augmenting-path repair of unresolved requests for the greedy CourseScheduler.
+
+Unresolved requests are revisited highest priority first. For each one, a
+bounded depth-first search looks for a short chain of moves that makes room:
+moving the student's clashing course to another of its sections, moving a
+whole section to a block where all of its students are free, or moving a
+classmate to another section of the course to free a seat. As a last resort, a
+chain may bump a request of strictly lower priority. A chain is only kept when
+it raises the weighted number of fulfilled requests; otherwise every move is
+rolled back.
+
+Each request's search expands a search state - placing a student in a course,
+or freeing a student's block, at a given remaining depth - at most once, and
+at most max_nodes states in all; the whole pass stops at its time limit.
+"""
+import time
+
+from src.scheduling.scheduling.local_search import movable_blocks, request_weights, schedule_score
+
+# Most students a section move may displace; each must be freed by a deeper chain
+MAX_SECTION_MOVE_CLASHES = 3
+
+# Search states one request's chain search may expand
+MAX_NODES_PER_REQUEST = 2000
+
+
+def repair_unresolved(scheduler, max_depth=3, time_limit=5.0, max_nodes=MAX_NODES_PER_REQUEST):
+    """
+    Try to fulfil every unresolved request with an augmenting chain of at most
+    max_depth moves, expanding at most max_nodes search states per request.
+    Requests left when time_limit (seconds, None for no limit) runs out are
+    not searched. Returns a summary dictionary.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    weights = request_weights(scheduler.students)
+    initial_score = schedule_score(scheduler, weights)
+
+    unresolved = [
+        (weight, student_id, course_code)
+        for student_id, requests in enumerate(weights)
+        for course_code, weight in requests.items()
+        if course_code in scheduler.course_sections and not _fulfilled(scheduler, student_id, course_code)
+    ]
+    unresolved.sort(key=lambda request: request[0], reverse=True)
+
+    repaired = 0
+    searched = 0
+    for weight, student_id, course_code in unresolved:
+        if deadline is not None and time.perf_counter() > deadline:
+            print(f"Repair: time limit reached after {searched} requests")
+            break
+        searched += 1
+        if _fulfilled(scheduler, student_id, course_code):
+            continue
+        log = []
+        search = {'visited': set(), 'nodes': max_nodes, 'deadline': deadline}
+        lost = _place(scheduler, student_id, course_code, weight, max_depth, weights, log, frozenset(), search)
+        if lost is not None and lost < weight:
+            repaired += 1
+        else:
+            _undo(scheduler, log, 0)
+
+    final_score = schedule_score(scheduler, weights)
+    print(f"Repair: {repaired} of {len(unresolved)} unresolved requests fulfilled, "
+          f"score {initial_score} -> {final_score}")
+    return {'unresolved': len(unresolved), 'searched': searched, 'repaired': repaired,
+            'initial_score': initial_score, 'final_score': final_score}
+
+
+def _fulfilled(scheduler, student_id, course_code):
+    section = scheduler.student_assignments[student_id].get(course_code)
+    return section is not None and section.block is not None
+
+
+def _expand(search, state):
+    """Count a search state against the request's budget; False if it was expanded before or the budget is spent"""
+    if state in search['visited'] or search['nodes'] <= 0:
+        return False
+    if search['deadline'] is not None and time.perf_counter() > search['deadline']:
+        return False
+    search['visited'].add(state)
+    search['nodes'] -= 1
+    return True
+
+
+def _place(scheduler, student_id, course_code, weight, depth, weights, log, blocked, search):
+    """
+    Seat a student in a scheduled section of a course outside the blocked blocks.
+
+    Returns the total weight of requests bumped on the way, or None when no
+    chain was found (moves made are then rolled back).
+    """
+    if not _expand(search, ('place', student_id, course_code, depth)):
+        return None
+    assignment = scheduler.student_assignments[student_id].get(course_code)
+    if assignment is not None:
+        _unenroll(scheduler, student_id, course_code, log)
+
+    sections = [s for s in scheduler.course_sections[course_code] if s.block and s.block not in blocked]
+    sections.sort(key=lambda s: len(s.students))
+    for section in sections:
+        mark = len(log)
+        inner = blocked | {section.block}
+        lost_block = _free_block(scheduler, student_id, section.block, weight, depth, weights, log, inner, search)
+        if lost_block is not None:
+            lost_seat = _free_seat(scheduler, section, student_id, weight, depth, weights, log, inner, search)
+            if lost_seat is not None:
+                _enroll(scheduler, student_id, section, log)
+                return lost_block + lost_seat
+        _undo(scheduler, log, mark)
+
+    # Move a section of the course into a block where the student is free
+    for section in sections:
+        mark = len(log)
+        lost_move = _move_section(scheduler, section, blocked, log, depth, weights, search, student_id)
+        if lost_move is not None:
+            lost_seat = _free_seat(scheduler, section, student_id, weight, depth, weights, log,
+                                   blocked | {section.block}, search)
+            if lost_seat is not None:
+                _enroll(scheduler, student_id, section, log)
+                return lost_move + lost_seat
+        _undo(scheduler, log, mark)
+    return None
+
+
+def _free_block(scheduler, student_id, block, weight, depth, weights, log, blocked, search):
+    """Clear the student's block by relocating the course held there, or bumping it if lower priority"""
+    other = None
+    if scheduler.student_masks[student_id] & scheduler.block_bits[block]:
+        other = next(
+            (code for code, s in scheduler.student_assignments[student_id].items() if s.block == block), None
+        )
+    if other is None:
+        return 0
+    if not _expand(search, ('block', student_id, block, depth)):
+        return None
+
+    other_weight = weights[student_id].get(other, 0)
+    if depth > 0:
+        mark = len(log)
+        lost = _place(scheduler, student_id, other, other_weight, depth - 1, weights, log, blocked, search)
+        if lost is not None:
+            return lost
+        _undo(scheduler, log, mark)
+
+    mark = len(log)
+    lost = _move_section(scheduler, scheduler.student_assignments[student_id][other], blocked, log, depth, weights,
+                         search)
+    if lost is not None:
+        return lost
+    _undo(scheduler, log, mark)
+    if other_weight < weight:
+        _unenroll(scheduler, student_id, other, log)
+        return other_weight
+    return None
+
+
+def _free_seat(scheduler, section, student_id, weight, depth, weights, log, blocked, search):
+    """Open a seat in a full section by moving a classmate to another section, or bumping a lower one"""
+    if len(section.students) < section.max_size:
+        return 0
+
+    course_code = section.course_code
+    classmates = [s for s in section.students if s != student_id]
+    if depth > 0:
+        for classmate in classmates:
+            mark = len(log)
+            lost = _place(scheduler, classmate, course_code, weights[classmate].get(course_code, 0),
+                          depth - 1, weights, log, blocked, search)
+            if lost is not None:
+                return lost
+            _undo(scheduler, log, mark)
+
+    bumpable = [s for s in classmates if weights[s].get(course_code, 0) < weight]
+    if not bumpable:
+        return None
+    classmate = min(bumpable, key=lambda s: weights[s].get(course_code, 0))
+    _unenroll(scheduler, classmate, course_code, log)
+    return weights[classmate].get(course_code, 0)
+
+
+def _move_section(scheduler, section, blocked, log, depth, weights, search, extra_student=None):
+    """
+    Move a section to an unblocked block, freeing that block for each of its
+    students (and extra_student, who must already be free there).
+
+    Blocks with the fewest busy students are tried first; at depth 0 only
+    blocks where everyone is free qualify. A busy student whose block can't be
+    freed leaves the section. Returns the weight lost, or None.
+    """
+    students = list(section.students)
+    course_code = section.course_code
+    candidates = []
+    for block in movable_blocks(scheduler, section):
+        bit = scheduler.block_bits[block]
+        if block in blocked or (extra_student is not None and scheduler.student_masks[extra_student] & bit):
+            continue
+        busy = [s for s in students if scheduler.student_masks[s] & bit]
+        if len(busy) <= (MAX_SECTION_MOVE_CLASHES if depth > 0 else 0):
+            candidates.append((len(busy), block, busy))
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    for _, block, busy in candidates:
+        inner = blocked | {block}
+        lost = 0
+        for student_id in busy:
+            # Earlier steps of the chain may already have moved this student
+            if (scheduler.student_assignments[student_id].get(course_code) is not section
+                    or not scheduler.student_masks[student_id] & scheduler.block_bits[block]):
+                continue
+            weight = weights[student_id].get(course_code, 0)
+            freed = _free_block(scheduler, student_id, block, weight, depth - 1, weights, log, inner, search)
+            if freed is None:
+                # The student stays with their other course and leaves the moved section
+                _unenroll(scheduler, student_id, course_code, log)
+                freed = weight
+            lost += freed
+        log.append(('move', section, section.block))
+        scheduler._set_section_block(section, block)
+        return lost
+    return None
+
+
+def _enroll(scheduler, student_id, section, log):
+    scheduler._enroll(student_id, section)
+    log.append(('enroll', student_id, section))
+
+
+def _unenroll(scheduler, student_id, course_code, log):
+    section = scheduler._unenroll(student_id, course_code)
+    log.append(('unenroll', student_id, section))
+
+
+def _undo(scheduler, log, mark):
+    """Roll back the moves logged after position mark"""
+    while len(log) > mark:
+        action, first, second = log.pop()
+        if action == 'move':
+            scheduler._set_section_block(first, second)
+            continue
+        student_id, section = first, second
+        if action == 'enroll':
+            scheduler._unenroll(student_id, section.course_code)
+        else:
+            scheduler._enroll(student_id, section)
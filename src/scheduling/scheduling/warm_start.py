@@ -0,0 +1,168 @@
+"""
+MIP start construction for the scheduling model.
+
+Converts a heuristic schedule into initial values for the x/y variables so CBC
+begins branch-and-bound with a feasible incumbent instead of starting cold.
+"""
+from collections import Counter, defaultdict
+
+from src.scheduling.scheduling.aggregation import student_groups
+from src.scheduling.scheduling.model_builder import course_block_options, room_seat_limit, section_size_limits
+
+
+def greedy_schedule(structured_data):
+    """Run the greedy CourseScheduler and return its result as a standard schedule"""
+    # Imported here because scheduler_algorithm creates its output folders on import
+    from src.scheduling.scheduler_algorithm import CourseScheduler
+
+    print("Running greedy scheduler for the MIP start...")
+    scheduler = CourseScheduler(data=structured_data)
+    results = scheduler.run_scheduling()
+    return convert_greedy_results(results)
+
+
+def convert_greedy_results(results):
+    """
+    Convert CourseScheduler results into the standard schedule dictionary
+    (course_blocks, course_rooms, student_schedules, room_schedules, lecturer_schedules).
+    """
+    schedule = {
+        'course_blocks': defaultdict(list),
+        'course_rooms': defaultdict(dict),
+        'student_schedules': defaultdict(dict),
+        'room_schedules': defaultdict(dict),
+        'lecturer_schedules': defaultdict(dict)
+    }
+
+    for block, sections in results['schedule'].items():
+        for section in sections:
+            course_code = section['course']
+            if block not in schedule['course_blocks'][course_code]:
+                schedule['course_blocks'][course_code].append(block)
+            if section['room'] is not None:
+                schedule['course_rooms'][course_code][block] = section['room']
+                schedule['room_schedules'][section['room']][block] = course_code
+            if section['lecturer'] is not None:
+                schedule['lecturer_schedules'][section['lecturer']][block] = course_code
+
+    for student_id, student_schedule in results['student_schedules'].items():
+        for block, entry in student_schedule.items():
+            schedule['student_schedules'][student_id][block] = entry['course']
+
+    return schedule
+
+
+def repair_start(structured_data, index, schedule):
+    """
+    Repair a schedule so it satisfies the MIP's size rules.
+
+    Heuristic schedules don't follow those rules exactly, and CBC rejects a
+    start that violates any row. Openings below the section minimum or beyond
+    the course's section count are closed, openings without a usable room get
+    the smallest free room that fits, and students beyond the seat limit are
+    dropped.
+
+    Returns the set of (student_id, course_code, block) assignments kept and a
+    {(course_code, block): room_id} map of the openings kept.
+    """
+    courses = {course['code']: course for course in index['relevant_courses']}
+    blocks = set(structured_data['blocks'])
+    room_capacity = {room['room_number']: room['capacity'] for room in structured_data['rooms']}
+
+    # Students the start places in each opening, limited to requests in the model
+    enrolled = defaultdict(list)
+    for student_id, student_schedule in schedule['student_schedules'].items():
+        requests = index['student_courses'].get(student_id, {})
+        for block, course_code in student_schedule.items():
+            if course_code in requests and block in blocks:
+                enrolled[(course_code, block)].append(student_id)
+
+    # Keep openings in allowed blocks that are large enough to satisfy the minimum section size
+    openings = []
+    for (course_code, block), students in enrolled.items():
+        course = courses[course_code]
+        min_size, _ = section_size_limits(course, len(index['course_students'][course_code]))
+        if (block in schedule['course_blocks'].get(course_code, []) and len(students) >= min_size
+                and block in course_block_options(course, structured_data['blocks'])):
+            openings.append((course_code, block))
+
+    # A course keeps at most its num_sections largest openings
+    openings.sort(key=lambda key: len(enrolled[key]), reverse=True)
+    course_openings = defaultdict(int)
+    kept = []
+    for course_code, block in openings:
+        if course_openings[course_code] < courses[course_code].get('num_sections', 1):
+            course_openings[course_code] += 1
+            kept.append((course_code, block))
+    openings = kept
+
+    # Rooms: keep the scheduled room where possible, otherwise best fit, largest sections first
+    used_rooms = defaultdict(set)  # block -> room_ids
+    rooms_by_capacity = sorted(room_capacity, key=lambda room_id: room_capacity[room_id])
+    opening_rooms = {}
+
+    for course_code, block in openings:
+        room_id = schedule['course_rooms'].get(course_code, {}).get(block)
+        if room_id not in room_capacity or room_id in used_rooms[block]:
+            free_rooms = [r for r in rooms_by_capacity if r not in used_rooms[block]]
+            if not free_rooms:
+                continue
+            size = len(enrolled[(course_code, block)])
+            room_id = next((r for r in free_rooms if room_capacity[r] >= size), free_rooms[-1])
+        used_rooms[block].add(room_id)
+        opening_rooms[(course_code, block)] = room_id
+
+    # Trim every opening to its seat limit
+    assigned = set()
+    for (course_code, block), room_id in list(opening_rooms.items()):
+        course = courses[course_code]
+        min_size, max_size = section_size_limits(course, len(index['course_students'][course_code]))
+        seats = min(max_size, room_seat_limit(room_capacity[room_id]))
+        students = enrolled[(course_code, block)][:seats]
+        if len(students) < min_size:
+            del opening_rooms[(course_code, block)]
+            continue
+        for student_id in students:
+            assigned.add((student_id, course_code, block))
+
+    return assigned, opening_rooms
+
+
+def room_keys(model, rooms):
+    """Map each room to the key its y variables use: the room itself, or its room class index"""
+    keys = {room['room_number']: room['room_number'] for room in rooms}
+    if model['formulation'] == 'room_class':
+        for class_index, room_class in enumerate(model['room_classes']):
+            for room_id in room_class['rooms']:
+                keys[room_id] = class_index
+    return keys
+
+
+def apply_warm_start(model, structured_data, index, schedule):
+    """
+    Set initial values on every variable of a PuLP model from a schedule.
+
+    The schedule is repaired with repair_start first. Returns the number of
+    fulfilled requests in the start.
+    """
+    assigned, opening_rooms = repair_start(structured_data, index, schedule)
+
+    if model.get('groups') is None:
+        for key, var in model['x'].items():
+            var.setInitialValue(1 if key in assigned else 0)
+    else:
+        # Aggregated x counts the students of each group
+        group_of = student_groups(model['groups'])
+        counts = Counter((group_of[student_id], course_code, block) for student_id, course_code, block in assigned)
+        for key, var in model['x'].items():
+            var.setInitialValue(counts.get(key, 0))
+
+    for key, var in model['is_open'].items():
+        var.setInitialValue(1 if key in opening_rooms else 0)
+
+    room_key = room_keys(model, structured_data['rooms'])
+    for (course_code, block, key), var in model['y'].items():
+        room_id = opening_rooms.get((course_code, block))
+        var.setInitialValue(1 if room_id is not None and room_key[room_id] == key else 0)
+
+    return len(assigned)
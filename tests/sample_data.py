@@ -0,0 +1,137 @@
+"""
+Small, seeded scheduling instances for the tests.
+"""
+import random
+
+from src.scheduling.scheduler_algorithm import CourseScheduler
+
+BLOCKS = ['1A', '1B', '2A', '2B']
+PRIORITIES = ['required', 'requested', 'recommended']
+
+
+def make_course(code, num_sections=1, max_size=6, min_size=4, available_blocks=None):
+    """A course record in the cleaned-data format"""
+    return {
+        'code': code,
+        'title': f"Course {code}",
+        'length': 2,
+        'available_blocks': list(available_blocks or BLOCKS),
+        'unavailable_blocks': [],
+        'min_size': min_size,
+        'target_size': 3,
+        'max_size': max_size,
+        'num_sections': num_sections,
+    }
+
+
+def make_student(student_id, requests):
+    """A student record from {priority: [course_code]}"""
+    return {
+        'id': student_id,
+        'requests': {
+            priority: [{'code': code, 'title': f"Course {code}", 'length': 2} for code in requests.get(priority, [])]
+            for priority in PRIORITIES
+        },
+    }
+
+
+def make_data(num_students=16, num_sections=1, seed=0):
+    """
+    Six courses taught by three lecturers in four blocks and three rooms.
+    Every student requests three courses at random priorities. Course C6 may
+    only use blocks 1A and 2A.
+    """
+    rng = random.Random(seed)
+    codes = [f"C{i}" for i in range(1, 7)]
+    courses = [make_course(code, num_sections=num_sections) for code in codes]
+    courses[-1]['available_blocks'] = ['1A', '2A']
+
+    students = []
+    for i in range(num_students):
+        requests = {priority: [] for priority in PRIORITIES}
+        for code in rng.sample(codes, 3):
+            requests[rng.choice(PRIORITIES)].append(code)
+        students.append(make_student(f"S{i}", requests))
+
+    lecturers = [
+        {'id': f"L{i}", 'courses': [{'code': code} for code in codes[2 * i:2 * i + 2]]}
+        for i in range(3)
+    ]
+    rooms = [
+        {'room_number': '101', 'capacity': 4},
+        {'room_number': '102', 'capacity': 6},
+        {'room_number': '103', 'capacity': 8},
+    ]
+    return {'courses': courses, 'students': students, 'lecturers': lecturers, 'rooms': rooms,
+            'blocks': list(BLOCKS)}
+
+
+def greedy_scheduler(num_sections=2, seed=0, num_students=24):
+    """A CourseScheduler that has run the greedy pass on make_data"""
+    scheduler = CourseScheduler(data=make_data(num_students=num_students, num_sections=num_sections, seed=seed),
+                                seed=seed)
+    scheduler.run_scheduling()
+    return scheduler
+
+
+def scheduler_problems(scheduler):
+    """List every hard-rule violation in a CourseScheduler's current state"""
+    problems = []
+    for student_id, courses in enumerate(scheduler.student_assignments):
+        blocks = [section.block for section in courses.values() if section.block]
+        if len(blocks) != len(set(blocks)):
+            problems.append(f"student {student_id} has two sections in one block")
+        for course_code, section in courses.items():
+            if section.course_code != course_code or student_id not in section.students:
+                problems.append(f"student {student_id} is not in their {course_code} section")
+
+    lecturer_blocks = set()
+    for block in scheduler.blocks:
+        for section in scheduler.schedule[block]:
+            if section.block != block:
+                problems.append(f"{section} is listed in block {block}")
+            if len(section.students) > section.max_size:
+                problems.append(f"{section} is over its maximum size")
+            if len(set(section.students)) != len(section.students):
+                problems.append(f"{section} lists a student twice")
+            if block not in scheduler.mask_blocks(scheduler.course_block_masks[section.course_code]):
+                problems.append(f"{section} is in a block its course may not use")
+            if section.lecturer_id:
+                if (section.lecturer_id, block) in lecturer_blocks:
+                    problems.append(f"lecturer {section.lecturer_id} teaches twice in block {block}")
+                lecturer_blocks.add((section.lecturer_id, block))
+    return problems
+
+
+def schedule_problems(structured_data, schedule):
+    """List every hard-rule violation in a standard schedule dictionary"""
+    problems = []
+    capacity = {room['room_number']: room['capacity'] for room in structured_data['rooms']}
+    courses = {course['code']: course for course in structured_data['courses']}
+    enrolled = {}
+    for student_id, student_schedule in schedule['student_schedules'].items():
+        codes = list(student_schedule.values())
+        if len(codes) != len(set(codes)):
+            problems.append(f"student {student_id} takes a course twice")
+        for block, course_code in student_schedule.items():
+            if block not in schedule['course_blocks'].get(course_code, []):
+                problems.append(f"student {student_id} takes {course_code} in block {block}, which is closed")
+            enrolled[(course_code, block)] = enrolled.get((course_code, block), 0) + 1
+
+    used_rooms = set()
+    for course_code, blocks in schedule['course_blocks'].items():
+        course = courses[course_code]
+        if len(blocks) > course.get('num_sections', 1):
+            problems.append(f"{course_code} opens in more blocks than it has sections")
+        for block in blocks:
+            if block not in course['available_blocks']:
+                problems.append(f"{course_code} opens in block {block}, which it may not use")
+            room_id = schedule['course_rooms'][course_code].get(block)
+            if room_id is None:
+                problems.append(f"{course_code} has no room in block {block}")
+            elif (room_id, block) in used_rooms:
+                problems.append(f"room {room_id} hosts two courses in block {block}")
+            elif enrolled.get((course_code, block), 0) > max(capacity[room_id], 5):
+                problems.append(f"{course_code} in block {block} is over the capacity of room {room_id}")
+            used_rooms.add((room_id, block))
+    return problems
@@ -0,0 +1,90 @@
+import random
+import unittest
+from collections import Counter
+
+import pulp
+
+from src.scheduling.scheduling.aggregation import _color_edges, disaggregate, group_students, selected_counts
+from src.scheduling.scheduling.model_builder import build_request_index
+from tests.sample_data import make_data, make_student
+
+
+def random_schedules(rng, num_students, courses, blocks):
+    """Random per-student schedules, as (student, course, block) triples"""
+    assigned = []
+    for student in range(num_students):
+        student_blocks = rng.sample(blocks, rng.randint(0, len(blocks)))
+        student_courses = rng.sample(courses, min(len(student_blocks), len(courses)))
+        assigned.extend((student, course, block) for course, block in zip(student_courses, student_blocks))
+    return assigned
+
+
+class ColorEdgesTest(unittest.TestCase):
+    def test_colors_are_valid_schedules(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            num_students = rng.randint(1, 6)
+            courses = [f"C{i}" for i in range(rng.randint(1, 8))]
+            blocks = [f"B{i}" for i in range(rng.randint(1, 7))]
+            edges = [(course, block) for _, course, block in
+                     random_schedules(rng, num_students, courses, blocks)]
+            rng.shuffle(edges)
+
+            colored = _color_edges(edges, num_students)
+            self.assertEqual(Counter((course, block) for course, block, _ in colored), Counter(edges))
+            self.assertTrue(all(0 <= color < num_students for _, _, color in colored))
+            self.assertLessEqual(max(Counter((c, color) for c, _, color in colored).values(), default=1), 1)
+            self.assertLessEqual(max(Counter((b, color) for _, b, color in colored).values(), default=1), 1)
+
+    def test_rejects_more_edges_than_colors(self):
+        with self.assertRaises(ValueError):
+            _color_edges([('C1', '1A'), ('C1', '1B')], 1)
+        with self.assertRaises(ValueError):
+            _color_edges([('C1', '1A'), ('C2', '1A')], 1)
+
+
+class DisaggregateTest(unittest.TestCase):
+    def test_preserves_group_counts(self):
+        rng = random.Random(1)
+        for _ in range(100):
+            num_students = rng.randint(1, 5)
+            counts = Counter(
+                (0, course, block) for _, course, block in
+                random_schedules(rng, num_students, ['C1', 'C2', 'C3'], ['1A', '1B', '2A', '2B'])
+            )
+            groups = [{'students': [f"S{i}" for i in range(num_students)], 'requests': {}}]
+
+            assigned = disaggregate(groups, dict(counts))
+            self.assertEqual(Counter((0, course, block) for _, course, block in assigned), counts)
+            self.assertLessEqual(max(Counter((s, b) for s, _, b in assigned).values(), default=1), 1)
+            self.assertLessEqual(max(Counter((s, c) for s, c, _ in assigned).values(), default=1), 1)
+
+
+class GroupStudentsTest(unittest.TestCase):
+    def test_groups_identical_requests(self):
+        data = make_data(num_students=0)
+        data['students'] = [
+            make_student('S0', {'required': ['C1'], 'requested': ['C2']}),
+            make_student('S1', {'required': ['C3']}),
+            make_student('S2', {'requested': ['C2'], 'required': ['C1']}),
+            make_student('S3', {'requested': ['C1', 'C2']}),
+        ]
+        groups = group_students(build_request_index(data))
+        self.assertEqual([group['students'] for group in groups], [['S0', 'S2'], ['S1'], ['S3']])
+        self.assertEqual(groups[0]['requests'], {'C1': 'required', 'C2': 'requested'})
+
+    def test_every_student_is_in_one_group(self):
+        index = build_request_index(make_data(num_students=40))
+        groups = group_students(index)
+        students = [student_id for group in groups for student_id in group['students']]
+        self.assertEqual(sorted(students), sorted(index['student_courses']))
+
+    def test_selected_counts_rounds_positive_values(self):
+        variables = {key: pulp.LpVariable(f"v{key}", 0, 3, cat='Integer') for key in range(4)}
+        for var, value in zip(variables.values(), [0.0, 1.0000001, None, 2.9999998]):
+            var.varValue = value
+        self.assertEqual(selected_counts(variables), {1: 1, 3: 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
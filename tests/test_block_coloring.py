@@ -0,0 +1,69 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from src.scheduling.scheduler_algorithm import CourseScheduler
+from src.scheduling.scheduling.block_coloring import SectionConflicts, build_conflict_matrix, color_blocks
+from src.scheduling.scheduling.local_search import request_weights
+from tests.sample_data import make_data, scheduler_problems
+
+
+def prepared_scheduler(num_sections=2, seed=0):
+    scheduler = CourseScheduler(data=make_data(num_students=24, num_sections=num_sections, seed=seed), seed=seed)
+    scheduler.create_course_sections()
+    scheduler.assign_lecturers_to_sections()
+    return scheduler
+
+
+class ConflictMatrixTest(unittest.TestCase):
+    def test_matches_pairwise_request_weights(self):
+        scheduler = prepared_scheduler()
+        conflicts, course_index = build_conflict_matrix(scheduler)
+        expected = np.zeros_like(conflicts)
+        for requests in request_weights(scheduler.students):
+            for a, b in itertools.product(requests, repeat=2):
+                weight = requests[a] if a == b else min(requests[a], requests[b])
+                expected[course_index[a], course_index[b]] += weight
+        np.testing.assert_allclose(conflicts, expected)
+
+    def test_total_counts_each_section_pair_once(self):
+        scheduler = prepared_scheduler()
+        sections = [section for code in scheduler.course_sections for section in scheduler.course_sections[code]]
+        weights = SectionConflicts(sections, *build_conflict_matrix(scheduler))
+        colors = np.arange(len(sections)) % len(scheduler.blocks)
+        expected = sum(weights.column(i)[j] for i, j in itertools.combinations(range(len(sections)), 2)
+                       if colors[i] == colors[j])
+        self.assertAlmostEqual(weights.total(colors, len(scheduler.blocks)), expected)
+
+
+class ColorBlocksTest(unittest.TestCase):
+    def test_coloring_keeps_hard_rules(self):
+        for seed in range(3):
+            scheduler = prepared_scheduler(seed=seed)
+            summary = color_blocks(scheduler)
+            self.assertEqual(summary['unscheduled'], 0)
+            self.assertEqual(scheduler_problems(scheduler), [])
+            for block in scheduler.blocks:
+                self.assertLessEqual(len(scheduler.schedule[block]), len(scheduler.rooms))
+
+    def test_kempe_swaps_never_raise_the_conflict(self):
+        swaps = 0
+        for seed in range(3):
+            summary = color_blocks(prepared_scheduler(seed=seed))
+            swaps += summary['swaps']
+            self.assertLessEqual(summary['final_conflict'], summary['initial_conflict'] + 1e-9)
+            unimproved = color_blocks(prepared_scheduler(seed=seed), max_passes=0)
+            self.assertEqual(unimproved['swaps'], 0)
+            self.assertAlmostEqual(unimproved['initial_conflict'], summary['initial_conflict'])
+        # At least one of the instances needs a swap
+        self.assertGreater(swaps, 0)
+
+    def test_students_fit_the_coloring(self):
+        scheduler = CourseScheduler(data=make_data(num_students=24, num_sections=2), seed=0)
+        scheduler.run_scheduling(block_plan='coloring', flow_assignment=True)
+        self.assertEqual(scheduler_problems(scheduler), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+
+from src.scheduling.config import DEFAULT_SOLVER_PROFILE, SOLVER_PROFILES, get_solver_profile
+
+
+class SolverProfileTest(unittest.TestCase):
+    def test_default_profile_is_used_without_a_name(self):
+        self.assertEqual(get_solver_profile(), SOLVER_PROFILES[DEFAULT_SOLVER_PROFILE])
+
+    def test_returns_a_copy(self):
+        profile = get_solver_profile('draft')
+        profile['timeLimit'] = 1
+        self.assertEqual(get_solver_profile('draft')['timeLimit'], SOLVER_PROFILES['draft']['timeLimit'])
+
+    def test_unknown_profile_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_solver_profile('fast')
+
+
+if __name__ == '__main__':
+    unittest.main()
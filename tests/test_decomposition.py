@@ -0,0 +1,59 @@
+import unittest
+
+from src.scheduling.scheduling.decomposition import (
+    allocate_room_budget,
+    find_request_components,
+    group_components,
+)
+from src.scheduling.scheduling.model_builder import build_request_index
+from tests.sample_data import make_data, make_student
+
+
+def two_component_data():
+    data = make_data(num_students=0)
+    data['students'] = [
+        make_student('S0', {'required': ['C1'], 'requested': ['C2']}),
+        make_student('S1', {'requested': ['C2', 'C3']}),
+        make_student('S2', {'recommended': ['C4']}),
+        make_student('S3', {'required': ['C5'], 'recommended': ['C4']}),
+        make_student('S4', {'required': ['C1']}),
+    ]
+    return data
+
+
+class ComponentsTest(unittest.TestCase):
+    def test_components_follow_shared_requests(self):
+        components = find_request_components(build_request_index(two_component_data()))
+        self.assertEqual([sorted(c['courses']) for c in components], [['C1', 'C2', 'C3'], ['C4', 'C5']])
+        self.assertEqual([sorted(c['students']) for c in components], [['S0', 'S1', 'S4'], ['S2', 'S3']])
+
+    def test_components_partition_students_and_courses(self):
+        index = build_request_index(make_data(num_students=12, seed=3))
+        components = find_request_components(index)
+        courses = [code for c in components for code in c['courses']]
+        students = [student_id for c in components for student_id in c['students']]
+        self.assertEqual(sorted(courses), sorted(index['course_students']))
+        self.assertEqual(sorted(students), sorted(index['student_courses']))
+
+    def test_group_components_merges_smallest(self):
+        components = [{'courses': [f"C{i}"], 'students': ['S'] * size} for i, size in enumerate([5, 3, 2, 1])]
+        groups = group_components(components, 2)
+        self.assertEqual(sorted(len(group['students']) for group in groups), [5, 6])
+        self.assertEqual(sorted(code for group in groups for code in group['courses']), ['C0', 'C1', 'C2', 'C3'])
+
+
+class RoomBudgetTest(unittest.TestCase):
+    def test_every_group_gets_a_room(self):
+        index = build_request_index(two_component_data())
+        groups = find_request_components(index)
+        rooms = [{'room_number': str(i), 'capacity': 10 * i} for i in range(1, 6)]
+        allocation = allocate_room_budget(groups, index, rooms)
+
+        self.assertEqual(sorted(r['room_number'] for group in allocation for r in group),
+                         [r['room_number'] for r in rooms])
+        self.assertTrue(all(allocation))
+        self.assertGreater(len(allocation[0]), len(allocation[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
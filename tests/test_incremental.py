@@ -0,0 +1,123 @@
+import copy
+import unittest
+
+from src.scheduling.scheduling.incremental import (
+    apply_request_delta,
+    find_neighborhood,
+    fix_outside_neighborhood,
+    repair_changes,
+)
+from src.scheduling.scheduling.model_builder import build_request_index, build_schedule_model
+from src.scheduling.scheduling.optimizer import create_course_schedule
+from src.scheduling.scheduling.warm_start import repair_start
+from tests.sample_data import make_data, make_student, schedule_problems
+
+
+def sample_data():
+    data = make_data(num_students=0)
+    data['students'] = [
+        make_student('S0', {'required': ['C1'], 'requested': ['C2']}),
+        make_student('S1', {'recommended': ['C3']}),
+        make_student('S2', {'requested': ['C4']}),
+    ]
+    return data
+
+
+def requested_codes(data, student_id):
+    student = next(student for student in data['students'] if student['id'] == student_id)
+    return {priority: [req['code'] for req in reqs] for priority, reqs in student['requests'].items()}
+
+
+class ApplyRequestDeltaTest(unittest.TestCase):
+    delta = {
+        'add': [{'student_id': 'S1', 'code': 'C5', 'priority': 'required'}],
+        'drop': [{'student_id': 'S0', 'code': 'C2'}],
+    }
+
+    def test_applies_adds_and_drops_to_a_copy(self):
+        data = sample_data()
+        original = copy.deepcopy(data)
+        updated, changed = apply_request_delta(data, self.delta)
+
+        self.assertEqual(data, original)
+        self.assertEqual(changed, {'S0', 'S1'})
+        self.assertEqual(requested_codes(updated, 'S0'), {'required': ['C1'], 'requested': [], 'recommended': []})
+        self.assertEqual(requested_codes(updated, 'S1'), {'required': ['C5'], 'requested': [], 'recommended': ['C3']})
+        self.assertEqual(requested_codes(updated, 'S2'), requested_codes(data, 'S2'))
+
+    def test_applying_twice_is_harmless(self):
+        once, _ = apply_request_delta(sample_data(), self.delta)
+        twice, changed = apply_request_delta(once, self.delta)
+        self.assertEqual(twice, once)
+        self.assertEqual(changed, {'S0', 'S1'})
+
+    def test_existing_request_keeps_its_priority(self):
+        delta = {'add': [{'student_id': 'S0', 'code': 'C1', 'priority': 'recommended'}]}
+        updated, changed = apply_request_delta(sample_data(), delta)
+        self.assertEqual(requested_codes(updated, 'S0')['required'], ['C1'])
+        self.assertEqual(requested_codes(updated, 'S0')['recommended'], [])
+        self.assertEqual(changed, {'S0'})
+
+    def test_unknown_student_and_course_are_skipped(self):
+        delta = {'add': [{'student_id': 'S9', 'code': 'C1'}, {'student_id': 'S2', 'code': 'X1'}],
+                 'drop': [{'student_id': 'S9', 'code': 'C1'}]}
+        updated, changed = apply_request_delta(sample_data(), delta)
+        self.assertEqual(updated, sample_data())
+        self.assertEqual(changed, set())
+
+    def test_unknown_priority_raises(self):
+        with self.assertRaises(ValueError):
+            apply_request_delta(sample_data(), {'add': [{'student_id': 'S0', 'code': 'C5', 'priority': 'urgent'}]})
+
+
+class FindNeighborhoodTest(unittest.TestCase):
+    def test_includes_new_and_previous_courses(self):
+        updated, changed = apply_request_delta(sample_data(), ApplyRequestDeltaTest.delta)
+        previous = {'student_schedules': {'S0': {'1A': 'C1', '1B': 'C2'}, 'S1': {'2A': 'C3'}, 'S2': {'1A': 'C4'}}}
+        neighborhood = find_neighborhood(build_request_index(updated), previous, changed)
+        self.assertEqual(neighborhood, {'C1', 'C2', 'C3', 'C5'})
+
+
+class FixOutsideNeighborhoodTest(unittest.TestCase):
+    """C1 has one section, but the previous schedule opened it twice"""
+    delta = {'add': [{'student_id': 'S4', 'code': 'C3'}]}
+
+    def setUp(self):
+        self.data = make_data(num_students=0)
+        self.data['students'] = ([make_student(f"S{i}", {'required': ['C1']}) for i in range(3)]
+                                 + [make_student('S3', {'required': ['C1'], 'requested': ['C2']}),
+                                    make_student('S4', {'requested': ['C2']})])
+        self.previous = {
+            'course_blocks': {'C1': ['1A', '1B'], 'C2': ['2A']},
+            'course_rooms': {'C1': {'1A': '101', '1B': '102'}, 'C2': {'2A': '103'}},
+            'student_schedules': {'S0': {'1A': 'C1'}, 'S1': {'1A': 'C1'}, 'S2': {'1A': 'C1'},
+                                  'S3': {'1B': 'C1', '2A': 'C2'}, 'S4': {'2A': 'C2'}},
+        }
+
+    def test_students_moved_by_the_repair_are_freed(self):
+        data, changed = apply_request_delta(self.data, self.delta)
+        index = build_request_index(data)
+        assigned, _ = repair_start(data, index, self.previous)
+        self.assertEqual(repair_changes(index, self.previous, assigned), {'S3'})
+
+        model = build_schedule_model(data, index)
+        fix_outside_neighborhood(model, data, index, self.previous, changed)
+        bounds = {key: (var.lowBound, var.upBound) for key, var in model['x'].items()}
+        self.assertEqual([bounds[(f"S{i}", 'C1', '1A')] for i in range(3)], [(1, 1)] * 3)
+        self.assertEqual(bounds[('S0', 'C1', '1B')], (0, 0))
+        self.assertEqual(bounds[('S3', 'C1', '1A')], (0, 1))
+        opening = model['is_open'][('C2', '2A')]
+        self.assertEqual((opening.lowBound, opening.upBound), (0, 1))
+
+    def test_untouched_students_keep_their_schedules(self):
+        schedule = create_course_schedule(self.data, previous_schedule=self.previous, request_delta=self.delta,
+                                          solver_profile='draft')
+        data, _ = apply_request_delta(self.data, self.delta)
+        self.assertEqual(schedule_problems(data, schedule), [])
+        for student_id in ['S0', 'S1', 'S2']:
+            self.assertEqual(schedule['student_schedules'][student_id], {'1A': 'C1'})
+        self.assertEqual(schedule['student_schedules']['S3']['1A'], 'C1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import time
+import unittest
+
+from src.scheduling.scheduling.lexicographic import _stage_time_limit
+from src.scheduling.scheduling.model_builder import PRIORITIES
+from src.scheduling.scheduling.optimizer import create_course_schedule
+from tests.sample_data import make_course, make_student, schedule_problems
+
+
+def one_room_data():
+    """
+    One block and one room, so only one of C1 and C2 can run. One student
+    requires C1 and three students request C2, which outweighs it (3 x 5 > 10).
+    """
+    return {
+        'courses': [make_course('C1', min_size=1, available_blocks=['1A']),
+                    make_course('C2', min_size=1, available_blocks=['1A'])],
+        'students': [make_student('S0', {'required': ['C1']})]
+                    + [make_student(f"S{i}", {'requested': ['C2']}) for i in range(1, 4)],
+        'lecturers': [{'id': 'L0', 'courses': [{'code': 'C1'}]}, {'id': 'L1', 'courses': [{'code': 'C2'}]}],
+        'rooms': [{'room_number': '101', 'capacity': 6}],
+        'blocks': ['1A'],
+    }
+
+
+class LexicographicSolveTest(unittest.TestCase):
+    def solve(self, **options):
+        data = one_room_data()
+        schedule = create_course_schedule(data, solver_profile='draft', **options)
+        self.assertEqual(schedule_problems(data, schedule), [])
+        return dict(schedule['student_schedules'])
+
+    def test_weighted_objective_prefers_more_requests(self):
+        for backend in ('pulp', 'matrix'):
+            with self.subTest(backend=backend):
+                self.assertEqual(self.solve(backend=backend),
+                                 {f"S{i}": {'1A': 'C2'} for i in range(1, 4)})
+
+    def test_required_requests_come_first(self):
+        for backend in ('pulp', 'matrix'):
+            with self.subTest(backend=backend):
+                self.assertEqual(self.solve(backend=backend, lexicographic=True), {'S0': {'1A': 'C1'}})
+
+    def test_aggregated_model(self):
+        self.assertEqual(self.solve(aggregate=True, lexicographic=True), {'S0': {'1A': 'C1'}})
+
+    def test_requested_stage_gets_the_largest_share_of_time(self):
+        deadline = time.perf_counter() + 40
+        self.assertAlmostEqual(_stage_time_limit(deadline, PRIORITIES), 10, delta=0.5)
+        self.assertAlmostEqual(_stage_time_limit(deadline, PRIORITIES[1:]), 40 * 2 / 3, delta=0.5)
+        self.assertAlmostEqual(_stage_time_limit(deadline, PRIORITIES[2:]), 40, delta=0.5)
+        self.assertIsNone(_stage_time_limit(None, PRIORITIES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+
+from src.scheduling.scheduling.local_search import improve_schedule, request_weights, schedule_score
+from tests.sample_data import greedy_scheduler, scheduler_problems
+
+
+class LocalSearchTest(unittest.TestCase):
+    def test_keeps_the_best_schedule_seen(self):
+        for seed in range(3):
+            scheduler = greedy_scheduler(seed=seed)
+            weights = request_weights(scheduler.students)
+            before = schedule_score(scheduler, weights)
+            improve_schedule(scheduler, time_limit=0.2, seed=seed)
+            self.assertGreaterEqual(schedule_score(scheduler, weights), before)
+            self.assertEqual(scheduler_problems(scheduler), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.scheduling.scheduling.matrix_model import (
+    add_lazy_rows,
+    build_matrix_model,
+    check_solution,
+    extract_matrix_solution,
+    find_violated_rows,
+    parse_status_line,
+    start_vector,
+    write_mps,
+)
+from src.scheduling.scheduling.model_builder import build_request_index, build_schedule_model
+from src.scheduling.scheduling.warm_start import greedy_schedule, repair_start
+from tests.sample_data import make_data
+
+
+def student_block_clashes(model, values):
+    """
+    Columns that would enroll a student in a second course in a block they
+    already use, in an opening that is open
+    """
+    num_x = model['num_x']
+    x_student = model['request_student'][model['x_request']]
+    x_opening = model['opening_position'][model['request_course'][model['x_request']], model['x_block']]
+    opening_open = values[num_x + model['num_y']:]
+    x_values = values[:num_x]
+    for col in np.flatnonzero((x_values == 0) & (opening_open[x_opening] == 1)):
+        same_block = (x_student == x_student[col]) & (model['x_block'] == model['x_block'][col])
+        if (x_values[same_block] > 0).any():
+            yield col
+
+
+class MatrixModelTest(unittest.TestCase):
+    def setUp(self):
+        self.data = make_data(num_students=40, num_sections=2)
+        self.index = build_request_index(self.data)
+        self.start = greedy_schedule(self.data)
+
+    def test_columns_match_the_pulp_model(self):
+        for formulation in ['room', 'room_class']:
+            for aggregate in [False, True]:
+                matrix = build_matrix_model(self.data, self.index, formulation, aggregate)
+                pulp_model = build_schedule_model(self.data, self.index, formulation, aggregate)
+                self.assertEqual(matrix['num_x'], len(pulp_model['x']))
+                self.assertEqual(matrix['num_y'], len(pulp_model['y']))
+                self.assertEqual(matrix['num_columns'] - matrix['num_x'] - matrix['num_y'],
+                                 len(pulp_model['is_open']))
+
+    def test_start_vector_is_feasible_and_maps_back(self):
+        for formulation in ['room', 'room_class']:
+            model = build_matrix_model(self.data, self.index, formulation)
+            values = start_vector(model, self.data, self.index, self.start)
+            self.assertTrue(check_solution(model, values))
+            assigned, opening_rooms = repair_start(self.data, self.index, self.start)
+            scheduled, solution_assigned = extract_matrix_solution(model, values)
+            self.assertEqual(set(solution_assigned), assigned)
+            self.assertEqual({(course_code, block) for course_code, block, _ in scheduled}, set(opening_rooms))
+
+    def test_check_solution_rejects_violations(self):
+        model = build_matrix_model(self.data, self.index)
+        values = start_vector(model, self.data, self.index, self.start)
+        fractional = values.copy()
+        fractional[np.flatnonzero(values[:model['num_x']])[0]] = 0.5
+        self.assertFalse(check_solution(model, fractional))
+        clash = values.copy()
+        clash[next(student_block_clashes(model, values))] = 1
+        self.assertFalse(check_solution(model, clash))
+
+    def test_writes_one_mps_column_entry_per_nonzero(self):
+        model = build_matrix_model(self.data, self.index)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'schedule.mps')
+            write_mps(model, file_path)
+            with open(file_path) as f:
+                lines = f.read().split('\n')
+        columns = lines[lines.index('COLUMNS') + 1:lines.index('RHS')]
+        entries = [line for line in columns if 'MARKER' not in line]
+        self.assertEqual(len(entries), len(model['values']) + np.count_nonzero(model['objective']))
+
+
+class StatusLineTest(unittest.TestCase):
+    def test_reads_every_cbc_status(self):
+        cases = {
+            "Optimal - objective value 5126.00000000": ('Optimal', True, 5126.0),
+            "Stopped on time - objective value 5080.00000000": ('Stopped', True, 5080.0),
+            "Stopped on iterations - objective value 57597.00000000": ('Stopped', True, 57597.0),
+            "Stopped on time (no integer solution - continuous used) - objective value 6000.5":
+                ('Stopped', False, 6000.5),
+            "Integer infeasible - objective value 5871.00000000": ('Integer', False, 5871.0),
+            "Infeasible - objective value 0.00000000": ('Infeasible', False, 0.0),
+            "Unbounded": ('Unbounded', False, None),
+            "": ('Undefined', False, None),
+        }
+        for line, expected in cases.items():
+            self.assertEqual(parse_status_line(line + "\n"), expected, line)
+
+
+class LazyRowsTest(unittest.TestCase):
+    def setUp(self):
+        self.data = make_data(num_students=40, num_sections=2)
+        self.index = build_request_index(self.data)
+
+    def test_lazy_model_leaves_out_the_rows_and_can_add_them_all(self):
+        full = build_matrix_model(self.data, self.index)
+        lazy = build_matrix_model(self.data, self.index, lazy_rows=True)
+        pending = sum(int(mask.sum()) for mask in lazy['pending'].values())
+        self.assertEqual(len(lazy['senses']) + pending, len(full['senses']))
+
+        added = add_lazy_rows(lazy, {family: mask.copy() for family, mask in lazy['pending'].items()})
+        self.assertEqual(added, pending)
+        self.assertEqual(len(lazy['senses']), len(full['senses']))
+        self.assertFalse(any(mask.any() for mask in lazy['pending'].values()))
+
+    def test_finds_and_adds_only_violated_rows(self):
+        lazy = build_matrix_model(self.data, self.index, lazy_rows=True)
+        values = start_vector(lazy, self.data, self.index, greedy_schedule(self.data))
+        self.assertFalse(any(mask.any() for mask in find_violated_rows(lazy, values).values()))
+
+        # A clash in an opening with a free seat only breaks a student-block row
+        for col in student_block_clashes(lazy, values):
+            values[col] = 1
+            violated = find_violated_rows(lazy, values)
+            if not violated['capacity'].any():
+                break
+            values[col] = 0
+        self.assertEqual(int(violated['student_block'].sum()), 1)
+        self.assertFalse(violated['capacity'].any())
+        # The clash passes the rows in the model until its row is added
+        self.assertTrue(check_solution(lazy, values))
+        self.assertEqual(add_lazy_rows(lazy, violated), 1)
+        self.assertFalse(check_solution(lazy, values))
+        self.assertFalse(find_violated_rows(lazy, values)['student_block'].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import itertools
+import random
+import unittest
+
+from src.scheduling.scheduler_algorithm import CourseScheduler
+from src.scheduling.scheduling.local_search import request_weights, schedule_score
+from src.scheduling.scheduling.min_cost_flow import MinCostFlow, assign_students_by_flow
+from tests.sample_data import make_data, scheduler_problems
+
+
+class MinCostFlowTest(unittest.TestCase):
+    def test_stops_when_more_flow_no_longer_pays(self):
+        # source 0, sink 3: the path through 1 pays 5 per unit, the path through 2 pays 1
+        network = MinCostFlow(4)
+        first = network.add_edge(0, 1, 2, -5)
+        network.add_edge(1, 3, 1, 0)
+        second = network.add_edge(0, 2, 2, -1)
+        network.add_edge(2, 3, 2, 0)
+        detour = network.add_edge(1, 2, 1, 5)  # cancels what the path through 1 pays
+        costly = network.add_edge(0, 3, 5, 1)
+        flow, cost = network.solve(0, 3)
+        self.assertEqual((flow, cost), (3, -7))
+        self.assertEqual([network.flow(edge) for edge in [first, second, detour, costly]], [1, 2, 0, 0])
+
+    def test_uses_a_residual_arc_to_reroute(self):
+        # The cheapest first path blocks a better pair of paths, which needs the reverse arc
+        network = MinCostFlow(4)
+        network.add_edge(0, 1, 1, -2)
+        network.add_edge(0, 2, 1, -1)
+        network.add_edge(1, 3, 1, 0)
+        network.add_edge(1, 2, 1, 0)
+        network.add_edge(2, 3, 1, -1)
+        flow, cost = network.solve(0, 3)
+        self.assertEqual((flow, cost), (2, -4))
+
+    def test_matches_brute_force_on_small_assignments(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            num_students, num_sections = rng.randint(1, 5), rng.randint(1, 3)
+            seats = [rng.randint(1, 3) for _ in range(num_sections)]
+            weights = [[rng.choice([0, 1, 5, 10]) for _ in range(num_sections)] for _ in range(num_students)]
+
+            network = MinCostFlow(2 + num_students + num_sections)
+            for student in range(num_students):
+                network.add_edge(0, 2 + student, 1, 0)
+                for section in range(num_sections):
+                    if weights[student][section]:
+                        network.add_edge(2 + student, 2 + num_students + section, 1, -weights[student][section])
+            for section in range(num_sections):
+                network.add_edge(2 + num_students + section, 1, seats[section], 0)
+
+            best = 0
+            for choice in itertools.product(range(-1, num_sections), repeat=num_students):
+                if all(choice.count(section) <= seats[section] for section in range(num_sections)):
+                    best = max(best, sum(weights[s][c] for s, c in enumerate(choice) if c >= 0))
+            self.assertEqual(network.solve(0, 1)[1], -best)
+
+
+class AssignStudentsByFlowTest(unittest.TestCase):
+    def test_flow_never_lowers_the_score(self):
+        for num_sections in [1, 2]:
+            for block_plan in ['greedy', 'coloring']:
+                for seed in range(3):
+                    data = make_data(num_students=24, num_sections=num_sections, seed=seed)
+                    scheduler = CourseScheduler(data=data, seed=seed)
+                    scheduler.run_scheduling(block_plan=block_plan)
+                    before = schedule_score(scheduler, request_weights(scheduler.students))
+                    summary = assign_students_by_flow(scheduler)
+                    after = schedule_score(scheduler, request_weights(scheduler.students))
+                    self.assertEqual(after, summary['final_score'])
+                    self.assertGreaterEqual(after, before)
+                    self.assertEqual(scheduler_problems(scheduler), [])
+
+    def test_worse_assignment_is_rolled_back(self):
+        # A single round leaves duplicate sections here, and dropping them scores lower
+        scheduler = CourseScheduler(data=make_data(num_students=24, num_sections=2, seed=38), seed=38)
+        scheduler.run_scheduling()
+        before = {(student_id, course_code, id(section))
+                  for student_id, courses in enumerate(scheduler.student_assignments)
+                  for course_code, section in courses.items()}
+        summary = assign_students_by_flow(scheduler, max_rounds=1)
+        after = {(student_id, course_code, id(section))
+                 for student_id, courses in enumerate(scheduler.student_assignments)
+                 for course_code, section in courses.items()}
+        self.assertTrue(summary['restored'])
+        self.assertEqual(after, before)
+        self.assertEqual(scheduler_problems(scheduler), [])
+
+    def test_single_section_courses_get_the_best_assignment(self):
+        # With one section per course the flow is exact, so a second pass can't improve it
+        scheduler = CourseScheduler(data=make_data(num_students=24), seed=0)
+        scheduler.run_scheduling()
+        first = assign_students_by_flow(scheduler)
+        second = assign_students_by_flow(scheduler)
+        self.assertEqual(first['rounds'], 1)
+        self.assertEqual(second['initial_score'], second['final_score'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+
+import pulp
+
+from src.scheduling.scheduling.model_builder import (
+    build_request_index,
+    build_schedule_model,
+    prune_combinations,
+    room_seat_limit,
+    selected_keys,
+)
+from tests.sample_data import make_data, make_student
+
+
+def rows_over(prob, variables):
+    """Constraints whose variables are exactly the given ones"""
+    names = {var.name for var in variables}
+    return [row for row in prob.constraints.values() if {var.name for var in row.keys()} == names]
+
+
+def row_bound(row):
+    return -row.constant
+
+
+class RequestIndexTest(unittest.TestCase):
+    def test_keeps_each_course_once_at_its_highest_priority(self):
+        data = make_data(num_students=0)
+        data['students'] = [make_student('S0', {'required': ['C1'], 'recommended': ['C1', 'C2', 'NOPE']})]
+        index = build_request_index(data)
+        self.assertEqual(index['student_courses'], {'S0': {'C1': 'required', 'C2': 'recommended'}})
+        self.assertEqual([course['code'] for course in index['relevant_courses']], ['C1', 'C2'])
+
+
+class PruningTest(unittest.TestCase):
+    def test_drops_unavailable_blocks_and_small_rooms(self):
+        data = make_data()
+        data['courses'][0]['min_size'] = 9  # enforced minimum 6 once six students request it
+        data['students'] = [make_student(f"S{i}", {'requested': ['C1', 'C6']}) for i in range(7)]
+        index = build_request_index(data)
+        pruning = prune_combinations(data, index, [room['capacity'] for room in data['rooms']])
+        self.assertEqual(pruning['course_blocks']['C6'], ['1A', '2A'])
+        self.assertEqual(pruning['course_units']['C1'], [1, 2])
+        self.assertEqual(pruning['course_units']['C6'], [0, 1, 2])
+
+        model = build_schedule_model(data, index)
+        self.assertEqual({block for (_, course_code, block) in model['x'] if course_code == 'C6'}, {'1A', '2A'})
+        self.assertEqual({room for (course_code, _, room) in model['y'] if course_code == 'C1'}, {'102', '103'})
+
+
+class ScheduleModelTest(unittest.TestCase):
+    def test_request_is_fulfilled_at_most_once(self):
+        data = make_data()
+        data['courses'][-1]['available_blocks'] = ['1A']
+        data['students'] = [make_student('S0', {'required': ['C1'], 'requested': ['C6']})]
+        model = build_schedule_model(data, build_request_index(data))
+        course_vars = [var for (_, course_code, _), var in model['x'].items() if course_code == 'C1']
+        rows = rows_over(model['prob'], course_vars)
+        self.assertEqual(len(course_vars), 4)
+        self.assertEqual([(row.sense, row_bound(row)) for row in rows], [(pulp.LpConstraintLE, 1)])
+        # A request with a single allowed block needs no row of its own
+        self.assertEqual(rows_over(model['prob'], [model['x'][('S0', 'C6', '1A')]]), [])
+
+    def test_openings_are_capped_at_num_sections(self):
+        data = make_data()
+        data['courses'][1]['num_sections'] = 4
+        model = build_schedule_model(data, build_request_index(data))
+        for course_code, expected in [('C1', [(pulp.LpConstraintLE, 1)]), ('C2', [])]:
+            opening_vars = [var for (code, _), var in model['is_open'].items() if code == course_code]
+            rows = rows_over(model['prob'], opening_vars)
+            self.assertEqual([(row.sense, row_bound(row)) for row in rows], expected)
+
+    def test_room_capacity_is_capped_at_demand(self):
+        for formulation in ['room', 'room_class']:
+            data = make_data()
+            data['students'] = [make_student(f"S{i}", {'requested': ['C1']}) for i in range(5)]
+            model = build_schedule_model(data, build_request_index(data), formulation)
+            capacities = {room['room_number']: room['capacity'] for room in data['rooms']}
+            if formulation == 'room_class':
+                capacities = {c: room_class['capacity'] for c, room_class in enumerate(model['room_classes'])}
+            x_vars = [var for (_, _, block), var in model['x'].items() if block == '1A']
+            y_vars = {var.name: key for (_, block, key), var in model['y'].items() if block == '1A'}
+            rows = [row for row in model['prob'].constraints.values()
+                    if {var.name for var in row.keys()} == {var.name for var in x_vars} | set(y_vars)]
+            self.assertEqual(len(rows), 1)
+            for var, coefficient in rows[0].items():
+                if var.name in y_vars:
+                    self.assertEqual(-coefficient, min(room_seat_limit(capacities[y_vars[var.name]]), 5))
+
+    def test_aggregated_students_share_integer_counts(self):
+        data = make_data(num_students=0)
+        data['students'] = ([make_student(f"A{i}", {'required': ['C1', 'C2']}) for i in range(3)]
+                            + [make_student('B0', {'required': ['C1']})])
+        model = build_schedule_model(data, build_request_index(data), aggregate=True)
+        self.assertEqual([group['students'] for group in model['groups']], [['A0', 'A1', 'A2'], ['B0']])
+        group_var = model['x'][(0, 'C1', '1A')]
+        self.assertEqual((group_var.cat, group_var.upBound), (pulp.LpInteger, 3))
+        self.assertEqual(model['x'][(1, 'C1', '1A')].upBound, 1)
+
+        block_vars = [var for (g, _, block), var in model['x'].items() if g == 0 and block == '1A']
+        self.assertEqual([row_bound(row) for row in rows_over(model['prob'], block_vars)], [3])
+
+    def test_formulations_share_the_assignment_variables(self):
+        data = make_data()
+        data['rooms'].append({'room_number': '104', 'capacity': 8})
+        index = build_request_index(data)
+        room = build_schedule_model(data, index, 'room')
+        room_class = build_schedule_model(data, index, 'room_class')
+        self.assertEqual(set(room['x']), set(room_class['x']))
+        self.assertLess(len(room_class['y']), len(room['y']))
+
+    def test_unknown_formulation_is_rejected(self):
+        data = make_data()
+        with self.assertRaises(ValueError):
+            build_schedule_model(data, build_request_index(data), 'rooms')
+
+
+class SelectedKeysTest(unittest.TestCase):
+    def test_keeps_only_variables_set_to_one(self):
+        data = make_data()
+        model = build_schedule_model(data, build_request_index(data))
+        keys = list(model['x'])
+        for i, var in enumerate(model['x'].values()):
+            var.varValue = [None, 0.0, 0.9999999, 1.0][i % 4]
+        self.assertEqual(selected_keys(model['x']), [key for i, key in enumerate(keys) if i % 4 >= 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from src.scheduling.scheduling.portfolio import run_portfolio
+from tests.sample_data import make_data
+
+
+class PortfolioTest(unittest.TestCase):
+    def test_best_seed_is_reproducible(self):
+        data = make_data(num_students=24, num_sections=2)
+        first = run_portfolio(data, seeds=4, max_workers=1)
+        second = run_portfolio(data, seeds=4, max_workers=1)
+        self.assertEqual(first['scores'], second['scores'])
+        self.assertEqual(first['seed'], second['seed'])
+        self.assertEqual(first['score'], max(first['scores'].values()))
+        self.assertEqual(first['results'], second['results'])
+
+    def test_process_pool_matches_a_single_worker(self):
+        data = make_data(num_students=24, num_sections=2)
+        pooled = run_portfolio(data, seeds=[3, 5], max_workers=2)
+        single = run_portfolio(data, seeds=[3, 5], max_workers=1)
+        self.assertEqual(pooled['scores'], single['scores'])
+
+    def test_spent_budget_runs_no_seed(self):
+        summary = run_portfolio(make_data(), seeds=2, time_limit=0, max_workers=1)
+        self.assertEqual(summary, {'seed': None, 'score': None, 'results': None, 'scores': {}})
+
+    def test_needs_a_seed(self):
+        with self.assertRaises(ValueError):
+            run_portfolio(make_data(), seeds=[])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from src.scheduling.scheduler_algorithm import CourseScheduler
+from src.scheduling.scheduling.rebalancer import rebalance_sections
+from tests.sample_data import greedy_scheduler, make_course, make_data, make_student, scheduler_problems
+
+
+def fulfilled(scheduler):
+    return {(student_id, course_code) for student_id, courses in enumerate(scheduler.student_assignments)
+            for course_code, section in courses.items() if section.block}
+
+
+class RebalancerTest(unittest.TestCase):
+    def test_evens_sections_without_losing_requests(self):
+        for seed in range(3):
+            scheduler = greedy_scheduler(seed=seed, num_students=40)
+            before = fulfilled(scheduler)
+            report = rebalance_sections(scheduler)
+            self.assertEqual(fulfilled(scheduler), before)
+            self.assertEqual(scheduler_problems(scheduler), [])
+            for spread in report.values():
+                self.assertLessEqual(spread['after'], spread['before'])
+
+    def test_moves_students_to_the_smaller_section(self):
+        data = make_data()
+        data['courses'] = [make_course('C1', num_sections=2, max_size=10)]
+        data['students'] = [make_student(f"S{i}", {'required': ['C1']}) for i in range(8)]
+        data['lecturers'] = [{'id': 'L0', 'courses': [{'code': 'C1'}]}]
+        scheduler = CourseScheduler(data=data, seed=0)
+        scheduler.run_scheduling(block_plan='coloring')
+        first, second = scheduler.course_sections['C1']
+        for student_id in range(len(scheduler.students)):
+            scheduler._unenroll(student_id, 'C1')
+            scheduler._enroll(student_id, first)
+
+        report = rebalance_sections(scheduler)
+        self.assertEqual(report['C1'], {'before': 8, 'after': 0})
+        self.assertEqual((len(first.students), len(second.students)), (4, 4))
+        self.assertEqual(scheduler_problems(scheduler), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from src.scheduling.scheduling.local_search import request_weights, schedule_score
+from src.scheduling.scheduling.repair import repair_unresolved
+from tests.sample_data import greedy_scheduler, scheduler_problems
+
+
+class RepairTest(unittest.TestCase):
+    def test_repair_only_applies_improving_chains(self):
+        for seed in range(3):
+            scheduler = greedy_scheduler(seed=seed, num_students=40)
+            summary = repair_unresolved(scheduler, max_depth=3)
+            self.assertGreaterEqual(summary['final_score'], summary['initial_score'])
+            self.assertEqual(summary['final_score'], schedule_score(scheduler, request_weights(scheduler.students)))
+            self.assertEqual(scheduler_problems(scheduler), [])
+
+    def test_search_budget_bounds_the_pass(self):
+        scheduler = greedy_scheduler(seed=1, num_students=40)
+        summary = repair_unresolved(scheduler, max_depth=3, max_nodes=1)
+        self.assertGreaterEqual(summary['final_score'], summary['initial_score'])
+        self.assertEqual(scheduler_problems(scheduler), [])
+
+        summary = repair_unresolved(greedy_scheduler(seed=1, num_students=40), time_limit=0)
+        self.assertEqual((summary['searched'], summary['repaired']), (0, 0))
+        self.assertEqual(summary['final_score'], summary['initial_score'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+from src.scheduling.scheduler_algorithm import CourseScheduler
+from src.scheduling.scheduling.local_search import request_weights, schedule_score
+from tests.sample_data import BLOCKS, make_data, make_student, scheduler_problems
+
+
+class CourseSchedulerTest(unittest.TestCase):
+    def test_greedy_schedule_keeps_hard_rules(self):
+        for ordering in ['input', 'constrained']:
+            for num_sections in [1, 2]:
+                scheduler = CourseScheduler(data=make_data(num_sections=num_sections), seed=1)
+                scheduler.run_scheduling(ordering=ordering)
+                self.assertEqual(scheduler_problems(scheduler), [], (ordering, num_sections))
+
+    def test_seed_makes_runs_reproducible(self):
+        first = CourseScheduler(data=make_data(num_sections=2), seed=7).run_scheduling()
+        second = CourseScheduler(data=make_data(num_sections=2), seed=7).run_scheduling()
+        self.assertEqual(first, second)
+
+    def test_no_scheduled_section_is_left_empty(self):
+        for seed in range(5):
+            scheduler = CourseScheduler(data=make_data(num_students=24, num_sections=2, seed=seed), seed=seed)
+            scheduler.run_scheduling()
+            empty = [section for block in scheduler.blocks for section in scheduler.schedule[block]
+                     if not len(section.students)]
+            self.assertEqual(empty, [])
+
+    def test_occupancy_masks_match_assignments(self):
+        scheduler = CourseScheduler(data=make_data(num_sections=2), seed=3)
+        scheduler.run_scheduling()
+        for student_id, courses in enumerate(scheduler.student_assignments):
+            expected = scheduler.blocks_mask(section.block for section in courses.values() if section.block)
+            self.assertEqual(scheduler.student_masks[student_id], expected)
+
+    def test_least_filled_section_skips_busy_and_full_sections(self):
+        scheduler = CourseScheduler(data=make_data(num_students=24, num_sections=2), seed=5)
+        scheduler.run_scheduling()
+        for course_code, sections in scheduler.course_sections.items():
+            for mask in range(1 << len(scheduler.blocks)):
+                candidates = [section for section in sections if section.block
+                              and not scheduler.blocks_mask([section.block]) & mask
+                              and len(section.students) < section.max_size]
+                section = scheduler._least_filled_section(course_code, mask)
+                if not candidates:
+                    self.assertIsNone(section)
+                else:
+                    self.assertIn(section, candidates)
+                    self.assertEqual(len(section.students), min(len(c.students) for c in candidates))
+
+    def test_results_map_student_indices_back_to_ids(self):
+        data = make_data(num_sections=2)
+        scheduler = CourseScheduler(data=data, seed=6)
+        results = scheduler.run_scheduling()
+        self.assertEqual(list(results['student_schedules']), [student['id'] for student in data['students']])
+        for student_id, courses in enumerate(scheduler.student_assignments):
+            schedule = results['student_schedules'][data['students'][student_id]['id']]
+            self.assertEqual({block: entry['course'] for block, entry in schedule.items()},
+                             {section.block: code for code, section in courses.items() if section.block})
+
+    def test_assign_rooms_uses_each_room_once_per_block(self):
+        scheduler = CourseScheduler(data=make_data(num_students=24), seed=2)
+        scheduler.run_scheduling()
+        capacity = {room['room_number']: room['capacity'] for room in scheduler.rooms}
+        for block in scheduler.blocks:
+            rooms = [section.room for section in scheduler.schedule[block] if section.room is not None]
+            self.assertEqual(len(rooms), len(set(rooms)))
+            for section in scheduler.schedule[block]:
+                if section.room is not None:
+                    self.assertGreaterEqual(capacity[section.room], len(section.students))
+
+    def test_optional_stages_never_lower_the_score(self):
+        data = make_data(num_students=24, num_sections=2)
+        weights = request_weights(data['students'])
+        greedy = CourseScheduler(data=data, seed=4)
+        greedy.run_scheduling()
+        improved = CourseScheduler(data=data, seed=4)
+        improved.run_scheduling(flow_assignment=True, local_search_time=0.2, repair_depth=2, rebalance=True)
+        self.assertEqual(scheduler_problems(improved), [])
+        self.assertGreaterEqual(schedule_score(improved, weights), schedule_score(greedy, weights))
+
+    def test_requests_an_open_section_can_take_come_first(self):
+        data = make_data(num_students=2)
+        data['students'] = [make_student(f"S{i}", {'required': ['C1']}) for i in range(2)]
+        scheduler = CourseScheduler(data=data, seed=0)
+        scheduler.create_course_sections()
+        scheduler.assign_lecturers_to_sections()
+        self.assertEqual(scheduler._request_options(1, 'C1'), (1, len(BLOCKS)))
+
+        scheduler._assign_student_to_course(0, 'C1')
+        self.assertEqual(scheduler._request_options(1, 'C1'), (0, 1))
+
+        block = scheduler.student_assignments[0]['C1'].block
+        scheduler.student_masks[1] |= scheduler.block_bits[block]
+        self.assertEqual(scheduler._request_options(1, 'C1'), (1, len(BLOCKS) - 1))
+
+    def test_unknown_ordering_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CourseScheduler(data=make_data()).run_scheduling(ordering='random')
+
+    def test_unknown_block_plan_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CourseScheduler(data=make_data()).run_scheduling(block_plan='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from src.scheduling.scheduling.model_builder import build_request_index, build_schedule_model
+from src.scheduling.scheduling.warm_start import apply_warm_start, greedy_schedule, repair_start
+from tests.sample_data import make_data, schedule_problems
+
+
+class WarmStartTest(unittest.TestCase):
+    def test_repaired_start_satisfies_every_row(self):
+        for num_sections in [1, 2]:
+            data = make_data(num_students=40, num_sections=num_sections)
+            index = build_request_index(data)
+            start = greedy_schedule(data)
+            for formulation in ['room', 'room_class']:
+                for aggregate in [False, True]:
+                    model = build_schedule_model(data, index, formulation, aggregate)
+                    fulfilled = apply_warm_start(model, data, index, start)
+                    self.assertGreater(fulfilled, 0)
+                    violated = [name for name, row in model['prob'].constraints.items() if not row.valid()]
+                    self.assertEqual(violated, [], (num_sections, formulation, aggregate))
+
+    def test_repair_keeps_openings_within_the_rules(self):
+        data = make_data(num_students=40, num_sections=2)
+        index = build_request_index(data)
+        start = greedy_schedule(data)
+        # Move C6 and its students to a block the course may not use
+        moved = 0
+        for student_schedule in start['student_schedules'].values():
+            block = next((block for block, course_code in student_schedule.items() if course_code == 'C6'), None)
+            if block is not None and '1B' not in student_schedule:
+                del student_schedule[block]
+                student_schedule['1B'] = 'C6'
+                moved += 1
+        start['course_blocks']['C6'] = ['1B']
+        start['course_rooms']['C6'] = {'1B': '103'}
+        self.assertGreater(moved, 0)
+
+        assigned, opening_rooms = repair_start(data, index, start)
+        self.assertNotIn(('C6', '1B'), opening_rooms)
+        self.assertFalse(any(course_code == 'C6' for _, course_code, _ in assigned))
+
+        schedule = {
+            'course_blocks': {},
+            'course_rooms': {},
+            'student_schedules': {},
+        }
+        for (course_code, block), room_id in opening_rooms.items():
+            schedule['course_blocks'].setdefault(course_code, []).append(block)
+            schedule['course_rooms'].setdefault(course_code, {})[block] = room_id
+        for student_id, course_code, block in assigned:
+            schedule['student_schedules'].setdefault(student_id, {})[block] = course_code
+        self.assertEqual(schedule_problems(data, schedule), [])
+
+
+if __name__ == '__main__':
+    unittest.main()